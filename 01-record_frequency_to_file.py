@@ -1,10 +1,13 @@
 #!/usr/bin/env python3
-from gnuradio import gr, blocks, analog
-import osmosdr
+from gnuradio import gr, blocks
 import time
+import argparse
+
+from iq_sources import make_source, SOURCE_HELP
+from nfm_blocks import nfm_channel
 
 class NFMRecorder(gr.top_block):
-    def __init__(self):
+    def __init__(self, source="rtl=0"):
         gr.top_block.__init__(self, "Baofeng NFM Recorder")
 
         self.freq = 437.225e6
@@ -14,31 +17,29 @@ class NFMRecorder(gr.top_block):
         self.filename = f"/tmp/baofeng_{int(time.time())}.wav"
         self.squelch_threshold = -60  # dB
 
-        self.src = osmosdr.source(args="numchan=1 rtl=0")
-        self.src.set_sample_rate(self.samp_rate)
-        self.src.set_center_freq(self.freq)
-        self.src.set_freq_corr(0)
-        self.src.set_gain_mode(False)
-        self.src.set_gain(self.rf_gain)
-
-        # Squelch
-        self.squelch = analog.simple_squelch_cc(self.squelch_threshold, 1)
+        self.src = make_source(source, self.samp_rate, self.freq, self.rf_gain)
 
-        # NFM demodulator
-        self.nfm = analog.nbfm_rx(
+        # Channel filter + decimate to 96 kS/s, then squelch and NFM demod
+        self.chan = nfm_channel(
+            self.samp_rate,
             audio_rate=self.audio_rate,
-            quad_rate=self.samp_rate,
-            tau=75e-6,
-            max_dev=5e3
+            squelch_db=self.squelch_threshold
         )
+        self.null_sink = blocks.null_sink(gr.sizeof_float)
 
         # Save audio to WAV
         self.wav_sink = blocks.wavfile_sink(self.filename, 1, int(self.audio_rate), 16)
 
-        self.connect(self.src, self.squelch, self.nfm, self.wav_sink)
+        self.connect(self.src, self.chan)
+        self.connect((self.chan, 0), self.wav_sink)
+        self.connect((self.chan, 1), self.null_sink)   # RSSI unused here
 
 if __name__ == '__main__':
-    tb = NFMRecorder()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--source", default="rtl=0", help=SOURCE_HELP)
+    args = parser.parse_args()
+
+    tb = NFMRecorder(args.source)
     print("Monitoring 437.225 MHz (NFM)...")
     try:
         tb.start()
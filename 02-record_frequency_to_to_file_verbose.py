@@ -1,12 +1,14 @@
 #!/usr/bin/env python3
-from gnuradio import gr, blocks, analog
-import osmosdr
+from gnuradio import gr, blocks
 import time
-import math
-from collections import deque
+import argparse
+import queue
+
+from iq_sources import make_source, SOURCE_HELP
+from nfm_blocks import nfm_channel, power_trigger
 
 class NFMRecorder(gr.top_block):
-    def __init__(self):
+    def __init__(self, source="rtl=0", adaptive=True):
         gr.top_block.__init__(self, "Signal-Aware NFM Recorder")
 
         self.freq = 437.225e6
@@ -17,32 +19,25 @@ class NFMRecorder(gr.top_block):
         self.floor_db = -30.0
         self.trigger_rise = 10.0      # start if signal exceeds floor + this
         self.return_margin = 2.0      # stop if signal returns to floor + margin
-        self.drop_below_avg = 15.0    # stop if signal drops this much below avg
+        self.hang_time = 0.1          # ...and stays there this long (s)
 
-        self.rolling_window = deque(maxlen=20)
-        self.avg_db = self.floor_db
         self.recording = False
+        self.events = queue.Queue()
 
-        self.src = osmosdr.source(args="numchan=1 rtl=0")
-        self.src.set_sample_rate(self.samp_rate)
-        self.src.set_center_freq(self.freq)
-        self.src.set_freq_corr(0)
-        self.src.set_gain_mode(False)
-        self.src.set_gain(self.rf_gain)
+        self.src = make_source(source, self.samp_rate, self.freq, self.rf_gain)
 
-        self.squelch = analog.simple_squelch_cc(-60, 1)
+        # Channel filter + decimate, then squelch / RSSI / NFM at 96 kS/s
+        self.chan = nfm_channel(self.samp_rate, audio_rate=self.audio_rate)
 
-        self.nfm = analog.nbfm_rx(
-            audio_rate=self.audio_rate,
-            quad_rate=self.samp_rate,
-            tau=75e-6,
-            max_dev=5e3
+        # Burst detector on the channel power (replaces probe polling)
+        self.trigger = power_trigger(
+            self.chan.channel_rate,
+            self.floor_db + self.trigger_rise,
+            self.floor_db + self.return_margin,
+            self.hang_time,
+            self.floor_db if adaptive else None     # track the real floor from here
         )
-
-        # RSSI Probe
-        self.mag = blocks.complex_to_mag_squared()
-        self.avg = blocks.moving_average_ff(512, 1.0 / 512, 4000, 1)
-        self.probe = blocks.probe_signal_f()
+        self.trigger.subscribe(self.on_burst)
 
         # Always-connected WAV file
         self.filename = f"/tmp/baofeng_{int(time.time())}.wav"
@@ -52,13 +47,14 @@ class NFMRecorder(gr.top_block):
         self.gate = blocks.multiply_const_ff(0.0)  # 0.0 = mute, 1.0 = pass
 
         # Flowgraph connections
-        self.connect(self.src, self.mag, self.avg, self.probe)
-        self.connect(self.src, self.squelch, self.nfm, self.gate, self.wav_sink)
+        self.connect(self.src, self.chan)
+        self.connect((self.chan, 1), self.trigger)
+        self.connect((self.chan, 0), self.gate, self.wav_sink)
 
-    def compute_rolling_avg(self):
-        if not self.rolling_window:
-            return self.floor_db
-        return sum(self.rolling_window) / len(self.rolling_window)
+    def on_burst(self, ev):
+        """Runs on the flowgraph thread: flip the gate now, report later."""
+        self.gate.set_k(1.0 if ev.kind == "start" else 0.0)
+        self.events.put(ev)
 
     def run_and_monitor(self):
         self.start()
@@ -67,29 +63,16 @@ class NFMRecorder(gr.top_block):
 
         try:
             while True:
-                level = self.probe.level()
-                db = 10 * math.log10(level) if level > 0 else -100
-
-                if not self.recording:
-                    if db > (self.floor_db + self.trigger_rise):
-                        self.gate.set_k(1.0)
-                        self.rolling_window.clear()
-                        self.recording = True
-                        print(f"🔴 Recording ACTIVE at {db:.2f} dBFS")
+                ev = self.events.get()
+                if ev.kind == "start":
+                    self.recording = True
+                    floor = self.trigger.noise_floor()
+                    if floor is not None:
+                        print(f"📉 Noise floor {floor:.1f} dBFS, trigger at {floor + self.trigger_rise:.1f}")
+                    print(f"🔴 Recording ACTIVE at {ev.db:.2f} dBFS (trigger latency {ev.latency_ms:.1f} ms)")
                 else:
-                    self.rolling_window.append(db)
-                    avg_db = self.compute_rolling_avg()
-
-                    if db <= (self.floor_db + self.return_margin):
-                        self.gate.set_k(0.0)
-                        self.recording = False
-                        print(f"⚫️ Recording stopped (floor return @ {db:.2f} dBFS)")
-                    elif avg_db - db >= self.drop_below_avg:
-                        self.gate.set_k(0.0)
-                        self.recording = False
-                        print(f"⚫️ Recording stopped (drop from avg {avg_db:.2f} → {db:.2f} dBFS)")
-
-                time.sleep(0.25)
+                    self.recording = False
+                    print(f"⚫️ Recording stopped (floor return @ {ev.db:.2f} dBFS)")
 
         except KeyboardInterrupt:
             print("\nStopped by user.")
@@ -98,7 +81,10 @@ class NFMRecorder(gr.top_block):
             print(f"Saved file: {self.filename}")
 
 if __name__ == '__main__':
-    tb = NFMRecorder()
-    tb.run_and_monitor()
-
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--source", default="rtl=0", help=SOURCE_HELP)
+    parser.add_argument("--fixed-floor", action="store_true", help="keep the -30 dBFS floor instead of tracking it")
+    args = parser.parse_args()
 
+    tb = NFMRecorder(args.source, not args.fixed_floor)
+    tb.run_and_monitor()
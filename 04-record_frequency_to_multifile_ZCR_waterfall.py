@@ -3,21 +3,139 @@ import os
 os.environ["QT_QUICK_BACKEND"] = "software"
 os.environ["QT_XCB_GL_INTEGRATION"] = "none"
 
-from gnuradio import gr, qtgui, blocks, analog
+from gnuradio import gr, qtgui, blocks
 from gnuradio.filter import firdes
-import osmosdr
 import sip
 from PyQt5 import Qt, QtCore
 import sys
 import math
 import time
 import signal
-from collections import deque
+import argparse
+
+from nfm_blocks import nfm_channel, nfm_channel_bank, power_trigger, zcr_gate, burst_wav_sink
+from dsp import burst_stamp
+from iq_sources import make_source, SOURCE_HELP
+from spectrum_server import attach_spectrum
+
+# Band segment covered by the slider / wideband mode
+BAND_START = 437.0e6
+BAND_STOP = 437.5e6
+CHANNEL_STEP = 25e3
+
+class TriggerBridge(QtCore.QObject):
+    """Carries burst events from the flowgraph thread to the GUI thread."""
+    burst = QtCore.pyqtSignal(object, object)
+
+class ChannelSlot:
+    """Trigger state, probes and WAV output for one 25 kHz channel."""
+
+    def __init__(self, explorer, freq, audio, power, power_rate, audio_rate, to_audio, tag_freq=False):
+        self.ex = explorer
+        self.tb = explorer.tb
+        self.freq = freq
+        self.audio = audio              # (block, port) carrying demodulated audio
+        self.audio_rate = audio_rate
+        self.to_audio = to_audio        # power-stream offset -> audio offset
+        self.tag_freq = tag_freq        # put the frequency in the file name
+
+        # State
+        self.recording = False
+        self.signal_dropped = False
+        self.dropped_at = 0.0
+        self.start_audio = 0            # audio offset where the file starts
+        self.end_audio = 0              # audio offset where the carrier dropped
+        self.tail_at = None             # audio offset where audio went dead
+        self.filename = ""
+        self.db = -120.0
+
+        # Persistent WAV writer, opened/closed without touching the graph;
+        # every file starts pre_trigger before its edge
+        self.wav_sink = burst_wav_sink(audio_rate, explorer.pre_trigger)
+        self.tb.connect(audio, self.wav_sink)
+
+        # Signal strength monitor (display only)
+        self.probe = blocks.probe_signal_f()
+        self.tb.connect(power, self.probe)
+
+        # Burst detector: start/end edges arrive as events, no polling
+        self.trigger = power_trigger(
+            power_rate,
+            explorer.floor_db + explorer.trigger_rise,
+            explorer.floor_db + explorer.drop_below_avg,
+            explorer.hang_time,
+            explorer.floor_db if explorer.adaptive else None   # per-slot tracked floor
+        )
+        self.trigger.subscribe(lambda ev: explorer.bridge.burst.emit(self, ev))
+        self.tb.connect(power, self.trigger)
+
+        # Zero-crossing rate over every audio sample, 10 ms frames
+        self.zcr = zcr_gate(audio_rate, static_hz=explorer.zcr_static_hz)
+        self.zcr.subscribe(lambda ev: explorer.bridge.burst.emit(self, ev))
+        self.tb.connect(audio, self.zcr)
+
+    def on_burst(self, ev):
+        """Handle a trigger edge (GUI thread)."""
+        if ev.kind == "dead":
+            self.tail_at = ev.offset
+            self._maybe_stop()
+        elif ev.kind == "live":
+            self.tail_at = None
+        elif ev.kind == "start":
+            self.signal_dropped = False
+            if not self.recording:
+                self.start_audio = self.to_audio(ev.offset)
+                if self.tag_freq:
+                    self.filename = f"/tmp/baofeng_{self.freq/1e6:.4f}_{burst_stamp()}.wav"
+                else:
+                    self.filename = f"/tmp/baofeng_{burst_stamp()}.wav"
+                self._start_recording(self.filename)
+                print(f"🔴 Recording ACTIVE at {ev.db:.2f} dBFS @ {self.freq/1e6:.4f} MHz "
+                      f"(trigger latency {ev.latency_ms:.1f} ms)")
+        else:
+            self.signal_dropped = True
+            self.dropped_at = time.time()
+            self.end_audio = self.to_audio(ev.offset)
+            self._maybe_stop()
+
+    def poll(self):
+        level = self.probe.level()
+        self.db = 10 * math.log10(max(level, 1e-12))
+
+        # carrier gone but the audio never went dead: cut at the carrier drop
+        if self.recording and self.signal_dropped and time.time() - self.dropped_at > self.ex.zcr_timeout:
+            print(f"⚫️ Recording stopped (no ZCR tail) @ {self.freq/1e6:.4f} MHz")
+            self._stop_recording(self.end_audio)
+
+    def _maybe_stop(self):
+        if self.recording and self.signal_dropped and self.tail_at is not None:
+            # cut where the audio went dead, unless it was dead from the start
+            cut = self.tail_at if self.tail_at > self.start_audio else self.end_audio
+            print(f"⚫️ Recording stopped (ZCR={self.zcr.zcr():.3f}, "
+                  f"tail cut {1e3 * (self.end_audio - cut) / self.audio_rate:+.0f} ms) @ {self.freq/1e6:.4f} MHz")
+            self._stop_recording(cut)
+
+    def _start_recording(self, filename):
+        self.wav_sink.open(filename, self.start_audio)
+        self.recording = True
+
+    def _stop_recording(self, offset=None):
+        self.wav_sink.close(offset, self._saved)
+        self.recording = False
+
+    def _saved(self, path, frames):
+        """Flowgraph thread, once the WAV header is final."""
+        if not frames:
+            os.remove(path)
+            print(f"⚠️ Deleted empty file: {path}")
+        else:
+            print(f"💾 Saved file: {path}")
 
 class WaterfallExplorer(Qt.QWidget):
-    def __init__(self):
+    def __init__(self, wideband=False, source="rtl=0", spectrum_port=0, adaptive=True):
         super().__init__()
         self.setWindowTitle("Baofeng Signal Explorer")
+        self.wideband = wideband
 
         # SDR & signal params
         self.freq = 437.225e6
@@ -26,61 +144,71 @@ class WaterfallExplorer(Qt.QWidget):
         self.rf_gain = 40
 
         # Thresholds
-        self.floor_db = -30.0
+        self.floor_db = -30.0           # starting point; tracked per slot unless --fixed-floor
+        self.adaptive = adaptive
         self.trigger_rise = 10.0
         self.drop_below_avg = 5.0
-        self.zcr_static_threshold = 0.4
+        self.hang_time = 0.1
+        self.zcr_static_hz = 1000.0     # ZCR above this (as a tone frequency) is static
+        self.zcr_timeout = 1.0          # give up waiting for a ZCR tail after this (s)
+        self.pre_trigger = 0.5          # audio kept before the trigger edge (s)
 
-        # State
-        self.rolling_window = deque(maxlen=20)
-        self.zcr_window = deque(maxlen=10)
-        self.last_audio = 0
-        self.recording = False
-        self.filename = ""
+        self.bridge = TriggerBridge()
+        self.bridge.burst.connect(lambda slot, ev: slot.on_burst(ev))
 
         self.tb = gr.top_block()
 
-        # Source
-        self.src = osmosdr.source(args="numchan=1 rtl=0")
-        self.src.set_sample_rate(self.samp_rate)
-        self.src.set_center_freq(self.freq)
-        self.src.set_gain(self.rf_gain)
-
-        # Signal strength monitor
-        self.mag = blocks.complex_to_mag_squared()
-        self.avg = blocks.moving_average_ff(512, 1.0 / 512, 4000, 1)
-        self.probe = blocks.probe_signal_f()
-        self.tb.connect(self.src, self.mag, self.avg, self.probe)
+        # Wideband mode sits in the middle of the band and never retunes
+        center = (BAND_START + BAND_STOP) / 2 if wideband else self.freq
 
-        # Demodulator
-        self.squelch = analog.simple_squelch_cc(-60, 1)
-        self.nfm = analog.nbfm_rx(audio_rate=self.audio_rate, quad_rate=self.samp_rate, tau=75e-6, max_dev=5e3)
-        self.tb.connect(self.src, self.squelch, self.nfm)
+        # Source
+        self.src = make_source(source, self.samp_rate, center, self.rf_gain)
 
-        # Audio probe for ZCR
-        self.audio_tap = blocks.probe_signal_f()
-        self.audio_tap_in = blocks.keep_one_in_n(gr.sizeof_float, 480)  # 10x per sec at 48kHz
-        self.tb.connect(self.nfm, self.audio_tap_in, self.audio_tap)
+        if wideband:
+            # One PFB channelizer, one squelch/NFM/recorder chain per slot
+            nslots = int(round((BAND_STOP - BAND_START) / CHANNEL_STEP)) + 1
+            freqs = [BAND_START + i * CHANNEL_STEP for i in range(nslots)]
+            self.bank = nfm_channel_bank(self.samp_rate, [f - center for f in freqs], CHANNEL_STEP)
+            self.tb.connect(self.src, self.bank)
+            self.slots = [
+                ChannelSlot(self, f, self.bank.audio_port(i), self.bank.power_port(i),
+                            self.bank.channel_rate, self.bank.audio_rate,
+                            self.bank.audio_offset, tag_freq=True)
+                for i, f in enumerate(freqs)
+            ]
+        else:
+            # Channel filter + decimate, then squelch / RSSI / NFM at 96 kS/s
+            self.chan = nfm_channel(self.samp_rate, audio_rate=self.audio_rate)
+            self.tb.connect(self.src, self.chan)
+            self.slots = [ChannelSlot(self, self.freq, (self.chan, 0), (self.chan, 1),
+                                      self.chan.channel_rate, self.audio_rate,
+                                      self.chan.audio_offset)]
 
         # Waterfall
         self.wf = qtgui.waterfall_sink_c(
             1024, firdes.WIN_BLACKMAN_hARRIS,
-            self.freq, self.samp_rate, "Waterfall", 1
+            center, self.samp_rate, "Waterfall", 1
         )
         self.wf.set_update_time(0.10)
         self.wf.enable_grid(True)
         self.tb.connect(self.src, self.wf)
         self.wf_win = sip.wrapinstance(self.wf.pyqwidget(), Qt.QWidget)
 
+        # Remote viewers get quantized rows instead of X11-forwarded pixels
+        self.spectrum = None
+        if spectrum_port:
+            self.spectrum = attach_spectrum(self.tb, self.src, self.samp_rate, center, spectrum_port)
+
         # GUI
         layout = Qt.QVBoxLayout()
         self.setLayout(layout)
 
         self.slider = Qt.QSlider(Qt.Qt.Horizontal)
         self.slider.setMinimum(0)
-        self.slider.setMaximum(int((437.5e6 - 437.0e6) / 25e3))
-        self.slider.setValue(int((self.freq - 437.0e6) / 25e3))
+        self.slider.setMaximum(int((BAND_STOP - BAND_START) / CHANNEL_STEP))
+        self.slider.setValue(int((self.freq - BAND_START) / CHANNEL_STEP))
         self.slider.valueChanged.connect(self.update_freq)
+        self.slider.setEnabled(not wideband)
 
         self.label = Qt.QLabel("Signal: ")
         self.label.setAlignment(Qt.Qt.AlignCenter)
@@ -91,72 +219,38 @@ class WaterfallExplorer(Qt.QWidget):
 
         self.tb.start()
 
+        # Display refresh + ZCR timeout; start/stop edges are event driven
         self.timer = Qt.QTimer()
         self.timer.timeout.connect(self.poll_signal)
         self.timer.start(250)
 
     def update_freq(self, val):
-        freq = 437.0e6 + val * 25e3
+        freq = BAND_START + val * CHANNEL_STEP
         self.freq = freq
+        self.slots[0].freq = freq
         self.src.set_center_freq(freq)
         self.wf.set_frequency_range(freq, self.samp_rate)
+        if self.spectrum:
+            self.spectrum.set_center(freq)
 
     def poll_signal(self):
-        level = self.probe.level()
-        db = 10 * math.log10(max(level, 1e-12))
-        self.label.setText(f"Signal: {db:.2f} dBFS @ {self.freq/1e6:.6f} MHz")
-        self.rolling_window.append(db)
-        avg_db = sum(self.rolling_window) / len(self.rolling_window)
-
-        # Fake ZCR on audio stream
-        audio_val = self.audio_tap.level()
-        zcr = abs(audio_val - self.last_audio)
-        self.last_audio = audio_val
-        self.zcr_window.append(1 if zcr > 1e-3 else 0)
-        zcr_ratio = sum(self.zcr_window) / len(self.zcr_window)
-
-        if not self.recording and db > self.floor_db + self.trigger_rise:
-            self.filename = f"/tmp/baofeng_{int(time.time())}.wav"
-            self._start_recording(self.filename)
-            print(f"🔴 Recording ACTIVE at {db:.2f} dBFS")
-
-        elif self.recording:
-            signal_dropped = db < self.floor_db + self.drop_below_avg
-            static_detected = zcr_ratio > self.zcr_static_threshold
-
-            if signal_dropped and static_detected:
-                print(f"⚫️ Recording stopped (ZCR={zcr_ratio:.2f})")
-                self._stop_recording()
+        for slot in self.slots:
+            slot.poll()
 
-    def _start_recording(self, filename):
-        self.tb.lock()
-        try:
-            self.wav_sink = blocks.wavfile_sink(filename, 1, int(self.audio_rate), 16)
-            self.tb.connect(self.nfm, self.wav_sink)
-            self.recording = True
-        finally:
-            self.tb.unlock()
-
-    def _stop_recording(self):
-        time.sleep(0.25)
-        self.tb.lock()
-        try:
-            self.tb.disconnect(self.nfm, self.wav_sink)
-        finally:
-            self.tb.unlock()
-
-        size = os.path.getsize(self.filename) if os.path.exists(self.filename) else 0
-        if size <= 44:
-            os.remove(self.filename)
-            print(f"⚠️ Deleted empty file: {self.filename}")
+        if self.wideband:
+            active = [f"{s.freq/1e6:.4f}" for s in self.slots if s.recording]
+            self.label.setText(f"{len(self.slots)} channels | recording: {', '.join(active) or '-'}")
         else:
-            print(f"💾 Saved file: {self.filename}")
-        self.recording = False
+            slot = self.slots[0]
+            self.label.setText(f"Signal: {slot.db:.2f} dBFS  ZCR: {slot.zcr.zcr():.3f} @ {self.freq/1e6:.6f} MHz")
 
     def closeEvent(self, event):
-        if self.recording:
-            self._stop_recording()
+        for slot in self.slots:
+            if slot.recording:
+                slot._stop_recording()
         self.timer.stop()
+        if self.spectrum:
+            self.spectrum.close()
         self.tb.stop()
         self.tb.wait()
         event.accept()
@@ -168,9 +262,18 @@ def handle_sigint(*args):
 signal.signal(signal.SIGINT, handle_sigint)
 
 if __name__ == '__main__':
-    app = Qt.QApplication(sys.argv)
-    explorer = WaterfallExplorer()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--wideband", action="store_true",
+                        help="record every 25 kHz slot in 437.0-437.5 MHz at once (PFB channelizer)")
+    parser.add_argument("--source", default="rtl=0", help=SOURCE_HELP)
+    parser.add_argument("--spectrum-port", type=int, default=0,
+                        help="serve waterfall rows to 10-spectrum_client.py on this port (0 = off)")
+    parser.add_argument("--fixed-floor", action="store_true", help="keep the -30 dBFS floor instead of tracking it")
+    args, qt_args = parser.parse_known_args()
+
+    app = Qt.QApplication(sys.argv[:1] + qt_args)
+    explorer = WaterfallExplorer(wideband=args.wideband, source=args.source,
+                                 spectrum_port=args.spectrum_port, adaptive=not args.fixed_floor)
     explorer.resize(1000, 600)
     explorer.show()
     sys.exit(app.exec_())
-
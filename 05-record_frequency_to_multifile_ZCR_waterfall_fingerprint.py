@@ -1,99 +1,71 @@
 #!/usr/bin/env python3
-import sys, os, time, math, threading, signal
-import numpy as np
-from gnuradio import gr, blocks, analog, qtgui
+import sys, os, time, signal, argparse
+from gnuradio import qtgui
 from gnuradio.filter import firdes
-import osmosdr
 from PyQt5 import Qt, QtCore
 import sip
 
+from nfm_recorder import NFMRecorder
+from dsp import burst_stamp
+from fingerprint import rename_tagged, save_sidecar
+from fingerprint_pool import FingerprintPool
+from fingerprint_db import FingerprintDB
+from iq_sources import SOURCE_HELP
+from spectrum_server import attach_spectrum
+from metrics import Metrics, MetricsServer, enable_perf_counters
+
 # Suppress GL errors over SSH/X11
 os.environ["QT_XCB_GL_INTEGRATION"] = "none"
 os.environ["QT_OPENGL"] = "software"
 os.environ["LIBGL_ALWAYS_SOFTWARE"] = "1"
 Qt.QApplication.setAttribute(Qt.Qt.AA_UseSoftwareOpenGL)
 
-class NFMRecorder(gr.top_block):
-    def __init__(self, freq=437.225e6):
-        super().__init__("NFM Recorder")
-        self.freq = freq
-        self.samp_rate = 2.4e6
-        self.audio_rate = 48e3
-        self.rf_gain = 40
-
-        # IQ buffer
-        self.iq_sink = blocks.vector_sink_c()
-
-        # Audio buffer for ramp detection
-        self.audio_sink = blocks.vector_sink_f()
-
-        # Source
-        self.src = osmosdr.source(args="numchan=1 rtl=0")
-        self.src.set_sample_rate(self.samp_rate)
-        self.src.set_center_freq(self.freq)
-        self.src.set_gain(self.rf_gain)
-
-        # Probe for audio power
-        self.mag = blocks.complex_to_mag_squared()
-        self.avg = blocks.moving_average_ff(512, 1.0/512)
-        self.probe = blocks.probe_signal_f()
-
-        # Demod chain
-        self.squelch = analog.simple_squelch_cc(-60, 1)
-        self.nfm = analog.nbfm_rx(self.audio_rate, self.samp_rate, 75e-6, 5e3)
-
-        # Audio gate + sinks
-        self.audio_gate = blocks.multiply_const_ff(0.0)
-        self.null_sink = blocks.null_sink(gr.sizeof_float)
-        self.wav_sink = None
-        self.current_wav = None
-
-        # Connections
-        self.connect(self.src, self.mag, self.avg, self.probe)
-        self.connect(self.src, self.iq_sink)                             # IQ data always
-        self.connect(self.src, self.squelch, self.nfm, self.audio_gate)
-        self.connect(self.audio_gate, self.audio_sink)                    # audio for ramp
-        self.connect(self.audio_gate, self.null_sink)                    # audio to null by default
-
-    def start_record(self, wav_path):
-        """Begin writing demodulated audio to WAV."""
-        self.current_wav = wav_path
-        self.wav_sink = blocks.wavfile_sink(wav_path, 1, int(self.audio_rate), 16)
-        self.lock()
-        self.disconnect(self.audio_gate, self.null_sink)
-        self.connect(self.audio_gate, self.wav_sink)
-        self.unlock()
-        self.audio_gate.set_k(1.0)
-        self.iq_sink.reset()
-        self.audio_sink.reset()
-
-    def stop_record(self):
-        """Stop writing audio."""
-        self.audio_gate.set_k(0.0)
-        if self.wav_sink:
-            self.lock()
-            self.disconnect(self.audio_gate, self.wav_sink)
-            self.connect(self.audio_gate, self.null_sink)
-            self.unlock()
-            self.wav_sink = None
-
-    def get_audio_db(self):
-        lvl = self.probe.level()
-        return 10 * math.log10(lvl) if lvl > 0 else -120
-
-    def get_iq(self):
-        return np.array(self.iq_sink.data(), dtype=np.complex64)
-
-    def get_audio(self):
-        return np.array(self.audio_sink.data(), dtype=np.float32)
+class TriggerBridge(QtCore.QObject):
+    """Carries burst events from the flowgraph thread to the GUI thread."""
+    burst = QtCore.pyqtSignal(object)
+    captured = QtCore.pyqtSignal(object, object)
+    saved = QtCore.pyqtSignal(str, int)
 
 class WaterfallExplorer(Qt.QWidget):
-    def __init__(self):
+    def __init__(self, source="rtl=0", spectrum_port=0, db=None, save_iq=True, adaptive=True, metrics_port=0):
         super().__init__()
         self.setWindowTitle("Baofeng Waterfall + Recorder")
 
+        # thresholds
+        self.base_db = -30.0
+        self.start_delta = 10.0
+        self.stop_delta = 5.0
+        self.recording = False
+        self.save_iq = save_iq
+        if metrics_port:
+            enable_perf_counters()      # before any block exists
+
         # Recorder
-        self.rec = NFMRecorder()
+        self.rec = NFMRecorder(
+            on_db=self.base_db + self.start_delta,
+            off_db=self.base_db + self.stop_delta,
+            source=source,
+            floor_db=self.base_db if adaptive else None
+        )
+        self.bridge = TriggerBridge()
+        self.bridge.burst.connect(self.on_burst)
+        self.bridge.captured.connect(self.on_captured)
+        self.bridge.saved.connect(lambda wav, frames: self.join(wav, frames=frames))
+        self.ending = {}            # end edge offset -> WAV it closes
+        self.pending = {}
+
+        # Known radios: persistent store + nearest-neighbour match
+        self.db = FingerprintDB(db) if db else None
+
+        # Fingerprint workers: fixed pool, bounded queue, IQ via shared memory
+        self.fp_pool = FingerprintPool(
+            self.rec.iq_sink.ring.capacity,
+            self.rec.audio_sink.ring.capacity,
+            workers=2, depth=4, policy="latest",
+            on_result=self.fingerprint_done
+        )
+        self.rec.trigger.subscribe(self.bridge.burst.emit)
+        self.rec.trigger.subscribe(self.on_edge)
         # Waterfall UI
         self.wf = qtgui.waterfall_sink_c(
             1024, firdes.WIN_BLACKMAN_hARRIS,
@@ -109,78 +81,132 @@ class WaterfallExplorer(Qt.QWidget):
         self.setLayout(layout)
         # connect and then start
         self.rec.connect(self.rec.src, self.wf)
+        self.spectrum = None
+        if spectrum_port:
+            self.spectrum = attach_spectrum(self.rec, self.rec.src, self.rec.samp_rate,
+                                            self.rec.freq, spectrum_port)
+
+        # Metrics: block counters, trigger latency, GUI loop lag, fingerprint queue
+        self.metrics = self.metrics_server = None
+        if metrics_port:
+            self.metrics = Metrics()
+            self.metrics.watch(dict(self.rec.metric_blocks(), wf=self.wf))
+            self.metrics.watch_source("source", self.rec.chan.xlate, self.rec.samp_rate)
+            self.metrics.gauge("fingerprint", self.fp_pool.stats)
+            self.rec.trigger.subscribe(lambda ev: self.metrics.observe("trigger_latency_ms", ev.latency_ms))
+            self.metrics_server = MetricsServer(self.metrics, metrics_port)
+            # a 100 ms timer that fires late means the GUI thread was held up (GIL, fingerprints)
+            self.tick = time.time()
+            self.lag_timer = QtCore.QTimer(self)
+            self.lag_timer.timeout.connect(self.on_tick)
+            self.lag_timer.start(100)
+        started = time.time()
         self.rec.start()
-
-        # thresholds
-        self.base_db = -30.0
-        self.start_delta = 10.0
-        self.stop_delta = 5.0
-        self.recording = False
-
-        # Poll timer
-        self.timer = QtCore.QTimer(self)
-        self.timer.timeout.connect(self.poll)
-        self.timer.start(200)
+        if self.metrics:
+            self.metrics.start(started)
 
         # Ctrl+C
         signal.signal(signal.SIGINT, lambda *args: Qt.QApplication.quit())
 
-    def poll(self):
-        db = self.rec.get_audio_db()
-        if not self.recording and db > self.base_db + self.start_delta:
-            fname = f"/tmp/baofeng_{int(time.time())}.wav"
-            print(f"🔴 Recording start @ {db:.1f} dBFS → {fname}")
-            self.rec.start_record(fname)
+    def on_tick(self):
+        now = time.time()
+        self.metrics.observe("gui_timer_lag_ms", max(0.0, 1e3 * (now - self.tick) - 100.0))
+        self.tick = now
+
+    def on_edge(self, ev):
+        """Flowgraph thread: pass the burst on once the buffers reach its end edge."""
+        if ev.kind == "end":
+            self.rec.when_captured(lambda iq, iq_at, audio, audio_at, key=ev.offset:
+                                   self.bridge.captured.emit(key, (iq, audio[audio_at:], iq_at)))
+
+    def on_burst(self, ev):
+        """React to trigger edges (GUI thread, queued from the flowgraph)."""
+        if not self.recording and ev.kind == "start":
+            fname = f"/tmp/baofeng_{burst_stamp()}.wav"
+            print(f"🔴 Recording start @ {ev.db:.1f} dBFS → {fname} (trigger latency {ev.latency_ms:.1f} ms)")
+            self.rec.start_record(fname, self.rec.chan.audio_offset(ev.offset))
             self.filename = fname
             self.recording = True
 
-        elif self.recording and db < self.base_db + self.stop_delta:
-            print(f"⚫️ Recording stop @ {db:.1f} dBFS")
-            self.rec.stop_record()
-            wav = self.filename
-            iq = self.rec.get_iq()
-            audio = self.rec.get_audio()
-            print(f"💾 Saved: {wav}")
-            threading.Thread(
-                target=self.fingerprint_and_rename,
-                args=(wav, iq, audio),
-                daemon=True
-            ).start()
+        elif self.recording and ev.kind == "end":
+            print(f"⚫️ Recording stop @ {ev.db:.1f} dBFS")
+            # the burst buffers follow via on_captured; both wait for the file to be final
+            self.ending[ev.offset] = self.filename
+            self.rec.stop_record(self.rec.chan.audio_offset(ev.offset), self.bridge.saved.emit)
             self.recording = False
 
-    def fingerprint_and_rename(self, wav_path, iq, audio):
-        print(f"🧬 Fingerprint start for {wav_path}")
-        # Ramp from audio
-        mag = np.abs(audio)
-        thr = mag.max() * 0.2
-        idx = np.where(mag > thr)[0]
-        ramp = idx[0] / self.rec.audio_rate if idx.size else 0.0
-        # CFO & BW from IQ
-        window = iq * np.hamming(len(iq))
-        spec = np.fft.fftshift(np.fft.fft(window))
-        power = np.abs(spec) ** 2
-        freqs = np.fft.fftshift(np.fft.fftfreq(len(iq), d=1/self.rec.samp_rate))
-        peak = freqs[np.argmax(power)]
-        cfo = peak / 1e3  # kHz
-        mask = power > power.max() * 0.1
-        bw = ((freqs[mask][-1] - freqs[mask][0]) / 1e3) if mask.any() else 0.0
-        new = wav_path.replace(
-            ".wav",
-            f"_ramp{ramp:.3f}_cfo{cfo:.1f}kHz_bw{bw:.1f}kHz.wav"
-        )
-        os.rename(wav_path, new)
-        print(f"🧬 Renamed → {new}")
+    def on_captured(self, key, burst):
+        wav = self.ending.pop(key, None)
+        if wav:
+            self.join(wav, burst=burst)
+
+    def join(self, wav, **part):
+        got = self.pending.setdefault(wav, {})
+        got.update(part)
+        if "frames" in got and "burst" in got:
+            del self.pending[wav]
+            self.on_saved(wav, got["frames"], *got["burst"])
+
+    def on_saved(self, wav, frames, iq, audio, trigger_at):
+        if not frames:
+            os.remove(wav)
+            print(f"⚠️ Deleted empty file: {wav}")
+            return
+        print(f"💾 Saved: {wav}")
+        if self.save_iq and iq is not None:
+            # IQ sidecar: lets 12-refingerprint.py redo this burst later
+            save_sidecar(wav, iq, self.rec.iq_rate, self.rec.audio_rate, trigger_at, self.rec.freq,
+                         self.rec.audio_lead())
+        if self.fp_pool.submit(wav, iq, audio, self.rec.iq_rate, self.rec.audio_rate,
+                               trigger_at=trigger_at):
+            print(f"🧬 Fingerprint queued for {wav}")
+        else:
+            print(f"⚠️ Fingerprint queue full, skipped {wav}")
+
+    def fingerprint_done(self, wav_path, fp, err):
+        """Pool collector thread: rename the WAV with its fingerprint."""
+        if err:
+            print(f"⚠️ Fingerprint failed for {wav_path}: {err}")
+            return
+        new = rename_tagged(wav_path, fp)
+        st = self.fp_pool.stats()
+        print(f"🧬 Renamed → {new} (queue {st['queued']}, dropped {st['dropped']}, "
+              f"latency {st['latency_ms_mean']:.0f} ms avg)")
+        if self.db:
+            burst_id = self.db.add(fp, time.time(), self.rec.freq, new)
+            radio, dist = self.db.identify(fp)
+            print(f"🆔 #{burst_id}: {radio or 'unknown radio'} (distance {dist:.2f})")
 
     def closeEvent(self, event):
         print("🛑 Exiting...")
+        if self.metrics:
+            self.metrics.close()
+            self.metrics_server.close()
         self.rec.stop_record()
         self.rec.stop()
         self.rec.wait()
+        self.fp_pool.close(drain=10)     # pending renames finish (bounded), the rest is reported
+        if self.db:
+            self.db.close()
+        if self.spectrum:
+            self.spectrum.close()
         event.accept()
 
 if __name__ == "__main__":
-    app = Qt.QApplication(sys.argv)
-    win = WaterfallExplorer()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--source", default="rtl=0", help=SOURCE_HELP)
+    parser.add_argument("--spectrum-port", type=int, default=0,
+                        help="serve waterfall rows to 10-spectrum_client.py on this port (0 = off)")
+    parser.add_argument("--db", default=None, help="fingerprint store directory (see 11-fingerprint_db.py)")
+    parser.add_argument("--no-iq", action="store_true", help="don't keep .iq.cf32 sidecars next to the WAVs")
+    parser.add_argument("--fixed-floor", action="store_true", help="keep the -30 dBFS floor instead of tracking it")
+    parser.add_argument("--metrics-port", type=int, default=0,
+                        help="serve /metrics (Prometheus) and /metrics.json on this port (0 = off)")
+    args, qt_args = parser.parse_known_args()
+
+    app = Qt.QApplication(sys.argv[:1] + qt_args)
+    win = WaterfallExplorer(source=args.source, spectrum_port=args.spectrum_port, db=args.db,
+                            save_iq=not args.no_iq, adaptive=not args.fixed_floor, metrics_port=args.metrics_port)
     win.resize(800,600)
     win.show()
     sys.exit(app.exec_())
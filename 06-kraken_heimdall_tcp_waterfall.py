@@ -1,14 +1,27 @@
 #!/usr/bin/env python3
 import sys
+import queue
 import socket
 import signal
+import argparse
+import threading
 
-from PyQt5 import QtWidgets
+import numpy as np
+
+from PyQt5 import QtWidgets, QtCore
 import sip
 
-from gnuradio import gr, blocks, qtgui
+from gnuradio import gr, qtgui, filter
 from gnuradio.filter import firdes
-from gnuradio.krakensdr.krakensdr_source import krakensdr_source
+try:
+    from gnuradio.krakensdr.krakensdr_source import krakensdr_source
+except ImportError:                 # --native and --source don't need gr-krakensdr
+    krakensdr_source = None
+from iq_sources import make_source, heimdall_source, SOURCE_HELP
+from spectrum_server import attach_spectrum
+from nfm_blocks import multi_burst_capture
+from dsp import burst_stamp
+from doa import DoaEstimator
 import os
 # — suppress GL errors over SSH/X11 —
 os.environ["QT_XCB_GL_INTEGRATION"] = "none"
@@ -23,6 +36,14 @@ CTRL_PORT  = 5001      # unused unless you need the control interface
 CENTER_HZ  = 437.225e6
 SAMP_RATE  = 2.4e6
 GAIN       = [40.0]
+MAX_CH     = 5         # coherent receivers on a KrakenSDR
+CHAN_RATE  = 96e3      # per-channel rate after xlate + decimate
+ON_DB      = -20.0
+OFF_DB     = -25.0
+FLOOR_DB   = -30.0     # starting noise floor; tracked per channel unless --fixed-floor
+OUTDIR     = "/tmp"
+MAX_BURST  = 5.0       # s of coherent IQ per burst: 2 slots x 5 ch x (5 + 0.5 lookback) s x 96 kS/s x 8 B = 42 MB
+ARRAY_R    = 0.25      # UCA radius in metres (element spacing ~0.34 λ at 437 MHz)
 
 # ——— Port‐check helper ————————————————————————————————————
 def check_port(port, name):
@@ -41,33 +62,41 @@ def check_port(port, name):
 
 # ——— Main GUI + flowgraph —————————————————————————————————
 class KrakenWaterfall(QtWidgets.QWidget):
-    def __init__(self):
+    def __init__(self, source=None, spectrum_port=0, channels=1, native=False,
+                 radius=ARRAY_R, cal=None, adaptive=True, max_burst=MAX_BURST):
         super().__init__()
         self.setWindowTitle("KrakenSDR Live Waterfall")
+        self.channels = channels
 
         # build flowgraph
         self.tb = gr.top_block()
 
-        # instantiate the KrakenSDR source
+        # instantiate the KrakenSDR source (or a replay / synthetic stand-in)
         try:
-            self.src = krakensdr_source(
-                ipAddr      = HOST,
-                port        = IQ_PORT,
-                ctrlPort    = CTRL_PORT,
-                numChannels = 1,
-                freq        = CENTER_HZ / 1e6,  # in MHz
-                gain        = GAIN,
-                debug       = False
-            )
+            if source:
+                self.src = make_source(source, SAMP_RATE, CENTER_HZ, GAIN[0])
+                ports = [self.src] * channels           # same stream on every "antenna"
+            elif native:
+                # our own frame reader: recv_into preallocated buffers, gap tracking
+                self.src = heimdall_source(HOST, IQ_PORT, channels)
+                ports = [(self.src, i) for i in range(channels)]
+            else:
+                self.src = krakensdr_source(
+                    ipAddr      = HOST,
+                    port        = IQ_PORT,
+                    ctrlPort    = CTRL_PORT,
+                    numChannels = channels,
+                    freq        = CENTER_HZ / 1e6,  # in MHz
+                    gain        = GAIN * channels,
+                    debug       = False
+                )
+                ports = [(self.src, i) for i in range(channels)]
         except Exception as e:
             print(f"[!] Failed to create KrakenSDR source: {e!r}")
             sys.exit(1)
 
-        # throttle so we don't overwhelm the GUI
-        self.throttle = blocks.throttle(
-            itemsize        = gr.sizeof_gr_complex,
-            samples_per_sec = SAMP_RATE
-        )
+        # No throttle: the hardware (or a realtime replay) sets the pace, and
+        # the waterfall sink simply skips FFTs when the GUI lags
 
         # waterfall sink — note: no number_of_inputs kwarg here
         self.wf = qtgui.waterfall_sink_c(
@@ -81,14 +110,45 @@ class KrakenWaterfall(QtWidgets.QWidget):
         self.wf.enable_grid(True)
 
         # connect the blocks
-        self.tb.connect(self.src, self.throttle, self.wf)
+        self.tb.connect(ports[0], self.wf)
+        self.spectrum = None
+        if spectrum_port:
+            self.spectrum = attach_spectrum(self.tb, ports[0], SAMP_RATE, CENTER_HZ, spectrum_port)
+
+        # all channels: C++ xlate/decimate each to 96 kS/s, then one vectorized
+        # Python block does power, per-channel triggers and coherent capture
+        self.capture = None
+        if channels > 1:
+            decim = int(round(SAMP_RATE / CHAN_RATE))
+            taps = firdes.low_pass(1.0, SAMP_RATE, 10e3, 8e3, firdes.WIN_HAMMING)
+            self.capture = multi_burst_capture(channels, SAMP_RATE / decim, ON_DB, OFF_DB,
+                                               max_burst=max_burst, floor_db=FLOOR_DB if adaptive else None)
+            self.xlates = []
+            for i, port in enumerate(ports):
+                xlate = filter.freq_xlating_fir_filter_ccf(decim, taps, 0, SAMP_RATE)
+                self.tb.connect(port, xlate, (self.capture, i))
+                self.xlates.append(xlate)
+            self.saves = queue.Queue()
+            # bearings need at least 3 elements; the writer estimates one per saved burst
+            self.doa = None
+            if channels >= 3:
+                self.doa = DoaEstimator(channels, radius, CENTER_HZ, cal=cal)
+            self.capture.subscribe(self.on_burst)
+            threading.Thread(target=self.writer, daemon=True).start()
 
         # wrap & embed in Qt
         wf_win = sip.wrapinstance(self.wf.pyqwidget(), QtWidgets.QWidget)
         layout = QtWidgets.QVBoxLayout()
+        self.label = QtWidgets.QLabel(f"{channels} channel(s)")
+        layout.addWidget(self.label)
         layout.addWidget(wf_win)
         self.setLayout(layout)
 
+        if self.capture:
+            self.timer = QtCore.QTimer()
+            self.timer.timeout.connect(self.show_levels)
+            self.timer.start(250)
+
         # start flowgraph
         try:
             self.tb.start()
@@ -96,19 +156,78 @@ class KrakenWaterfall(QtWidgets.QWidget):
             print(f"[!] Flowgraph start failed: {e!r}")
             sys.exit(1)
 
+    def on_burst(self, chan, ev):
+        """Flowgraph thread: per-channel edges are logged, coherent bursts saved."""
+        if chan is not None:
+            print(f"[ch{chan}] {ev.kind} @ {ev.db:.1f} dBFS")
+        elif ev.kind == "end":
+            # ring slots keep this view valid until two more bursts start
+            self.saves.put((self.capture.data(), self.capture.ring.truncated))
+
+    def writer(self):
+        while True:
+            iq, truncated = self.saves.get()
+            path = f"{OUTDIR}/kraken_{burst_stamp()}_{self.channels}ch"
+            if self.doa:
+                b = self.doa.process(iq.T)
+                path += f"_{b.music:05.1f}deg"
+                print(f"[>] Bearing {b.music:.1f}° MUSIC / {b.bartlett:.1f}° Bartlett "
+                      f"(peak {b.confidence:.0f} dB, SNR {b.snr_db:.0f} dB)")
+            np.save(path + ".npy", iq)
+            print(f"[+] Saved {iq.shape[0] / CHAN_RATE:.2f} s coherent IQ ({iq.shape[1]} ch) → {path}.npy"
+                  + (" (cut at --max-burst)" if truncated else ""))
+
+    def show_levels(self):
+        db = 10 * np.log10(np.maximum(self.capture.level, 1e-12))
+        text = "  ".join(f"ch{i}: {d:6.1f} dBFS" for i, d in enumerate(db))
+        if isinstance(self.src, heimdall_source):
+            st = self.src.reader.stats()
+            text += f"  |  frames {st['frames']}, dropped {st['dropped_frames']}, reconnects {st['reconnects']}"
+        self.label.setText(text)
+
     def closeEvent(self, event):
+        if self.spectrum:
+            self.spectrum.close()
         self.tb.stop()
         self.tb.wait()
         event.accept()
 
 def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--source", default=None,
+                        help=f"replace the KrakenSDR with another source: {SOURCE_HELP}")
+    parser.add_argument("--spectrum-port", type=int, default=0,
+                        help="serve waterfall rows to 10-spectrum_client.py on this port (0 = off)")
+    parser.add_argument("--native", action="store_true",
+                        help="read Heimdall IQ frames with heimdall.py instead of gr-krakensdr")
+    parser.add_argument("--channels", type=int, default=1, choices=range(1, MAX_CH + 1),
+                        help="coherent channels to ingest; >1 adds per-channel detection and capture")
+    parser.add_argument("--radius", type=float, default=ARRAY_R, help="UCA radius in metres (DoA)")
+    parser.add_argument("--cal", default=None,
+                        help="per-channel phase corrections for DoA: .npy from doa.estimate_calibration or degrees 'p0,p1,...'")
+    parser.add_argument("--fixed-floor", action="store_true", help="keep fixed trigger thresholds")
+    parser.add_argument("--max-burst", type=float, default=MAX_BURST,
+                        help="seconds of coherent IQ kept per burst (preallocated for every channel)")
+    args, qt_args = parser.parse_known_args()
+    if not args.source and not args.native and krakensdr_source is None:
+        parser.error("gr-krakensdr is not installed: use --native (heimdall.py) or --source")
+
+    cal = None
+    if args.cal:
+        if args.cal.endswith(".npy"):
+            cal = np.load(args.cal)
+        else:
+            cal = np.exp(1j * np.radians([float(p) for p in args.cal.split(",")]))
+
     # check that the IQ port is up
-    check_port(IQ_PORT, "IQ server")
+    if not args.source:
+        check_port(IQ_PORT, "IQ server")
     # if you need control interface, uncomment:
     # check_port(CTRL_PORT, "Control interface")
 
-    app = QtWidgets.QApplication(sys.argv)
-    win = KrakenWaterfall()
+    app = QtWidgets.QApplication(sys.argv[:1] + qt_args)
+    win = KrakenWaterfall(args.source, args.spectrum_port, args.channels, args.native,
+                          args.radius, cal, not args.fixed_floor, args.max_burst)
     win.resize(900, 600)
     win.show()
 
@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+import time
+import argparse
+
+from gnuradio import gr, blocks
+
+from iq_sources import make_source, iq_file_sink, SOURCE_HELP
+
+class IQRecorder(gr.top_block):
+    def __init__(self, path, source="rtl=0", freq=437.225e6, samp_rate=2.4e6, rf_gain=40, seconds=10.0):
+        super().__init__("IQ Recorder")
+        self.src = make_source(source, samp_rate, freq, rf_gain)
+        self.head = blocks.head(gr.sizeof_gr_complex, int(seconds * samp_rate))
+        self.sink = iq_file_sink(path)
+        self.connect(self.src, self.head, self.sink)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Capture raw IQ for later replay with --source file:PATH")
+    parser.add_argument("path", help="output file, .cu8 (rtl_sdr format) or .cf32")
+    parser.add_argument("--source", default="rtl=0", help=SOURCE_HELP)
+    parser.add_argument("--freq", type=float, default=437.225e6)
+    parser.add_argument("--rate", type=float, default=2.4e6)
+    parser.add_argument("--gain", type=float, default=40)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    args = parser.parse_args()
+
+    tb = IQRecorder(args.path, args.source, args.freq, args.rate, args.gain, args.seconds)
+    print(f"🔴 Recording {args.seconds:.1f} s of IQ at {args.freq/1e6:.6f} MHz → {args.path}")
+    t0 = time.time()
+    try:
+        tb.run()
+    except KeyboardInterrupt:
+        tb.stop()
+        tb.wait()
+    print(f"⚫️ Wrote {tb.sink.count} samples in {time.time() - t0:.1f} s")
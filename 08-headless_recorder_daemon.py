@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+import argparse
+
+from recorder_daemon import RecorderDaemon
+from burst_archive import CODECS
+from iq_sources import SOURCE_HELP
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Headless NFM burst recorder (no Qt)")
+    parser.add_argument("--source", default="rtl=0", help=SOURCE_HELP)
+    parser.add_argument("--freq", type=float, default=437.225e6)
+    parser.add_argument("--on-db", type=float, default=-20.0)
+    parser.add_argument("--off-db", type=float, default=-25.0)
+    parser.add_argument("--floor-db", type=float, default=-30.0,
+                        help="expected noise floor; it is tracked and --on-db/--off-db keep their distance to it")
+    parser.add_argument("--fixed-floor", action="store_true", help="use --on-db/--off-db as fixed thresholds")
+    parser.add_argument("--outdir", default="/tmp")
+    parser.add_argument("--no-fingerprint", action="store_true")
+    parser.add_argument("--db", default=None, help="fingerprint store directory (see 11-fingerprint_db.py)")
+    parser.add_argument("--no-iq", action="store_true", help="don't keep .iq.cf32 sidecars next to the WAVs")
+    parser.add_argument("--archive", default=None,
+                        help="write bursts to this compressed archive (see burst_archive.py) instead of WAVs")
+    parser.add_argument("--codec", default="flac", choices=tuple(CODECS), help="archive audio codec")
+    parser.add_argument("--tap-port", type=int, default=0,
+                        help="serve the 96 kS/s channel IQ here for 09-waterfall_client.py (0 = off)")
+    parser.add_argument("--tap-host", default="127.0.0.1", help="address the tap/spectrum ports bind to")
+    parser.add_argument("--spectrum-port", type=int, default=0,
+                        help="serve waterfall rows here for 10-spectrum_client.py (0 = off)")
+    parser.add_argument("--status-every", type=float, default=60.0, help="seconds between status lines")
+    parser.add_argument("--metrics-port", type=int, default=0,
+                        help="serve /metrics (Prometheus) and /metrics.json here (0 = off)")
+    parser.add_argument("--metrics-file", default=None, help="rewrite this JSON file with every metrics snapshot")
+    parser.add_argument("--metrics-every", type=float, default=5.0, help="seconds between metrics snapshots")
+    args = parser.parse_args()
+
+    daemon = RecorderDaemon(args.source, args.freq, args.on_db, args.off_db, args.outdir,
+                            not args.no_fingerprint, args.tap_port, args.tap_host, args.spectrum_port, args.db,
+                            not args.no_iq, args.archive, args.codec,
+                            None if args.fixed_floor else args.floor_db,
+                            args.metrics_port, args.metrics_file, args.metrics_every)
+    daemon.run(args.status_every)
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+import os
+os.environ["QT_XCB_GL_INTEGRATION"] = "none"
+import sys
+import signal
+import argparse
+
+from gnuradio import gr, qtgui
+from gnuradio.filter import firdes
+import sip
+from PyQt5 import Qt
+
+from iq_sources import make_source
+
+class WaterfallClient(Qt.QWidget):
+    """Attach to a running 08 daemon's IQ tap; closing this never touches the recorder."""
+
+    def __init__(self, host, port, freq, rate):
+        super().__init__()
+        self.setWindowTitle(f"Waterfall @ {host}:{port}")
+
+        self.tb = gr.top_block()
+        self.src = make_source(f"tcp:{host}:{port}", rate, freq, 0)
+        self.wf = qtgui.waterfall_sink_c(
+            1024, firdes.WIN_BLACKMAN_hARRIS,
+            freq, rate, "Waterfall", 1
+        )
+        self.wf.set_update_time(0.10)
+        self.wf.enable_grid(True)
+        self.tb.connect(self.src, self.wf)
+
+        layout = Qt.QVBoxLayout(self)
+        layout.addWidget(sip.wrapinstance(self.wf.pyqwidget(), Qt.QWidget))
+        self.tb.start()
+
+    def closeEvent(self, event):
+        self.tb.stop()
+        self.tb.wait()
+        event.accept()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5100)
+    parser.add_argument("--freq", type=float, default=437.225e6, help="daemon's channel frequency (axis label only)")
+    parser.add_argument("--rate", type=float, default=96e3, help="tap sample rate (the daemon's channel rate)")
+    args, qt_args = parser.parse_known_args()
+
+    app = Qt.QApplication(sys.argv[:1] + qt_args)
+    signal.signal(signal.SIGINT, lambda *a: Qt.QApplication.quit())
+    win = WaterfallClient(args.host, args.port, args.freq, args.rate)
+    win.resize(800, 600)
+    win.show()
+    sys.exit(app.exec_())
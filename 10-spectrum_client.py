@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+import os
+os.environ["QT_XCB_GL_INTEGRATION"] = "none"
+import sys
+import json
+import shutil
+import socket
+import signal
+import argparse
+import threading
+
+import numpy as np
+
+from spectrum_server import FRAME_HEAD
+
+SHADES = " .:-=+*#%@"
+
+def connect(host, port, rate):
+    """Open a viewer connection; returns (socket file, header dict)."""
+    sock = socket.create_connection((host, port))
+    sock.sendall(f"rate={rate}\n".encode())
+    f = sock.makefile("rb")
+    return f, json.loads(f.readline())
+
+def frames(f, header):
+    """Yield (time, center, uint8 row) until the server goes away."""
+    size = header["frame"]
+    while True:
+        buf = f.read(size)
+        if len(buf) < size:
+            return
+        t, center = FRAME_HEAD.unpack_from(buf)
+        yield t, center, np.frombuffer(buf, dtype=np.uint8, offset=FRAME_HEAD.size)
+
+def run_text(f, header):
+    """Terminal waterfall: one line per row, bins max-pooled to the width."""
+    width = shutil.get_terminal_size((100, 20)).columns - 12
+    for t, center, row in frames(f, header):
+        cols = row[:len(row) // width * width].reshape(width, -1).max(axis=1)
+        line = "".join(SHADES[c * len(SHADES) // 256] for c in cols)
+        print(f"{center/1e6:10.4f} {line}", flush=True)
+
+def run_qt(f, header, rows):
+    from PyQt5 import Qt, QtCore, QtGui
+
+    class RowBridge(QtCore.QObject):
+        row = QtCore.pyqtSignal(object, object)
+
+    class SpectrumView(Qt.QLabel):
+        """Scrolling waterfall painted straight from the uint8 rows."""
+
+        def __init__(self):
+            super().__init__()
+            self.img = np.zeros((rows, header["nfft"]), dtype=np.uint8)
+            self.lut = [QtGui.qRgb(int(255 * min(1, 2 * v)), int(255 * v), int(255 * max(0, 2 * v - 1)))
+                        for v in np.linspace(0, 1, 256)]
+            self.setScaledContents(True)
+
+        def add(self, center, row):
+            self.img[1:] = self.img[:-1]
+            self.img[0] = row
+            span = header["samp_rate"] / 2e6
+            self.setWindowTitle(f"{(center/1e6) - span:.3f} – {(center/1e6) + span:.3f} MHz")
+            q = QtGui.QImage(self.img.data, self.img.shape[1], self.img.shape[0],
+                             self.img.shape[1], QtGui.QImage.Format_Indexed8)
+            q.setColorTable(self.lut)
+            self.setPixmap(QtGui.QPixmap.fromImage(q))
+
+    app = Qt.QApplication(sys.argv[:1])
+    signal.signal(signal.SIGINT, lambda *a: Qt.QApplication.quit())
+    view = SpectrumView()
+    bridge = RowBridge()
+    bridge.row.connect(view.add)
+
+    def reader():
+        for t, center, row in frames(f, header):
+            bridge.row.emit(center, row.copy())
+        print("🔌 Server closed the connection")
+
+    threading.Thread(target=reader, daemon=True).start()
+    view.resize(1000, 500)
+    view.show()
+    sys.exit(app.exec_())
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Viewer for a recorder's --spectrum-port")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5200)
+    parser.add_argument("--rate", type=float, default=5.0, help="rows per second to ask for")
+    parser.add_argument("--rows", type=int, default=300, help="waterfall history (Qt view)")
+    parser.add_argument("--text", action="store_true", help="print rows to the terminal instead of a window")
+    args = parser.parse_args()
+
+    f, header = connect(args.host, args.port, args.rate)
+    print(f"📺 {header['nfft']} bins over {header['samp_rate']/1e6:.3f} MHz, "
+          f"{header['lo_db']:.0f}..{header['hi_db']:.0f} dBFS")
+    try:
+        if args.text:
+            run_text(f, header)
+        else:
+            run_qt(f, header, args.rows)
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+import os
+import re
+import glob
+import argparse
+
+from fingerprint import BASIC_FEATURES
+from fingerprint_db import FingerprintDB, FEATURES, RADIOS, recorded_fingerprint
+
+DEFAULT_DB = os.path.expanduser("~/.baofeng_fingerprints")
+
+def burst_time_freq(path, default_freq):
+    """Recording time / channel from baofeng_[<MHz>_]<unix time>[_<ms>]_... names."""
+    m = re.search(r"baofeng_(?:(\d+\.\d+)_)?(\d+)(?:_(\d{3})(?!\d))?", os.path.basename(path))
+    if not m:
+        return os.path.getmtime(path), default_freq
+    freq = float(m.group(1)) * 1e6 if m.group(1) else default_freq
+    return float(m.group(2)) + (int(m.group(3)) / 1e3 if m.group(3) else 0.0), freq
+
+def cmd_import(db, args):
+    added = skipped = 0
+    for pattern in args.paths:
+        for path in sorted(map(os.path.abspath, glob.glob(pattern))):
+            fp = recorded_fingerprint(path)
+            if fp is None or db.find(path):
+                skipped += 1
+                continue
+            t, freq = burst_time_freq(path, args.freq)
+            db.add(fp, t, freq, path, args.radio)
+            added += 1
+    print(f"📥 Added {added} bursts ({skipped} skipped) → {db.stats()['bursts']} in store")
+
+def cmd_label(db, args):
+    for target in args.bursts:
+        burst_id = int(target) if target.isdigit() else db.find(os.path.abspath(target))
+        if burst_id is None:
+            print(f"⚠️ Not in store: {target}")
+            continue
+        db.label(burst_id, args.radio)
+        print(f"🏷️  #{burst_id} → {args.radio}")
+
+def cmd_match(db, args):
+    if args.path:
+        fp = recorded_fingerprint(args.path)
+        if fp is None:
+            raise SystemExit(f"no fingerprint in sidecar or file name: {args.path}")
+    else:
+        fp = {f: getattr(args, f) for f in FEATURES if getattr(args, f) is not None}
+    radio, dist = db.identify(fp, max_dist=args.max_dist)
+    print(f"🆔 {radio or 'unknown radio'} (distance {dist:.2f})")
+    for burst_id, d, path, label in db.nearest(fp, args.k):
+        print(f"   #{burst_id:<7} {d:6.2f}  {label or '-':<8} {path}")
+
+def cmd_migrate(db, args):
+    print(f"🔁 {db.stats()['bursts']} bursts with features {', '.join(db.features)}; "
+          f"{db.migrated} filled in from their sidecars, archives or names")
+
+def cmd_stats(db, args):
+    st = db.stats()
+    print(f"📊 {st['bursts']} bursts, {st['labelled']} labelled")
+    for radio, n in sorted(st["radios"].items()):
+        print(f"   {radio:<10} {n}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Persistent burst fingerprint store")
+    parser.add_argument("--db", default=DEFAULT_DB, help=f"store directory (default {DEFAULT_DB})")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p = sub.add_parser("import", help="add fingerprint-tagged WAVs (05/08 output)")
+    p.add_argument("paths", nargs="+", help="files or glob patterns")
+    p.add_argument("--radio", default=None, help=f"label them all, e.g. {', '.join(RADIOS)}")
+    p.add_argument("--freq", type=float, default=437.225e6, help="channel if the name has none")
+    p.set_defaults(func=cmd_import)
+
+    p = sub.add_parser("label", help="mark stored bursts as a known radio")
+    p.add_argument("radio")
+    p.add_argument("bursts", nargs="+", help="burst ids or file paths")
+    p.set_defaults(func=cmd_label)
+
+    p = sub.add_parser("match", help="identify a burst and list its nearest neighbours")
+    p.add_argument("path", nargs="?", help="fingerprint-tagged WAV")
+    for f in FEATURES:
+        # without the RF features a burst is matched on ramp/cfo/bw only
+        p.add_argument(f"--{f}", type=float, default=0.0 if f in BASIC_FEATURES else None)
+    p.add_argument("-k", type=int, default=5)
+    p.add_argument("--max-dist", type=float, default=3.0)
+    p.set_defaults(func=cmd_match)
+
+    p = sub.add_parser("stats", help="bursts per radio")
+    p.set_defaults(func=cmd_stats)
+
+    p = sub.add_parser("migrate", help="convert a store written with other features "
+                                       "(then 12-refingerprint.py --db fills in the rest)")
+    p.set_defaults(func=cmd_migrate)
+
+    args = parser.parse_args()
+    db = FingerprintDB(args.db, migrate=args.cmd == "migrate")
+    try:
+        args.func(db, args)
+    finally:
+        db.close()
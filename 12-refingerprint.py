@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+import os
+import glob
+import time
+import signal
+import argparse
+import multiprocessing as mp
+from functools import partial
+
+from fingerprint import VERSION, fingerprint, load_sidecar, read_wav, rename_tagged, resume_renames
+from fingerprint_db import FingerprintDB
+
+DEFAULT_ARCHIVE = "/tmp/baofeng_*.wav"
+
+def archive(paths, ext=".wav"):
+    """Recordings (or their ext sidecars) under the given files, directories or glob patterns, lazily."""
+    for p in paths:
+        if os.path.isdir(p):
+            p = os.path.join(p, "baofeng_*.wav")
+        if p.endswith(".wav"):
+            p = p[:-4] + ext
+        for path in glob.iglob(p):
+            if path.endswith(ext):
+                yield os.path.abspath(path)
+
+def refingerprint(wav_path, force=False, rename=True):
+    """Worker: recompute one burst from its IQ sidecar.
+
+    Returns (status, old path, new path, fingerprint, meta); status is
+    "done", "current" (already at VERSION), "no-iq" or an error string.
+    """
+    try:
+        side = load_sidecar(wav_path)
+        if side is None:
+            return "no-iq", wav_path, wav_path, None, None
+        iq, meta = side
+        if not force and meta.get("version") == VERSION:
+            return "current", wav_path, wav_path, meta.get("features"), meta
+        audio, audio_rate = read_wav(wav_path)
+        audio = audio[meta.get("audio_trigger_at", 0):]     # ramp is timed from the trigger
+        fp = fingerprint(iq, audio, meta["samp_rate"], audio_rate, trigger_at=meta.get("trigger_at"))
+        del iq
+        new = rename_tagged(wav_path, fp) if rename else wav_path
+        return "done", wav_path, new, fp, meta
+    except Exception as e:
+        return repr(e), wav_path, wav_path, None, None
+
+def _ignore_sigint():
+    # Ctrl+C is handled once, in the parent
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+def store(db, old, new, fp, meta):
+    burst_id = db.find(old)
+    if burst_id is None:
+        db.add(fp, meta.get("time") or os.path.getmtime(new), meta.get("freq") or 437.225e6, new)
+    else:
+        db.update(burst_id, fp, new)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Recompute fingerprints of archived bursts from their IQ sidecars")
+    parser.add_argument("paths", nargs="*", default=[DEFAULT_ARCHIVE],
+                        help=f"WAVs, directories or glob patterns (default {DEFAULT_ARCHIVE})")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="processes (default: all cores)")
+    parser.add_argument("--chunksize", type=int, default=8, help="bursts handed to a worker at a time")
+    parser.add_argument("--force", action="store_true", help=f"redo bursts already at version {VERSION}")
+    parser.add_argument("--no-rename", action="store_true", help="only update the sidecar metadata")
+    parser.add_argument("--db", default=None, help="add/update the bursts in this fingerprint store")
+    parser.add_argument("--progress-every", type=float, default=5.0, help="seconds between progress lines")
+    args = parser.parse_args()
+
+    db = FingerprintDB(args.db) if args.db else None
+    counts = {"done": 0, "current": 0, "no-iq": 0, "failed": 0}
+    # renames an earlier run was killed in the middle of
+    for old, new, meta in resume_renames(archive(args.paths, ".iq.json")):
+        print(f"🩹 Finished renaming {old} → {new}", flush=True)
+        if db:
+            store(db, old, new, meta["features"], meta)
+    t0 = time.time()
+    next_progress = t0 + args.progress_every
+    job = partial(refingerprint, force=args.force, rename=not args.no_rename)
+    pool = mp.get_context("spawn").Pool(args.workers, initializer=_ignore_sigint)
+    try:
+        for status, old, new, fp, meta in pool.imap_unordered(job, archive(args.paths), args.chunksize):
+            if status in counts:
+                counts[status] += 1
+            else:
+                counts["failed"] += 1
+                print(f"⚠️ {old}: {status}", flush=True)
+            if db and status == "done":
+                store(db, old, new, fp, meta)
+            if time.time() >= next_progress:
+                n = sum(counts.values())
+                print(f"🧬 {n} bursts, {n / (time.time() - t0):.0f}/s: {counts}", flush=True)
+                next_progress += args.progress_every
+        pool.close()
+    except KeyboardInterrupt:
+        # finished bursts are already renamed and stamped; a rerun resumes
+        print("🛑 Interrupted, rerun to resume", flush=True)
+        pool.terminate()
+    finally:
+        pool.join()
+        if db:
+            db.close()
+    print(f"✅ {counts} in {time.time() - t0:.1f} s with {args.workers} workers (version {VERSION})", flush=True)
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+import os
+import time
+import argparse
+
+import numpy as np
+
+from burst_archive import BurstArchive
+from dsp import WavWriter
+
+def when(text):
+    """Unix time, or seconds ago as -<n>."""
+    t = float(text)
+    return time.time() + t if t < 0 else t
+
+def cmd_list(ar, args):
+    ids = ar.query(args.since, args.until, args.min_db, args.freq, args.min_duration)
+    for i in ids[-args.limit:] if args.limit else ids:
+        row = ar.index[i]
+        fp = ar.features_of(i)
+        tag = "" if np.isnan(fp.get("cfo", np.nan)) else f"  cfo {fp['cfo']:.2f} kHz  bw {fp['bw']:.1f} kHz"
+        print(f"#{i:<7} {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(row['time']))} "
+              f"{row['freq'] / 1e6:.4f} MHz {row['duration']:6.1f} s {row['peak_db']:6.1f} dBFS{tag}")
+    print(f"📼 {len(ids)} of {len(ar)} bursts")
+
+def cmd_export(ar, args):
+    for burst_id in args.bursts:
+        base = os.path.join(args.outdir, f"burst_{burst_id}")
+        w = WavWriter(base + ".wav", ar.audio_rate)
+        w.write(ar.audio(burst_id))
+        w.close()
+        iq, trigger_at = ar.iq(burst_id)
+        if iq is not None:
+            iq.tofile(base + ".cf32")
+        print(f"📤 #{burst_id} → {base}.wav (trigger at frame {ar.audio_trigger_at(burst_id)})"
+              + (f" + .cf32 (trigger at {trigger_at})" if iq is not None else ""))
+
+def cmd_stats(ar, args):
+    ix = ar.index
+    size = sum(os.path.getsize(os.path.join(ar.path, n)) for n in os.listdir(ar.path))
+    hours = float(ix["duration"].sum()) / 3600
+    print(f"📊 {len(ix)} bursts, {hours:.2f} h on the air, {size / 1e6:.1f} MB on disk ({ar.codec})")
+    if len(ix):
+        print(f"   {time.ctime(ix['time'].min())} .. {time.ctime(ix['time'].max())}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Query and export a compressed burst archive (08 --archive)")
+    parser.add_argument("archive", help="archive directory")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p = sub.add_parser("list", help="bursts matching all filters")
+    p.add_argument("--since", type=when, default=None, help="unix time, or -seconds ago")
+    p.add_argument("--until", type=when, default=None)
+    p.add_argument("--min-db", type=float, default=None, help="peak level (dBFS)")
+    p.add_argument("--freq", type=float, default=None, help="channel (Hz)")
+    p.add_argument("--min-duration", type=float, default=None, help="seconds")
+    p.add_argument("--limit", type=int, default=50, help="newest N (0 = all)")
+    p.set_defaults(func=cmd_list)
+
+    p = sub.add_parser("export", help="write bursts back out as WAV (+ .cf32 IQ)")
+    p.add_argument("bursts", type=int, nargs="+")
+    p.add_argument("--outdir", default=".")
+    p.set_defaults(func=cmd_export)
+
+    p = sub.add_parser("stats", help="size and time span")
+    p.set_defaults(func=cmd_stats)
+
+    args = parser.parse_args()
+    args.func(BurstArchive(args.archive), args)
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+import os
+import time
+import queue
+import signal
+import argparse
+
+from gnuradio import gr
+
+from iq_sources import make_source, SOURCE_HELP
+from nfm_blocks import nfm_channel, power_trigger, burst_wav_sink, scan_probe
+from dsp import burst_stamp
+from scanner import band_windows, channel_power, active_channels, retune_settle, ScanScheduler
+
+class BandScanner(gr.top_block):
+    """One RTL stepping 2.4 MHz windows across the UHF handheld band.
+
+    Every look is a short snapshot and an FFT channel check, taken once the
+    samples from before the retune have drained (scanner.retune_settle); an
+    RTL is asked for `transfer`-sample USB transfers so that takes ~36 ms
+    instead of ~118 ms at the driver's default size. A busy window
+    is held while its loudest channel is recorded: one translated channel,
+    a power trigger with thresholds set from the window's measured floor,
+    and file edges on the burst samples as in 03.
+    """
+
+    def __init__(self, source="rtl=0", start=400e6, stop=480e6, outdir="/tmp",
+                 rise_db=10.0, margin_db=5.0, dwell=2.0, max_dwell=30.0, look=0.02, transfer=32768):
+        gr.top_block.__init__(self, "UHF Band Scanner")
+
+        self.samp_rate = 2.4e6
+        self.audio_rate = 48e3
+        self.rf_gain = 40
+
+        self.outdir = outdir
+        self.rise_db = rise_db          # busy / start recording at floor + this
+        self.margin_db = margin_db      # stop when back under floor + this
+        self.dwell = dwell              # stay this long on a busy window after the last burst (s)
+        self.max_dwell = max_dwell      # never hold one window longer (s)
+        self.settle = retune_settle(self.samp_rate, transfer)    # discarded after a retune (s)
+        self.look = look                # snapshot per look (s)
+
+        self.sched = ScanScheduler(band_windows(start, stop))
+        self.freq = self.sched.centers[0]
+        self.armed = False
+        self.recording = False
+        self.events = queue.Queue()
+
+        if source.startswith("rtl") and "buflen" not in source:
+            source += f",buflen={2 * transfer}"                 # bytes: 8-bit I + Q
+        self.src = make_source(source, self.samp_rate, self.freq, self.rf_gain)
+
+        # Looks: snapshots only when asked for
+        self.probe = scan_probe(self.samp_rate)
+
+        # Recording chain, retuned to the busy channel while dwelling
+        self.chan = nfm_channel(self.samp_rate, audio_rate=self.audio_rate)
+        self.trigger = power_trigger(self.chan.channel_rate, 0.0, 0.0, 0.1)
+        self.trigger.subscribe(self.on_burst)
+        self.wav_sink = burst_wav_sink(self.audio_rate)
+
+        self.connect(self.src, self.probe)
+        self.connect(self.src, self.chan)
+        self.connect((self.chan, 1), self.trigger)
+        self.connect((self.chan, 0), self.wav_sink)
+
+    def on_burst(self, ev):
+        """Flowgraph thread: file edges land on the burst samples."""
+        if not self.armed:
+            return
+        offset = self.chan.audio_offset(ev.offset)
+        if ev.kind == "start" and not self.recording:
+            # 11-fingerprint_db.py reads the channel back from baofeng_<MHz>_<time>_<ms>
+            path = os.path.join(self.outdir, f"baofeng_{self.freq / 1e6:.4f}_{burst_stamp()}.wav")
+            self.wav_sink.open(path, offset)
+            self.recording = True
+        elif ev.kind == "end" and self.recording:
+            self.wav_sink.close(offset, self.finish_file)
+            self.recording = False
+        self.events.put(ev)
+
+    def finish_file(self, path, frames):
+        if frames:
+            print(f"⚫️ Saved recording → {path}", flush=True)
+        else:
+            os.remove(path)
+
+    def report(self):
+        while not self.events.empty():
+            ev = self.events.get()
+            if ev.kind == "start":
+                print(f"🔴 {self.freq / 1e6:.4f} MHz at {ev.db:.1f} dBFS", flush=True)
+
+    def hold(self, center, offset, floor_db, stop):
+        """Dwell on one channel until it has been quiet for `dwell` s."""
+        self.freq = center + offset
+        self.chan.set_offset(offset)
+        self.trigger.set_thresholds(floor_db + self.rise_db, floor_db + self.margin_db)
+        self.trigger.reset()
+        self.armed = True
+        t0 = time.time()
+        quiet_until = t0 + self.dwell
+        while not stop and time.time() < t0 + self.max_dwell:
+            time.sleep(0.05)
+            self.report()
+            if self.recording:
+                quiet_until = time.time() + self.dwell
+            elif time.time() >= quiet_until:
+                break
+        self.armed = False
+        if self.recording:
+            self.wav_sink.close(None, self.finish_file)
+            self.recording = False
+        self.report()
+
+    def status(self, looks, t0):
+        busy = int((self.sched.activity > 0.05).sum())
+        return (f"📡 {looks / (time.time() - t0):.1f} looks/s over {len(self.sched.centers)} windows, "
+                f"{busy} busy lately, {int(self.sched.hits.sum())} hits")
+
+    def scan(self, status_every=60.0):
+        stop = []
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(sig, lambda *args: stop.append(True))
+        self.start()
+        c = self.sched.centers
+        print(f"Scanning {(c[0] - 1e6) / 1e6:.1f}-{(c[-1] + 1e6) / 1e6:.1f} MHz in {len(c)} windows", flush=True)
+        t0 = time.time()
+        next_status = t0 + status_every
+        looks = 0
+        while not stop:
+            i = self.sched.next(time.time())
+            center = c[i]
+            self.src.set_center_freq(center)
+            iq = self.probe.snapshot(self.settle, self.look)
+            if iq is None:
+                break                   # finite source ran out
+            hot, above, floor_db = active_channels(*channel_power(iq, self.samp_rate), self.rise_db)
+            self.sched.visited(i, time.time(), len(hot))
+            looks += 1
+            if len(hot):
+                busy = ", ".join(f"{(center + o) / 1e6:.4f} (+{a:.0f} dB)" for o, a in zip(hot[:4], above[:4]))
+                print(f"🔎 {center / 1e6:.1f} MHz window: {busy}", flush=True)
+                self.hold(center, hot[0], floor_db, stop)
+            if status_every and time.time() >= next_status:
+                print(self.status(looks, t0), flush=True)
+                next_status += status_every
+
+        print("🛑 Shutting down...", flush=True)
+        self.stop()                     # burst_wav_sink finalizes an open file on stop
+        self.wait()
+
+def parse_priority(text):
+    freq, _, weight = text.partition("=")
+    return float(freq), float(weight or 2.0)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Scan the UHF band with one RTL and record busy channels")
+    parser.add_argument("--source", default="rtl=0", help=SOURCE_HELP)
+    parser.add_argument("--start", type=float, default=400e6)
+    parser.add_argument("--stop", type=float, default=480e6)
+    parser.add_argument("--outdir", default="/tmp")
+    parser.add_argument("--priority", type=parse_priority, action="append", default=[],
+                        help="FREQ=WEIGHT, look at the window holding FREQ WEIGHT times as often (repeatable)")
+    parser.add_argument("--rise-db", type=float, default=10.0, help="busy above the window floor + this")
+    parser.add_argument("--dwell", type=float, default=2.0, help="hang on a busy channel this long after it drops")
+    parser.add_argument("--max-dwell", type=float, default=30.0)
+    parser.add_argument("--transfer", type=int, default=32768,
+                        help="samples per rtl-sdr USB transfer (multiple of 256); two are discarded after each retune")
+    parser.add_argument("--status-every", type=float, default=60.0, help="seconds between status lines")
+    args = parser.parse_args()
+
+    tb = BandScanner(args.source, args.start, args.stop, args.outdir, args.rise_db,
+                     dwell=args.dwell, max_dwell=args.max_dwell, transfer=args.transfer)
+    for freq, weight in args.priority:
+        tb.sched.set_priority(freq, weight)
+    tb.scan(args.status_every)
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+import os
+import signal
+import argparse
+
+from split_recorder import SplitRecorder
+from iq_sources import SOURCE_HELP
+
+def cpu_list(text):
+    """"2" or "2,3" or "2-5"."""
+    cpus = set()
+    for part in text.split(","):
+        lo, _, hi = part.partition("-")
+        cpus.update(range(int(lo), int(hi or lo) + 1))
+    return sorted(cpus)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="08's recorder as three processes: DSP, trigger/recording and fingerprinting")
+    parser.add_argument("--source", default="rtl=0", help=SOURCE_HELP)
+    parser.add_argument("--freq", type=float, default=437.225e6)
+    parser.add_argument("--on-db", type=float, default=-20.0)
+    parser.add_argument("--off-db", type=float, default=-25.0)
+    parser.add_argument("--floor-db", type=float, default=-30.0,
+                        help="expected noise floor; it is tracked and --on-db/--off-db keep their distance to it")
+    parser.add_argument("--fixed-floor", action="store_true", help="use --on-db/--off-db as fixed thresholds")
+    parser.add_argument("--outdir", default="/tmp")
+    parser.add_argument("--no-fingerprint", action="store_true")
+    parser.add_argument("--no-iq", action="store_true", help="don't keep .iq.cf32 sidecars next to the WAVs")
+    parser.add_argument("--ring-seconds", type=float, default=2.0, help="how far the recorder may fall behind")
+    parser.add_argument("--dsp-cpus", type=cpu_list, default=None, help="e.g. 1 (flowgraph)")
+    parser.add_argument("--rec-cpus", type=cpu_list, default=None, help="e.g. 2 (trigger, WAV writing)")
+    parser.add_argument("--fp-cpus", type=cpu_list, default=None, help="e.g. 3 (fingerprint workers)")
+    parser.add_argument("--fp-workers", type=int, default=2)
+    args = parser.parse_args()
+
+    sup = SplitRecorder(args.source, args.freq, args.ring_seconds, args.dsp_cpus, args.rec_cpus, args.fp_cpus,
+                        outdir=args.outdir, on_db=args.on_db, off_db=args.off_db,
+                        floor_db=None if args.fixed_floor else args.floor_db,
+                        save_iq=not args.no_iq, fingerprint=not args.no_fingerprint, fp_workers=args.fp_workers)
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *a: sup.stop())
+    sup.start()
+    print(f"Monitoring {args.freq/1e6:.6f} MHz (NFM) in 3 stages (pid {os.getpid()}: "
+          f"dsp {sup.dsp.pid}, recorder {sup.rec.pid}), writing to {args.outdir}", flush=True)
+    sup.wait()
+    print("🛑 Stopped", flush=True)
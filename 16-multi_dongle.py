@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+import signal
+import argparse
+
+from multi_dongle import Supervisor, discover, load_config
+from iq_sources import SOURCE_HELP
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="08's recorder on every attached RTL-SDR (or the devices of a config), one process each")
+    parser.add_argument("--config", default=None, help="JSON device list (see multi_dongle.py)")
+    parser.add_argument("--freq", type=float, nargs="+", default=[437.225e6],
+                        help="one center frequency per device, in discovery (or --source) order")
+    parser.add_argument("--source", nargs="+", default=None,
+                        help=f"sources instead of the discovered dongles: {SOURCE_HELP}")
+    parser.add_argument("--on-db", type=float, default=-20.0)
+    parser.add_argument("--off-db", type=float, default=-25.0)
+    parser.add_argument("--floor-db", type=float, default=-30.0,
+                        help="expected noise floor; it is tracked and --on-db/--off-db keep their distance to it")
+    parser.add_argument("--fixed-floor", action="store_true", help="use --on-db/--off-db as fixed thresholds")
+    parser.add_argument("--outdir", default="/tmp", help="shared by all devices (file names carry the MHz)")
+    parser.add_argument("--no-fingerprint", action="store_true")
+    parser.add_argument("--db", default=None, help="one fingerprint store for all devices (see 11-fingerprint_db.py)")
+    parser.add_argument("--no-iq", action="store_true", help="don't keep .iq.cf32 sidecars next to the WAVs")
+    parser.add_argument("--status-every", type=float, default=60.0, help="seconds between status lines")
+    parser.add_argument("--metrics-port", type=int, default=0,
+                        help="serve every device's /metrics and /metrics.json here (0 = off)")
+    parser.add_argument("--metrics-every", type=float, default=5.0, help="seconds between metrics snapshots")
+    args = parser.parse_args()
+
+    if args.config:
+        cfg = load_config(args.config)
+        devices = cfg["devices"]
+        outdir = cfg.get("outdir", args.outdir)
+        db = cfg.get("db", args.db)
+        metrics_port = cfg.get("metrics_port", args.metrics_port)
+    else:
+        sources = args.source or [spec for spec, serial in discover()]
+        if not sources:
+            parser.error("no RTL-SDR found (is librtlsdr installed?); use --source or --config")
+        if len(args.freq) != len(sources):
+            parser.error(f"{len(args.freq)} frequencies for {len(sources)} devices: give one --freq per device")
+        devices = [{"source": s, "freq": f, "on_db": args.on_db, "off_db": args.off_db,
+                    "floor_db": None if args.fixed_floor else args.floor_db,
+                    "fingerprint": not args.no_fingerprint, "save_iq": not args.no_iq}
+                   for s, f in zip(sources, args.freq)]
+        outdir, db, metrics_port = args.outdir, args.db, args.metrics_port
+
+    sup = Supervisor(devices, outdir, db, metrics_port, metrics_every=args.metrics_every,
+                     status_every=args.status_every)
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *a: sup.stop())
+    sup.start()
+    for name, dev in zip(sup.procs, devices):
+        print(f"📻 {name}: {float(dev['freq'])/1e6:.6f} MHz (pid {sup.procs[name].pid})", flush=True)
+    sup.wait()
+    print(f"🛑 Stopped: {sum(sup.saved.values())} bursts saved {sup.saved}", flush=True)
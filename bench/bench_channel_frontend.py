@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""CPU per channel: legacy squelch/nbfm at 2.4 MS/s vs. the xlating/decimating front end."""
+import os
+import sys
+import time
+import argparse
+
+from gnuradio import gr, blocks, analog
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from nfm_blocks import nfm_channel, nfm_channel_bank
+
+SAMP_RATE = 2.4e6
+AUDIO_RATE = 48e3
+
+
+def legacy_chain(tb, src, i):
+    """What 01-05 used to build: everything at the full capture rate."""
+    squelch = analog.simple_squelch_cc(-60, 1)
+    nfm = analog.nbfm_rx(audio_rate=AUDIO_RATE, quad_rate=SAMP_RATE, tau=75e-6, max_dev=5e3)
+    mag = blocks.complex_to_mag_squared()
+    avg = blocks.moving_average_ff(512, 1.0 / 512, 4000, 1)
+    tb.connect(src, squelch, nfm, blocks.null_sink(gr.sizeof_float))
+    tb.connect(src, mag, avg, blocks.null_sink(gr.sizeof_float))
+
+
+def frontend_chain(tb, src, i):
+    """Translate + decimate first; spread channels 25 kHz apart."""
+    chan = nfm_channel(SAMP_RATE, offset=(i - 4) * 25e3, audio_rate=AUDIO_RATE)
+    tb.connect(src, chan)
+    tb.connect((chan, 0), blocks.null_sink(gr.sizeof_float))
+    tb.connect((chan, 1), blocks.null_sink(gr.sizeof_float))
+
+
+def pfb_bank(tb, src, nchan):
+    """One PFB channelizer shared by all channels (04 --wideband)."""
+    bank = nfm_channel_bank(SAMP_RATE, [(i - nchan // 2) * 25e3 for i in range(nchan)])
+    tb.connect(src, bank)
+    for i in range(nchan):
+        tb.connect(bank.audio_port(i), blocks.null_sink(gr.sizeof_float))
+        tb.connect(bank.power_port(i), blocks.null_sink(gr.sizeof_float))
+
+
+def no_chain(tb, src, i):
+    tb.connect(src, blocks.null_sink(gr.sizeof_gr_complex))
+
+
+def run(build, nchan, seconds, shared=False):
+    """Return CPU seconds spent per second of signal (source cost included)."""
+    tb = gr.top_block()
+    src = analog.noise_source_c(analog.GR_GAUSSIAN, 0.1, 0)
+    head = blocks.head(gr.sizeof_gr_complex, int(SAMP_RATE * seconds))
+    tb.connect(src, head)
+    if shared:
+        build(tb, head, nchan)
+    else:
+        for i in range(nchan):
+            build(tb, head, i)
+    cpu0, wall0 = time.process_time(), time.time()
+    tb.run()
+    cpu, wall = time.process_time() - cpu0, time.time() - wall0
+    return cpu / seconds, wall
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--seconds", type=float, default=10.0, help="signal seconds per run")
+    ap.add_argument("--channels", type=int, default=1, help="parallel chains per run")
+    ap.add_argument("--pfb", action="store_true", help="also time the PFB channel bank at 1/N/21 channels")
+    args = ap.parse_args()
+
+    base, _ = run(no_chain, 1, args.seconds)
+    print(f"Source only: {100 * base:.1f}% of a core")
+    for name, build in (("legacy 2.4 MS/s", legacy_chain), ("front end 96 kS/s", frontend_chain)):
+        cpu, wall = run(build, args.channels, args.seconds)
+        per_chan = (cpu - base) / args.channels
+        print(f"{name:>18}: {100 * per_chan:6.1f}% of a core per channel "
+              f"({args.seconds / wall:.1f}x real time, {args.channels} ch)")
+
+    if args.pfb:
+        for n in sorted({1, args.channels, 21}):
+            cpu, wall = run(pfb_bank, n, args.seconds, shared=True)
+            print(f"{'pfb bank':>18}: {100 * (cpu - base) / n:6.1f}% of a core per channel "
+                  f"({args.seconds / wall:.1f}x real time, {n} ch)")
+
+
+if __name__ == "__main__":
+    main()
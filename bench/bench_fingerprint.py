@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""Time and peak memory per burst: full-length FFT (old 05) vs. Welch on narrowband IQ,
+plus the pre-trigger RF features."""
+import os
+import sys
+import time
+import argparse
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from fingerprint import welch_psd, cfo_bw, rf_features
+
+WIDE_RATE = 2.4e6
+NARROW_RATE = 96e3
+
+
+def nfm_burst(seconds, rate, cfo=350.0, dev=2.5e3, snr_db=20, seed=0):
+    """Tone-modulated NFM carrier with a CFO and white noise."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * rate)) / rate
+    audio = 0.6 * np.sin(2 * np.pi * 800 * t) + 0.4 * np.sin(2 * np.pi * 1900 * t)
+    phase = 2 * np.pi * (cfo * t + dev * np.cumsum(audio) / rate)
+    noise = (rng.standard_normal(len(t)) + 1j * rng.standard_normal(len(t))) * 10 ** (-snr_db / 20) / np.sqrt(2)
+    return (np.exp(1j * phase) + noise).astype(np.complex64)
+
+
+def keyed_burst(seconds, rate, pre=0.5, ramp=0.005, snr_db=20, seed=0):
+    """nfm_burst with `pre` s of noise in front and a raised-cosine key-up."""
+    rng = np.random.default_rng(seed + 1)
+    iq = nfm_burst(seconds, rate, snr_db=snr_db, seed=seed)
+    n = int(ramp * rate)
+    iq[:n] *= (0.5 - 0.5 * np.cos(np.pi * np.arange(n) / n)).astype(np.float32)
+    noise = (rng.standard_normal(int(pre * rate)) + 1j * rng.standard_normal(int(pre * rate)))
+    noise *= 10 ** (-snr_db / 20) / np.sqrt(2)
+    return np.concatenate((noise.astype(np.complex64), iq)), int(pre * rate)
+
+
+def legacy_cfo_bw(iq, samp_rate):
+    """The original fingerprint_and_rename spectrum: one FFT over the whole burst."""
+    window = iq * np.hamming(len(iq))
+    spec = np.fft.fftshift(np.fft.fft(window))
+    power = np.abs(spec) ** 2
+    freqs = np.fft.fftshift(np.fft.fftfreq(len(iq), d=1/samp_rate))
+    cfo = freqs[np.argmax(power)] / 1e3
+    mask = power > power.max() * 0.1
+    bw = ((freqs[mask][-1] - freqs[mask][0]) / 1e3) if mask.any() else 0.0
+    return cfo, bw
+
+
+def welch_cfo_bw(iq, samp_rate, nperseg):
+    return cfo_bw(*welch_psd(iq, samp_rate, nperseg))
+
+
+def measure(fn, *args):
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    cfo, bw = fn(*args)
+    dt = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return dt, peak, cfo, bw
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--seconds", type=float, nargs="+", default=[1.0, 5.0, 10.0])
+    ap.add_argument("--nperseg", type=int, default=4096)
+    ap.add_argument("--skip-legacy", action="store_true", help="don't run the full-FFT path (needs GBs)")
+    args = ap.parse_args()
+
+    print(f"{'burst':>6} {'method':>22} {'time ms':>9} {'peak MB':>9} {'cfo kHz':>8} {'bw kHz':>7}")
+    for sec in args.seconds:
+        runs = []
+        if not args.skip_legacy:
+            runs.append(("full FFT @2.4 MS/s", legacy_cfo_bw, nfm_burst(sec, WIDE_RATE), WIDE_RATE))
+        runs.append(("welch @2.4 MS/s", welch_cfo_bw, nfm_burst(sec, WIDE_RATE), WIDE_RATE, args.nperseg * 25))
+        runs.append(("welch @96 kS/s", welch_cfo_bw, nfm_burst(sec, NARROW_RATE), NARROW_RATE, args.nperseg))
+        for name, fn, *fargs in runs:
+            dt, peak, cfo, bw = measure(fn, *fargs)
+            print(f"{sec:>5.1f}s {name:>22} {1e3 * dt:>9.1f} {peak / 1e6:>9.1f} {cfo:>8.2f} {bw:>7.1f}")
+            del fargs
+
+    print(f"\n{'burst':>6} {'rf features ms':>15} {'peak MB':>9} {'rise ms':>8} {'dev rms kHz':>12}")
+    iq, trig = keyed_burst(1.0, NARROW_RATE)
+    rf_features(iq, NARROW_RATE, trig)          # warm up numpy.fft
+    for sec in args.seconds:
+        iq, trig = keyed_burst(sec, NARROW_RATE)
+        tracemalloc.start()
+        t0 = time.perf_counter()
+        feats = rf_features(iq, NARROW_RATE, trig)
+        dt = time.perf_counter() - t0
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"{sec:>5.1f}s {1e3 * dt:>15.2f} {peak / 1e6:>9.1f} {feats['rise_ms']:>8.2f} {feats['dev_rms_khz']:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""Fingerprint store: nearest-neighbour and identify latency as the store grows."""
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from fingerprint_db import FingerprintDB, FEATURES, RADIOS, SCALE
+
+# made-up cluster centres standing in for the radios, in fingerprint.FEATURES order:
+# ramp s, cfo kHz, bw kHz, rise ms, ramp shape, overshoot dB, chirp Hz, settle ms,
+# dev rms/peak kHz, CTCSS Hz, sub-audible dB, IQ amplitude dB / phase deg
+CENTRES = np.array([
+    (0.020, 0.4, 11.0, 2.4, 0.45, 0.8, 350, 6.0, 2.0, 3.1, 88.5, -18, 0.10, 0.8),
+    (0.035, -0.3, 10.0, 1.1, 0.52, 0.2, -120, 3.5, 1.8, 2.9, 100.0, -20, -0.05, -0.4),
+    (0.012, 1.2, 12.5, 3.5, 0.38, 1.5, 900, 12.0, 2.3, 3.6, 0.0, -45, 0.30, 1.6),
+    (0.050, 0.0, 9.0, 0.6, 0.60, 0.1, 40, 1.5, 1.6, 2.5, 123.0, -16, 0.00, 0.1),
+])
+SPREAD = 0.4 * np.array([SCALE[f] for f in FEATURES])
+
+
+def fill(db, n, labelled, rng):
+    """Add n clustered bursts, the first `labelled` of them with their radio."""
+    which = rng.integers(0, len(CENTRES), n)
+    vecs = (CENTRES[which] + rng.normal(0, SPREAD, (n, len(FEATURES)))).astype(np.float32)
+    for i in range(n):
+        radio = RADIOS[which[i]] if i < labelled else None
+        db.add(dict(zip(FEATURES, vecs[i])), float(i), 437.225e6, f"burst_{i}.wav", radio)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000, 300000])
+    ap.add_argument("--labelled", type=int, default=400)
+    ap.add_argument("--queries", type=int, default=1000)
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as d:
+        db = FingerprintDB(d)
+        fill(db, args.labelled, args.labelled, rng)
+        print(f"{'bursts':>8} {'nearest k=5 ms':>15} {'identify ms':>12} {'accuracy':>9}")
+        for size in args.sizes:
+            if size > db.n:
+                fill(db, size - db.n, 0, rng)
+            which = rng.integers(0, len(CENTRES), args.queries)
+            q = CENTRES[which] + rng.normal(0, SPREAD, (args.queries, len(FEATURES)))
+            fps = [dict(zip(FEATURES, v)) for v in q]
+
+            t0 = time.perf_counter()
+            for fp in fps:
+                db.nearest(fp, 5)
+            near = (time.perf_counter() - t0) / args.queries
+            t0 = time.perf_counter()
+            hits = sum(db.identify(fp)[0] == RADIOS[w] for fp, w in zip(fps, which))
+            ident = (time.perf_counter() - t0) / args.queries
+            print(f"{db.n:>8} {1e3 * near:>15.3f} {1e3 * ident:>12.3f} {hits / args.queries:>9.1%}")
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
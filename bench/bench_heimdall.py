@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""Heimdall frame ingest: throughput and per-frame allocations against a local stand-in DAQ."""
+import os
+import sys
+import time
+import argparse
+import tracemalloc
+import multiprocessing as mp
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from heimdall import HeimdallReader, StandInServer
+
+
+def serve(port_q, channels, cpi, drop_every):
+    """Stand-in server in its own process so it doesn't skew our numbers."""
+    srv = StandInServer(channels=channels, cpi=cpi, drop_every=drop_every)
+    port_q.put(srv.port)
+    srv.thread.join()
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--frames", type=int, default=200)
+    ap.add_argument("--channels", type=int, default=5)
+    ap.add_argument("--cpi", type=int, default=1 << 18, help="samples per channel per frame")
+    ap.add_argument("--drop-every", type=int, default=0, help="stand-in skips every Nth block index")
+    args = ap.parse_args()
+
+    ctx = mp.get_context("spawn")
+    port_q = ctx.Queue()
+    proc = ctx.Process(target=serve, args=(port_q, args.channels, args.cpi, args.drop_every), daemon=True)
+    proc.start()
+    reader = HeimdallReader(port=port_q.get(), max_channels=args.channels, max_cpi=args.cpi)
+
+    reader.read()                       # connect + warm up
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    samples = 0
+    for _ in range(args.frames):
+        frame = reader.read()
+        samples += frame.iq.size
+    dt = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    proc.terminate()
+
+    st = reader.stats()
+    print(f"{args.frames} frames of {args.channels} x {args.cpi} samples in {dt:.2f} s")
+    print(f"  {samples / dt / 1e6:.1f} MS/s aggregate ({samples / dt / 12e6:.1f}x a 5 x 2.4 MS/s Kraken)")
+    print(f"  {st['bytes'] / dt / 1e6:.0f} MB/s, peak Python allocations {peak / 1024:.1f} kB total")
+    print(f"  gaps {st['gaps']}, dropped frames {st['dropped_frames']}, sync errors {st['sync_errors']}")
+
+
+if __name__ == "__main__":
+    main()
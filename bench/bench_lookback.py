@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""Does the burst buffer hold the key-up? Lookback vs. none, edges applied late.
+
+Synthetic bursts (20 ms raised-cosine key-up) at the 96 kS/s channel rate
+go through the recorder's power trigger into a BurstRing. The trigger edge
+reaches the ring `--lag` blocks late, as it does when the trigger and the
+IQ sink run on different flowgraph threads. The old behaviour (no lookback,
+edge applied whenever it arrives) is compared with absolute-offset edges.
+"""
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dsp import SyntheticNFM, MovingPower, HysteresisTrigger, BurstRing
+from fingerprint import rf_features
+
+RATE = 96e3
+BLOCK = 4096
+
+
+def run(pre, lag, at_offset, seconds=30.0):
+    """(bursts ended, key-ups captured, rise_ms values, push us/block)."""
+    gen = SyntheticNFM(RATE, ramp=0.02, burst=2.0, gap=3.0, snr_db=25, seed=3)
+    power = MovingPower(int(5e-3 * RATE))
+    trig = HysteresisTrigger(RATE, -20.0, -25.0, 0.1)
+    ring = BurstRing(int(pre * RATE), int(3 * RATE))
+    truth = gen.bursts(seconds * RATE)
+    x = np.empty(BLOCK, dtype=np.complex64)
+    late, ended, caught, rise, push_s, blocks = [], 0, 0, [], 0.0, 0
+    for base in range(0, int(seconds * RATE), BLOCK):
+        gen.fill(x)
+        t0 = time.perf_counter()
+        ring.push(x)
+        push_s += time.perf_counter() - t0
+        blocks += 1
+        late += [(blocks + lag, ev) for ev in trig.process(power.process(x[None])[0], base)]
+        while late and late[0][0] <= blocks:
+            ev = late.pop(0)[1]
+            if ev.kind == "start":
+                ring.trigger(ev.offset if at_offset else None)
+            else:
+                ring.release(at=ev.offset if at_offset else None)
+                ended += 1
+                key_up = min(truth, key=lambda b: abs(b[0] - ev.offset))[0]
+                caught += ring.begin <= key_up
+                iq = ring.view()
+                if len(iq) > ring.trigger_at:
+                    rise.append(rf_features(iq, RATE, ring.trigger_at)["rise_ms"])
+    return ended, caught, rise, 1e6 * push_s / blocks
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--lag", type=int, default=2, help="blocks between the edge and the ring seeing it")
+    args = ap.parse_args()
+
+    print(f"{'buffer':>28} {'key-ups kept':>13} {'rise ms':>8} {'push us':>8}")
+    for name, pre, lag, at in (("old: no lookback, late edge", 0.0, args.lag, False),
+                               ("0.5 s lookback, late edge", 0.5, args.lag, False),
+                               ("0.5 s lookback, edge offset", 0.5, args.lag, True)):
+        n, caught, rise, us = run(pre, lag, at)
+        r = f"{np.nanmedian(rise):8.2f}" if rise else f"{'-':>8}"
+        print(f"{name:>28} {caught:>6d} / {n:<4d} {r} {us:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""Fixed vs. tracked trigger floor on a noise step, and tracker cost per channel."""
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dsp import SyntheticNFM, MovingPower, HysteresisTrigger, NoiseFloor
+
+RATE = 96e3
+BLOCK = 4096
+
+
+def run(noise_db, floor_db, period=10.0):
+    """Bursts (2 s every 5 s) over segments of different noise; returns (events, true bursts)."""
+    trig = HysteresisTrigger(RATE, -20.0, -25.0, 0.1, floor_db)
+    power = MovingPower(512)
+    events, base = [], 0
+    for k, nd in enumerate(noise_db):
+        gen = SyntheticNFM(RATE, noise_db=nd, snr_db=25, burst=2.0, gap=3.0, seed=k)
+        iq = np.empty(int(period * RATE), dtype=np.complex64)
+        gen.fill(iq)
+        p = power.process(iq[None])[0]
+        for i in range(0, len(p), BLOCK):
+            events += trig.process(p[i:i + BLOCK], base + i)
+        base += len(p)
+    truth = len(noise_db) * int(period // 5)
+    return events, truth
+
+
+def score(events, truth):
+    starts = [e for e in events if e.kind == "start"]
+    ends = [e for e in events if e.kind == "end"]
+    # a burst is caught when a start/end pair lasts about as long as a real one
+    good = sum(1 for s, e in zip(starts, ends) if 1.5 <= e.time - s.time <= 2.5)
+    stuck = sum(e.time - s.time for s, e in zip(starts, ends) if e.time - s.time > 2.5)
+    return good, truth, stuck
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--noise", type=float, nargs="+", default=[-40, -40, -22, -22, -22, -50, -50],
+                    help="noise floor (dBFS) of each 10 s segment")
+    ap.add_argument("--channels", type=int, nargs="+", default=[1, 8, 32, 128])
+    args = ap.parse_args()
+
+    print(f"{'floor':>8} {'bursts caught':>14} {'stuck on s':>11}")
+    for name, floor_db in (("fixed", None), ("tracked", -30.0)):
+        good, truth, stuck = score(*run(args.noise, floor_db))
+        print(f"{name:>8} {good:>8d} / {truth:<3d} {stuck:>11.1f}")
+
+    print(f"\n{'channels':>8} {'ms per s':>9} {'us/ch/s':>8}")
+    for ch in args.channels:
+        nf = NoiseFloor(RATE, ch)
+        p = np.random.default_rng(0).random((ch, int(RATE)), dtype=np.float32)
+        t0 = time.perf_counter()
+        for i in range(0, p.shape[1], BLOCK):
+            nf.update(p[:, i:i + BLOCK])
+        dt = time.perf_counter() - t0
+        print(f"{ch:>8} {1e3 * dt:>9.2f} {1e6 * dt / ch:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
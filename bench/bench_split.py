@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""How much does fingerprinting disturb the capture path: one process vs. split stages.
+
+A NumPy stand-in for the DSP stage produces channel IQ, power and audio in
+real time (SyntheticNFM bursts at 96 kS/s) and records how late each 10 ms
+block was. "one process" runs it as a thread beside the recorder, which
+fingerprints every burst on its own threads (like 05 before the pool).
+"split" runs it as its own process, the recorder in another and the
+fingerprints in split_recorder's worker pool, connected by ShmRings.
+"""
+import os
+import sys
+import time
+import json
+import argparse
+import tempfile
+import threading
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dsp import SyntheticNFM, MovingPower
+from shm_ring import ShmRing, pin
+from split_recorder import SplitRecorder, RingRecorder, STREAMS
+from fingerprint import fingerprint
+
+RATE = 96e3
+BLOCK = 960                     # 10 ms
+
+
+def produce(seconds, rings, lateness):
+    """Fill the rings paced to real time; lateness gets how late each block started (s)."""
+    gen = SyntheticNFM(RATE, burst=2.0, gap=1.0, snr_db=25, seed=1)
+    power = MovingPower(int(5e-3 * RATE))
+    x = np.empty(BLOCK, dtype=np.complex64)
+    t0 = time.time()
+    for k in range(int(seconds * RATE / BLOCK)):
+        due = t0 + k * BLOCK / RATE
+        now = time.time()
+        if now < due:
+            time.sleep(due - now)
+        lateness.append(max(0.0, time.time() - due))
+        gen.fill(x)
+        fm = np.angle(x[1:] * np.conj(x[:-1]))
+        rings["iq"].write(x)
+        rings["power"].write(power.process(x[None])[0])
+        rings["audio"].write(np.append(fm, fm[-1])[::2].astype(np.float32))
+    for ring in rings.values():
+        ring.close_writer()
+
+
+def numpy_dsp(source, freq, names, stop, cpus=None, samp_rate=None):
+    """DSP stage stand-in for SplitRecorder (source = "seconds=N,out=PATH")."""
+    pin(cpus)
+    opts = dict(kv.split("=") for kv in source.split(","))
+    rings = {k: ShmRing(dtype=STREAMS[k], name=n) for k, n in names.items()}
+    lateness = []
+    produce(float(opts["seconds"]), rings, lateness)
+    with open(opts["out"], "w") as f:
+        json.dump(lateness, f)
+
+
+class InlineRecorder(RingRecorder):
+    """05 before the pool: fingerprints on threads of the capture process."""
+
+    def _finish(self):
+        path, iq, audio, at = self.current, self.iq.view(), self.audio.view(), self.iq.trigger_at
+        super()._finish()
+        if path and len(iq) > at:
+            threading.Thread(target=fingerprint, args=(np.array(iq), np.array(audio), RATE, 48e3),
+                             kwargs={"trigger_at": at}).start()
+
+
+def one_process(seconds, outdir):
+    rings = {k: ShmRing(int(2 * RATE), STREAMS[k]) for k in STREAMS}
+    names = {k: r.name for k, r in rings.items()}
+    lateness = []
+    producer = threading.Thread(target=produce, args=(seconds, rings, lateness))
+    rec = InlineRecorder(names, RATE, outdir=outdir, fingerprint=False, save_iq=False)
+    producer.start()
+    rec.run()
+    producer.join()
+    rec.close()
+    for ring in rings.values():
+        ring.close()
+    return lateness, rec.saved
+
+
+def split(seconds, outdir):
+    out = os.path.join(outdir, "lateness.json")
+    sup = SplitRecorder(f"seconds={seconds},out={out}", samp_rate=RATE, dsp=numpy_dsp,
+                        outdir=outdir, save_iq=False)
+    sup.start()
+    sup.wait()
+    with open(out) as f:
+        lateness = json.load(f)
+    saved = len([n for n in os.listdir(outdir) if n.endswith(".wav")])
+    return lateness, saved
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--seconds", type=float, default=20.0)
+    args = ap.parse_args()
+
+    print(f"{'':>12} {'bursts':>7} {'late p99 ms':>12} {'late max ms':>12}")
+    for name, fn in (("one process", one_process), ("split", split)):
+        with tempfile.TemporaryDirectory() as d:
+            lateness, saved = fn(args.seconds, d)
+        late = 1e3 * np.array(lateness)
+        print(f"{name:>12} {saved:>7d} {np.percentile(late, 99):>12.2f} {late.max():>12.2f}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
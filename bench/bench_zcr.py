@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""ZCR gate cost per second of audio, across frame sizes and block sizes."""
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dsp import ZcrGate
+
+
+def voice_then_static(seconds, rate, seed=0):
+    """Half tone-pair 'voice', half 2.7 kHz band-limited noise (squelch tail)."""
+    rng = np.random.default_rng(seed)
+    n = int(seconds * rate)
+    t = np.arange(n) / rate
+    x = 0.3 * np.sin(2 * np.pi * 350 * t) + 0.2 * np.sin(2 * np.pi * 900 * t)
+    noise = np.fft.rfft(rng.standard_normal(n))
+    noise[np.fft.rfftfreq(n, 1 / rate) > 2700] = 0
+    noise = np.fft.irfft(noise, n)
+    x[n // 2:] = 0.3 * noise[n // 2:] / noise.std()
+    return x.astype(np.float32)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--seconds", type=float, default=60.0)
+    ap.add_argument("--rate", type=float, default=48e3)
+    args = ap.parse_args()
+
+    audio = voice_then_static(args.seconds, args.rate)
+    print(f"{'frame ms':>8} {'block':>6} {'us/audio s':>11} {'events':>7}")
+    for frame in (0.005, 0.01, 0.02):
+        for block in (512, 4096, 32768):
+            gate = ZcrGate(args.rate, frame)
+            events = []
+            t0 = time.perf_counter()
+            for i in range(0, len(audio), block):
+                events += gate.process(audio[i:i + block], i)
+            dt = time.perf_counter() - t0
+            print(f"{1e3 * frame:>8.0f} {block:>6} {1e6 * dt / args.seconds:>11.1f} {len(events):>7}")
+
+
+if __name__ == "__main__":
+    main()
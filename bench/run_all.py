@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""End-to-end benchmark on fixed synthetic IQ: throughput, CPU, trigger latency, drops, fingerprint cost.
+
+Writes machine-readable JSON (--json) and can fail on regressions against a
+previous run (--baseline).
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import tempfile
+
+import numpy as np
+from gnuradio import gr, blocks
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from nfm_blocks import nfm_channel
+from nfm_recorder import NFMRecorder
+from iq_sources import synthetic_nfm_source
+from fingerprint import fingerprint, tagged_name
+
+SAMP_RATE = 2.4e6
+# fixed workload: 2 s bursts every 5 s, 350 Hz CFO, 25 dB SNR
+WORKLOAD = "cfo=350,burst=2,gap=3,snr_db=25,seed=1"
+
+# (stage, metric, +1 higher is better / -1 lower is better)
+WATCHED = [
+    ("source", "samples_per_sec", +1),
+    ("frontend", "samples_per_sec", +1),
+    ("frontend", "cpu_per_channel", -1),
+    ("recorder", "samples_per_sec", +1),
+    ("recorder", "cpu_per_channel", -1),
+    ("recorder", "detect_ms_mean", -1),
+    ("recorder", "missed", -1),
+    ("realtime", "dropped_samples", -1),
+    ("fingerprint", "ms_mean", -1),
+    ("fingerprint", "peak_rss_mb_max", -1),
+]
+
+
+def _proc_status(field):
+    """VmRSS / VmHWM from /proc/self/status in MB (0 if unavailable)."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return 0.0
+
+
+def _reset_peak_rss():
+    """Reset VmHWM so the next reading is the peak since now (Linux >= 4.0)."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _timed(tb):
+    cpu0, wall0 = time.process_time(), time.time()
+    tb.run()
+    return time.process_time() - cpu0, time.time() - wall0
+
+
+def bench_source(seconds):
+    """Raw generator cost, subtracted from the per-channel CPU figures."""
+    tb = gr.top_block()
+    src = synthetic_nfm_source(SAMP_RATE, seconds=seconds, cfo=350, seed=1)
+    tb.connect(src, blocks.null_sink(gr.sizeof_gr_complex))
+    cpu, wall = _timed(tb)
+    return {"samples_per_sec": seconds * SAMP_RATE / wall, "cpu": cpu / seconds}
+
+
+def bench_frontend(seconds, nchan, base_cpu):
+    """nfm_channel front ends 25 kHz apart on one source."""
+    tb = gr.top_block()
+    src = synthetic_nfm_source(SAMP_RATE, seconds=seconds, cfo=350, seed=1)
+    for i in range(nchan):
+        chan = nfm_channel(SAMP_RATE, offset=(i - nchan // 2) * 25e3)
+        tb.connect(src, chan)
+        tb.connect((chan, 0), blocks.null_sink(gr.sizeof_float))
+        tb.connect((chan, 1), blocks.null_sink(gr.sizeof_float))
+    cpu, wall = _timed(tb)
+    return {
+        "channels": nchan,
+        "samples_per_sec": seconds * SAMP_RATE / wall,
+        "realtime_factor": seconds / wall,
+        "cpu_per_channel": (cpu / seconds - base_cpu) / nchan,
+    }
+
+
+class RecorderRun:
+    """Drive the 05 recorder like 03 does: file edges straight off the trigger."""
+
+    def __init__(self, source, outdir):
+        self.tb = NFMRecorder(on_db=-20.0, off_db=-25.0, source=source)
+        self.outdir = outdir
+        self.starts = []
+        self.saved = []
+        self.bursts = []
+        self.tb.trigger.subscribe(self.on_edge)
+
+    def on_edge(self, ev):
+        offset = self.tb.chan.audio_offset(ev.offset)
+        if ev.kind == "start":
+            self.starts.append(ev)
+            self.tb.start_record(os.path.join(self.outdir, f"burst_{len(self.starts):03d}.wav"), offset)
+        else:
+            # copied once the buffers have reached the end edge
+            self.tb.when_captured(lambda iq, iq_at, audio, audio_at: self.bursts.append(
+                (np.array(iq), np.array(audio[audio_at:]), iq_at)))
+            self.tb.stop_record(offset, lambda path, frames: self.saved.append((path, frames)))
+
+    def run(self):
+        cpu, wall = _timed(self.tb)
+        self.tb.stop_record()
+        return cpu, wall
+
+
+def match_latency(starts, truth, chan_rate):
+    """Detected start minus true key-up (ms) for every ground-truth burst."""
+    detected = np.array([ev.offset / chan_rate for ev in starts])
+    lat, hit = [], set()
+    for start, end in truth:
+        t0, t1 = start / SAMP_RATE, end / SAMP_RATE
+        inside = np.flatnonzero((detected >= t0 - 0.05) & (detected < t1))
+        if inside.size:
+            hit.add(int(inside[0]))
+            lat.append(1e3 * (detected[inside[0]] - t0))
+    return lat, len(truth) - len(lat), len(starts) - len(hit)
+
+
+def bench_recorder(seconds, base_cpu, outdir):
+    run = RecorderRun(f"synth:{WORKLOAD},seconds={seconds}", outdir)
+    cpu, wall = run.run()
+    truth = run.tb.src.gen.bursts(seconds * SAMP_RATE)
+    lat, missed, false = match_latency(run.starts, truth, run.tb.chan.channel_rate)
+    react = [ev.latency_ms for ev in run.starts]
+    return run, {
+        "samples_per_sec": seconds * SAMP_RATE / wall,
+        "realtime_factor": seconds / wall,
+        "cpu_per_channel": cpu / seconds - base_cpu,
+        "bursts_true": len(truth),
+        "bursts_detected": len(run.starts),
+        "missed": missed,
+        "false": false,
+        "detect_ms_mean": float(np.mean(lat)) if lat else None,
+        "detect_ms_max": float(np.max(lat)) if lat else None,
+        "react_ms_mean": float(np.mean(react)) if react else None,
+        "files_saved": sum(1 for _, frames in run.saved if frames),
+    }
+
+
+def bench_realtime(seconds, outdir):
+    """Paced like a dongle: samples a real device would have dropped."""
+    run = RecorderRun(f"synth:{WORKLOAD},seconds={seconds},realtime", outdir)
+    run.run()
+    pacer = run.tb.src.pacer
+    return {
+        "seconds": seconds,
+        "dropped_samples": pacer.dropped,
+        "max_lag_ms": 1e3 * pacer.max_lag,
+    }
+
+
+def bench_fingerprint(run):
+    """fingerprint + rename per captured burst, with peak RSS above the baseline."""
+    times, peaks = [], []
+    can_reset = _reset_peak_rss()
+    for (path, frames), (iq, audio, trigger_at) in zip(run.saved, run.bursts):
+        if not frames:
+            continue
+        base = _proc_status("VmRSS")
+        if can_reset:
+            _reset_peak_rss()
+        t0 = time.perf_counter()
+        fp = fingerprint(iq, audio, run.tb.iq_rate, run.tb.audio_rate, trigger_at=trigger_at)
+        os.rename(path, tagged_name(path, fp))
+        times.append(1e3 * (time.perf_counter() - t0))
+        if can_reset:
+            peaks.append(_proc_status("VmHWM") - base)
+    return {
+        "bursts": len(times),
+        "ms_mean": float(np.mean(times)) if times else None,
+        "ms_max": float(np.max(times)) if times else None,
+        "peak_rss_mb_max": float(max(peaks)) if peaks else None,
+    }
+
+
+def compare(results, baseline, tolerance):
+    """List the watched metrics that got worse than `tolerance` (relative)."""
+    worse = []
+    for stage, key, sign in WATCHED:
+        new = results.get(stage, {}).get(key)
+        old = baseline.get(stage, {}).get(key)
+        if new is None or old is None:
+            continue
+        slack = tolerance * max(abs(old), 1e-9)
+        if sign * (old - new) > slack:
+            worse.append(f"{stage}.{key}: {old:.4g} -> {new:.4g}")
+    return worse
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--seconds", type=float, default=30.0, help="signal seconds for the max-speed stages")
+    ap.add_argument("--channels", type=int, default=4, help="front ends in the frontend stage")
+    ap.add_argument("--rt-seconds", type=float, default=10.0, help="length of the paced run (0 skips it)")
+    ap.add_argument("--json", help="write results here ('-' for stdout)")
+    ap.add_argument("--baseline", help="earlier --json output to compare against")
+    ap.add_argument("--tolerance", type=float, default=0.2, help="allowed relative regression")
+    args = ap.parse_args()
+
+    results = {
+        "meta": {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "host": platform.node(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "gnuradio": gr.version(),
+            "cpus": os.cpu_count(),
+            "samp_rate": SAMP_RATE,
+            "workload": WORKLOAD,
+            "seconds": args.seconds,
+        }
+    }
+
+    outdir = tempfile.mkdtemp(prefix="nfm_bench_")
+    try:
+        results["source"] = bench_source(args.seconds)
+        base = results["source"]["cpu"]
+        results["frontend"] = bench_frontend(args.seconds, args.channels, base)
+        run, results["recorder"] = bench_recorder(args.seconds, base, outdir)
+        results["fingerprint"] = bench_fingerprint(run)
+        if args.rt_seconds > 0:
+            results["realtime"] = bench_realtime(args.rt_seconds, outdir)
+    finally:
+        shutil.rmtree(outdir, ignore_errors=True)
+
+    for stage, values in results.items():
+        if stage == "meta":
+            continue
+        line = "  ".join(f"{k}={v:.4g}" if isinstance(v, float) else f"{k}={v}" for k, v in values.items())
+        print(f"{stage:>12}: {line}", file=sys.stderr)
+
+    if args.json == "-":
+        json.dump(results, sys.stdout, indent=2)
+        print()
+    elif args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            worse = compare(results, json.load(f), args.tolerance)
+        for w in worse:
+            print(f"REGRESSION {w}", file=sys.stderr)
+        sys.exit(1 if worse else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,310 @@
+# Compressed burst archive: rolling segment files plus a fixed-record index.
+#
+#   DIR/index.json       codec, sample rates, feature names and index layout (written once)
+#   DIR/index.bin        one INDEX row per burst, appended; features are
+#                        filled in place once the fingerprint is known
+#   DIR/seg_000001.flac  demodulated audio of many bursts back to back
+#   DIR/seg_000001.iqz   channel IQ, one zlib block of int16 I/Q per burst
+#
+# Everything is written on one worker thread, so the recorder only pays for
+# a copy of the burst. Queries memory-map index.bin: no directory scans, no
+# file name parsing. FLAC/Opus need the optional `soundfile` package;
+# codec="zlib" (zlib-packed 16-bit PCM) needs nothing.
+import os
+import json
+import time
+import zlib
+import queue
+import threading
+
+import numpy as np
+
+from fingerprint import FEATURES
+
+try:
+    import soundfile
+except ImportError:                 # only codec="zlib" without it
+    soundfile = None
+
+CODECS = {"flac": ("flac", "FLAC", "PCM_16"), "opus": ("opus", "OGG", "OPUS"), "zlib": ("pcmz", None, None)}
+
+
+LAYOUT = 2      # 2: audio_trigger_at, and duration counts from the trigger
+
+
+def index_dtype(features=FEATURES, layout=LAYOUT):
+    """One index row; layout 1 archives (no audio_trigger_at, duration with the lookback) still read."""
+    return np.dtype([
+        ("time", "<f8"), ("duration", "<f4"), ("peak_db", "<f4"), ("freq", "<f8"),
+        ("segment", "<u4"),
+        ("audio_at", "<u8"), ("audio_bytes", "<u4"), ("audio_frames", "<u4"),   # frames for flac/opus, bytes for zlib
+        ("iq_at", "<u8"), ("iq_bytes", "<u4"), ("iq_samples", "<u4"), ("iq_scale", "<f4"),
+        ("trigger_at", "<u4"),
+    ] + ([("audio_trigger_at", "<u4")] if layout >= 2 else []) + [     # audio frame of the trigger
+        ("features", "<f4", (len(features),)),                                  # NaN until fingerprinted
+    ])
+
+
+def peak_db(iq, rate, block=0.01):
+    """Loudest 10 ms block power of a burst (dBFS)."""
+    n = max(1, int(block * rate))
+    m = len(iq) // n
+    if not m:
+        return -120.0
+    x = iq[:m * n].reshape(m, n)
+    p = (x.real.astype(np.float32) ** 2 + x.imag.astype(np.float32) ** 2).mean(axis=1).max()
+    return float(10 * np.log10(p)) if p > 0 else -120.0
+
+
+class ArchiveWriter:
+    """Appends bursts to the archive in DIR from a background thread.
+
+    Segments roll after `roll_mb` megabytes or `roll_seconds`, whichever
+    comes first. write() copies the burst and returns its index row at once;
+    set_features() may follow later (e.g. from the fingerprint pool). Only
+    archives of the current LAYOUT are appended to.
+    """
+
+    def __init__(self, path, audio_rate, iq_rate, codec="flac", keep_iq=True,
+                 roll_mb=64, roll_seconds=3600, depth=16, features=FEATURES):
+        if codec not in CODECS:
+            raise ValueError(f"codec must be one of {tuple(CODECS)}")
+        if codec != "zlib" and soundfile is None:
+            raise RuntimeError(f"codec {codec!r} needs the soundfile package (or use codec='zlib')")
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.codec = codec
+        self.audio_rate = int(audio_rate)
+        self.iq_rate = float(iq_rate)
+        self.keep_iq = keep_iq
+        self.roll_bytes = int(roll_mb * 1e6)
+        self.roll_seconds = roll_seconds
+        self.features = tuple(features)
+        self.dtype = index_dtype(self.features)
+
+        head = {"codec": codec, "audio_rate": self.audio_rate, "iq_rate": self.iq_rate,
+                "features": list(self.features), "layout": LAYOUT}
+        head_path = os.path.join(path, "index.json")
+        if os.path.exists(head_path):
+            with open(head_path) as f:
+                old = json.load(f)
+            if old != head:
+                raise ValueError(f"{path} was written with {old}, not {head}")
+        else:
+            with open(head_path, "w") as f:
+                json.dump(head, f)
+
+        name = os.path.join(path, "index.bin")
+        # not "a" mode: features are written into existing rows
+        self.index = open(name, "r+b" if os.path.exists(name) else "w+b")
+        self.index.seek(0, os.SEEK_END)
+        self.index.truncate(self.index.tell() // self.dtype.itemsize * self.dtype.itemsize)  # torn last row
+        self.next_id = self.index.tell() // self.dtype.itemsize
+        self.segment = max([int(n[4:10]) for n in os.listdir(path) if n.startswith("seg_")] + [0])
+        self.audio = self.iq = None
+
+        self.queue = queue.Queue(maxsize=depth)
+        self.dropped = 0
+        self.lock = threading.Lock()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def write(self, audio, iq=None, trigger_at=0, t=None, freq=0.0, audio_trigger_at=0):
+        """Queue one burst (copied here); returns its index row, or None if the queue is full.
+
+        trigger_at / audio_trigger_at: where the trigger fired in iq / audio
+        (the samples before it are the recorder's lookback).
+        """
+        rec = (np.array(audio, dtype=np.float32),
+               np.array(iq, dtype=np.complex64) if iq is not None and self.keep_iq else None,
+               int(trigger_at), time.time() if t is None else t, freq, min(int(audio_trigger_at), len(audio)))
+        with self.lock:
+            try:
+                self.queue.put_nowait(("burst", self.next_id, rec))
+            except queue.Full:
+                self.dropped += 1
+                return None
+            burst_id = self.next_id
+            self.next_id += 1
+        return burst_id
+
+    def set_features(self, burst_id, fp):
+        """Fill in a burst's fingerprint (applied after the burst itself)."""
+        self.queue.put(("features", burst_id, np.array([fp.get(f, np.nan) for f in self.features], np.float32)))
+
+    def _roll(self):
+        self._close_segment()
+        self.segment += 1
+        self.seg_start = time.time()
+        ext, fmt, subtype = CODECS[self.codec]
+        base = os.path.join(self.path, f"seg_{self.segment:06d}")
+        if fmt:
+            self.audio = soundfile.SoundFile(f"{base}.{ext}", "w", self.audio_rate, 1, subtype, format=fmt)
+        else:
+            self.audio = open(f"{base}.{ext}", "wb")
+        self.audio_name = f"{base}.{ext}"
+        self.audio_pos = 0
+        self.iq = open(f"{base}.iqz", "wb") if self.keep_iq else None
+
+    def _close_segment(self):
+        if self.audio is not None:
+            self.audio.close()
+        if self.iq is not None:
+            self.iq.close()
+        self.audio = self.iq = None
+
+    def _segment_full(self):
+        if self.audio is None or time.time() - self.seg_start >= self.roll_seconds:
+            return True
+        size = os.path.getsize(self.audio_name) + (self.iq.tell() if self.iq else 0)
+        return size >= self.roll_bytes
+
+    def _append(self, burst_id, rec):
+        audio, iq, trigger_at, t, freq, audio_trigger_at = rec
+        if self._segment_full():
+            self._roll()
+        row = np.zeros(1, dtype=self.dtype)[0]
+        row["time"] = t
+        row["duration"] = (len(audio) - audio_trigger_at) / self.audio_rate     # on the air, without the lookback
+        row["audio_trigger_at"] = audio_trigger_at
+        row["freq"] = freq
+        row["segment"] = self.segment
+        row["features"] = np.nan
+
+        row["audio_at"] = self.audio_pos
+        row["audio_frames"] = len(audio)
+        if self.codec == "zlib":
+            blob = zlib.compress((np.clip(audio, -1.0, 1.0) * 32767).astype("<i2").tobytes(), 6)
+            self.audio.write(blob)
+            row["audio_bytes"] = len(blob)
+            self.audio_pos += len(blob)
+        else:
+            self.audio.write(audio)
+            self.audio_pos += len(audio)
+
+        if iq is not None and len(iq):
+            row["peak_db"] = peak_db(iq, self.iq_rate)
+            scale = float(np.abs(iq.view(np.float32)).max()) or 1.0
+            pcm = np.round(iq.view(np.float32) * (32767 / scale)).astype("<i2")
+            blob = zlib.compress(pcm.tobytes(), 1)
+            row["iq_at"] = self.iq.tell()
+            row["iq_bytes"] = len(blob)
+            row["iq_samples"] = len(iq)
+            row["iq_scale"] = scale
+            row["trigger_at"] = trigger_at
+            self.iq.write(blob)
+        else:
+            pk = float(np.abs(audio).max()) if len(audio) else 0.0
+            row["peak_db"] = 20 * np.log10(pk) if pk > 0 else -120.0
+
+        self.index.seek(burst_id * self.dtype.itemsize)
+        self.index.write(row.tobytes())
+        self.index.flush()
+
+    def _set_features(self, burst_id, vec):
+        off = burst_id * self.dtype.itemsize + self.dtype.fields["features"][1]
+        self.index.seek(0, os.SEEK_END)
+        if off + vec.nbytes > self.index.tell():
+            return                      # burst was dropped or never written
+        self.index.seek(off)
+        self.index.write(vec.tobytes())
+        self.index.flush()
+
+    def _run(self):
+        while True:
+            msg = self.queue.get()
+            if msg is None:
+                break
+            kind, burst_id, payload = msg
+            try:
+                if kind == "burst":
+                    self._append(burst_id, payload)
+                else:
+                    self._set_features(burst_id, payload)
+            except Exception as e:
+                print(f"⚠️ Archive write failed for burst #{burst_id}: {e!r}", flush=True)
+        self._close_segment()
+        self.index.close()
+
+    def close(self):
+        """Write out everything queued, then finalize the open segment."""
+        self.queue.put(None)
+        self.thread.join()
+
+
+class BurstArchive:
+    """Read side: memory-mapped index, bursts decoded on demand."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, "index.json")) as f:
+            head = json.load(f)
+        self.codec = head["codec"]
+        self.audio_rate = head["audio_rate"]
+        self.iq_rate = head["iq_rate"]
+        self.features = tuple(head["features"])
+        self.layout = head.get("layout", 1)
+        self.dtype = index_dtype(self.features, self.layout)
+        self.refresh()
+
+    def refresh(self):
+        """Pick up bursts appended since the archive was opened."""
+        name = os.path.join(self.path, "index.bin")
+        n = os.path.getsize(name) // self.dtype.itemsize if os.path.exists(name) else 0
+        self.index = np.memmap(name, dtype=self.dtype, mode="r", shape=(n,)) if n else np.zeros(0, self.dtype)
+        return len(self.index)
+
+    def __len__(self):
+        return len(self.index)
+
+    def query(self, start=None, end=None, min_db=None, freq=None, min_duration=None):
+        """Ids of bursts matching all given conditions, oldest first."""
+        ix = self.index
+        keep = np.ones(len(ix), dtype=bool)
+        if start is not None:
+            keep &= ix["time"] >= start
+        if end is not None:
+            keep &= ix["time"] < end
+        if min_db is not None:
+            keep &= ix["peak_db"] >= min_db
+        if freq is not None:
+            keep &= np.abs(ix["freq"] - freq) < 1.0
+        if min_duration is not None:
+            keep &= ix["duration"] >= min_duration
+        return np.flatnonzero(keep)
+
+    def features_of(self, burst_id):
+        return dict(zip(self.features, map(float, self.index[burst_id]["features"])))
+
+    def _segment(self, row, ext):
+        return os.path.join(self.path, f"seg_{int(row['segment']):06d}.{ext}")
+
+    def audio_trigger_at(self, burst_id):
+        """Audio frame the trigger fired on (0 in layout 1 archives, which didn't keep it)."""
+        return int(self.index[burst_id]["audio_trigger_at"]) if self.layout >= 2 else 0
+
+    def audio(self, burst_id):
+        """Demodulated audio of one burst (float32), lookback included."""
+        row = self.index[burst_id]
+        ext, fmt, _ = CODECS[self.codec]
+        if fmt is None:
+            with open(self._segment(row, ext), "rb") as f:
+                f.seek(int(row["audio_at"]))
+                pcm = np.frombuffer(zlib.decompress(f.read(int(row["audio_bytes"]))), "<i2")
+            return pcm.astype(np.float32) / 32767
+        if soundfile is None:
+            raise RuntimeError(f"reading {self.codec} needs the soundfile package")
+        with soundfile.SoundFile(self._segment(row, ext)) as f:
+            f.seek(int(row["audio_at"]))
+            return f.read(int(row["audio_frames"]), dtype="float32")
+
+    def iq(self, burst_id):
+        """(channel IQ as complex64, trigger index) of one burst, or (None, 0)."""
+        row = self.index[burst_id]
+        if not row["iq_bytes"]:
+            return None, 0
+        with open(self._segment(row, "iqz"), "rb") as f:
+            f.seek(int(row["iq_at"]))
+            pcm = np.frombuffer(zlib.decompress(f.read(int(row["iq_bytes"]))), "<i2")
+        iq = (pcm.astype(np.float32) * (float(row["iq_scale"]) / 32767)).view(np.complex64)
+        return iq, int(row["trigger_at"])
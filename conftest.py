@@ -0,0 +1 @@
+# Lets tests/ import the repo's modules (dsp, nfm_blocks, ...) from the repo root.
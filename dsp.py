@@ -0,0 +1,523 @@
+# Plain NumPy helpers shared by the recorders (no GNU Radio imports here,
+# so they can be reused from worker processes and benchmarks).
+import time
+import struct
+import threading
+from collections import namedtuple
+import numpy as np
+
+# kind is "start" or "end"; offset is the absolute sample index of the edge
+BurstEvent = namedtuple("BurstEvent", "kind offset time db latency_ms")
+
+
+class BurstRing:
+    """Preallocated lookback ring + capped burst capture buffer.
+
+    Edges may carry an absolute sample offset (`at`): a trigger then copies
+    the `pre` samples before it out of the lookback ring in one go, and a
+    release that is still ahead of the pushed samples keeps capturing until
+    the stream gets there, so a view taken right after such a release
+    is short: when_done() hands out the view once the burst is complete.
+    A trigger older than the lookback starts at the oldest sample still
+    held (trigger_at 0), and a release before the burst leaves it empty.
+    With channels > 1 every sample is a row of `channels` coherent values
+    and push() takes (n, channels) blocks.
+    """
+
+    def __init__(self, pre, post, dtype=np.complex64, slots=2, channels=1):
+        self.pre = int(pre)
+        self.post = int(post)
+        self.capacity = self.pre + self.post
+        self.dtype = np.dtype(dtype)
+        row = (channels,) if channels > 1 else ()
+        self.hist = np.zeros((max(self.pre, 1),) + row, dtype=self.dtype)
+        # each slot holds one burst; a view handed out stays valid until
+        # `slots` more bursts have been triggered
+        self.bursts = np.zeros((slots, self.capacity) + row, dtype=self.dtype)
+        self.pos = 0            # next write index in hist
+        self.seen = 0           # total samples pushed
+        self.slot = 0
+        self.fill = 0
+        self.begin = 0          # absolute offset of the burst's first sample
+        self.stop = 0           # absolute offset where capture ends
+        self.trigger_at = 0     # index inside the burst where the trigger fired
+        self.capturing = False
+        self.truncated = False
+        self.on_done = None     # when_done() callback of the burst being captured
+        self.lock = threading.Lock()
+
+    def _done(self):
+        """The pending when_done() call, once the burst stopped capturing (under the lock)."""
+        if self.capturing or self.on_done is None:
+            return None
+        fn, self.on_done = self.on_done, None
+        return fn, self.bursts[self.slot, :self.fill], self.trigger_at
+
+    def when_done(self, fn):
+        """fn(view, trigger_at) once the current burst is complete (now, if it is).
+
+        Runs on the thread that completes it: push(), or the trigger() that
+        cuts it short.
+        """
+        with self.lock:
+            self.on_done = fn
+            done = self._done()
+        if done:
+            done[0](*done[1:])
+
+    def trigger(self, at=None):
+        """Start a new burst at absolute sample `at` (default: the next one pushed)."""
+        with self.lock:
+            self.capturing = False          # a burst still capturing is cut here
+            cut = self._done()
+            at = self.seen if at is None else int(at)
+            self.slot = (self.slot + 1) % len(self.bursts)
+            buf = self.bursts[self.slot]
+            begin = max(at - self.pre, self.seen - min(self.seen, self.pre))
+            k = max(0, self.seen - begin)
+            if k:
+                start = (self.pos - k) % self.pre
+                first = min(k, self.pre - start)
+                buf[:first] = self.hist[start:start + first]
+                buf[first:k] = self.hist[:k - first]
+            self.begin = begin
+            self.stop = begin + self.capacity
+            self.fill = k
+            # the trigger itself may already have left the lookback
+            self.trigger_at = max(0, at - begin)
+            self.capturing = True
+            self.truncated = False
+        if cut:
+            cut[0](*cut[1:])
+
+    def release(self, back=0, at=None):
+        """Stop the current burst at absolute sample `at`, or drop its last `back` samples."""
+        with self.lock:
+            end = self.begin + self.fill - back if at is None else int(at)
+            # never before the burst's first sample (nor its trigger)
+            self.stop = min(self.stop, max(end, self.begin + self.trigger_at, self.begin))
+            self.fill = max(0, min(self.fill, self.stop - self.begin))
+            self.capturing = self.begin + self.fill < self.stop
+            done = self._done()
+        if done:
+            done[0](*done[1:])
+
+    def push(self, x):
+        """Feed a block of samples (called from the flowgraph thread)."""
+        n = len(x)
+        with self.lock:
+            if self.capturing:
+                buf = self.bursts[self.slot]
+                lo = self.begin + self.fill - self.seen
+                hi = min(n, self.stop - self.seen)
+                if hi > lo:
+                    buf[self.fill:self.fill + hi - lo] = x[lo:hi]
+                    self.fill += hi - lo
+                if self.begin + self.fill >= self.stop:
+                    self.capturing = False
+                    # post-trigger cap reached, stop growing
+                    self.truncated = self.fill == self.capacity
+            done = self._done()
+            if self.pre:
+                if n >= self.pre:
+                    self.hist[:] = x[n - self.pre:]
+                    self.pos = 0
+                else:
+                    first = min(n, self.pre - self.pos)
+                    self.hist[self.pos:self.pos + first] = x[:first]
+                    self.hist[:n - first] = x[first:]
+                    self.pos = (self.pos + n) % self.pre
+            self.seen += n
+        if done:
+            done[0](*done[1:])
+
+    def view(self):
+        """Zero-copy view of the current burst."""
+        with self.lock:
+            return self.bursts[self.slot, :self.fill]
+
+
+class NoiseFloor:
+    """Running minimum-statistics noise floor of one or more power streams.
+
+    Power is averaged over `block` s and the floor is the smallest block
+    mean of the last `span` s, kept as `sub` sub-window minima so each
+    block costs the same however long the span. While a channel is busy (a
+    burst in progress) its floor is held, so a long transmission cannot
+    pull it up; after `hold` s of busy the blocks count again, so a step in
+    the noise itself is learned instead of locking the trigger on.
+    `bias_db` makes up for the minimum sitting below the mean noise power.
+    """
+
+    def __init__(self, rate, channels=1, block=0.05, span=5.0, sub=8, hold=10.0, bias_db=1.0):
+        self.block = max(1, int(block * rate))
+        self.sub_blocks = max(1, int(round(span / block / sub)))
+        self.max_busy = int(hold * rate)
+        self.bias = 10 ** (bias_db / 10)
+        self.acc = np.zeros(channels)
+        self.fill = 0               # samples in the partial block
+        self.busy_for = np.zeros(channels, dtype=np.int64)
+        self.cur = np.full(channels, np.inf)
+        self.count = 0              # blocks in the current sub-window
+        self.hist = np.full((sub, channels), np.inf)
+        self.pos = 0
+        self.lin = np.full(channels, np.inf)
+
+    def update(self, p, busy=False):
+        """Feed (channels, n) (or (n,) for one channel) linear power."""
+        p = np.atleast_2d(p)
+        n = p.shape[1]
+        busy = np.broadcast_to(busy, self.acc.shape)
+        self.busy_for = np.where(busy, self.busy_for + n, 0)
+        busy = busy & (self.busy_for <= self.max_busy)
+        need = self.block - self.fill
+        if n < need:
+            self.acc += p.sum(axis=1)
+            self.fill += n
+            return self.lin
+        m = (n - need) // self.block
+        means = np.empty((len(p), m + 1))
+        means[:, 0] = (self.acc + p[:, :need].sum(axis=1)) / self.block
+        means[:, 1:] = p[:, need:need + m * self.block].reshape(len(p), m, self.block).mean(axis=2)
+        tail = p[:, need + m * self.block:]
+        self.acc = tail.sum(axis=1)
+        self.fill = tail.shape[1]
+        # busy channels repeat their last minimum instead
+        means[busy] = (self.lin / self.bias)[busy, None]
+
+        for col in means.T:
+            np.minimum(self.cur, col, out=self.cur)
+            self.count += 1
+            if self.count == self.sub_blocks:
+                self.hist[self.pos] = self.cur
+                self.pos = (self.pos + 1) % len(self.hist)
+                self.cur = np.full_like(self.cur, np.inf)
+                self.count = 0
+        self.lin = np.minimum(self.hist.min(axis=0), self.cur) * self.bias
+        return self.lin
+
+    def db(self):
+        """Floor per channel in dB (NaN until a first block has been seen)."""
+        with np.errstate(divide="ignore"):
+            return np.where(np.isfinite(self.lin), 10 * np.log10(np.maximum(self.lin, 1e-12)), np.nan)
+
+
+class HysteresisTrigger:
+    """Sample-accurate burst detector on a linear power stream.
+
+    A burst starts on the first sample above on_db and ends on the first
+    sample of a run of `hold` samples below off_db. With floor_db (the
+    expected noise floor) the thresholds instead stay on_db - floor_db and
+    off_db - floor_db above a NoiseFloor tracked on the stream itself.
+    """
+
+    def __init__(self, rate, on_db=-20.0, off_db=-28.0, hold=0.1, floor_db=None):
+        self.rate = rate
+        self.hold = max(1, int(hold * rate))
+        self.set_thresholds(on_db, off_db)
+        self.active = False
+        self.quiet = 0          # quiet samples carried over from the last block
+        self.floor = None
+        if floor_db is not None:
+            self.floor = NoiseFloor(rate)
+            self.rise = on_db - floor_db
+            self.margin = off_db - floor_db
+
+    def reset(self):
+        """Forget a burst in progress (e.g. after a retune)."""
+        self.active = False
+        self.quiet = 0
+
+    def follow(self, floor_db):
+        """Move both thresholds along with a new floor estimate."""
+        if np.isfinite(floor_db):
+            self.set_thresholds(floor_db + self.rise, floor_db + self.margin)
+
+    def set_thresholds(self, on_db, off_db):
+        self.on_db = on_db
+        self.off_db = off_db
+        self.on_lin = 10 ** (on_db / 10)
+        self.off_lin = 10 ** (off_db / 10)
+
+    def process(self, x, base):
+        """Scan one block starting at absolute offset `base`, return events."""
+        events = []
+        n = len(x)
+        end = base + n
+        i = 0
+        while i < n:
+            if not self.active:
+                hits = np.flatnonzero(x[i:] > self.on_lin)
+                if not hits.size:
+                    break
+                i += hits[0]
+                self.active = True
+                self.quiet = 0
+                events.append(self._event("start", base + i, x[i], end))
+                i += 1
+            else:
+                loud = np.flatnonzero(x[i:] >= self.off_lin)
+                # quiet runs lie between loud samples; the first one continues
+                # the run carried over from the previous block
+                starts = np.concatenate(([-1 - self.quiet], loud))
+                stops = np.concatenate((loud, [n - i]))
+                runs = np.flatnonzero(stops - starts - 1 >= self.hold)
+                if not runs.size:
+                    self.quiet = (n - i - 1 - loud[-1]) if loud.size else self.quiet + n - i
+                    break
+                first_quiet = starts[runs[0]] + 1
+                level = x[i + first_quiet] if first_quiet >= 0 else x[i]
+                events.append(self._event("end", base + i + first_quiet, level, end))
+                self.active = False
+                self.quiet = 0
+                i += starts[runs[0]] + self.hold + 1
+        if self.floor is not None:
+            self.floor.update(x, busy=self.active or bool(events))
+            self.follow(self.floor.db()[0])
+        return events
+
+    def _event(self, kind, offset, level, end):
+        db = 10 * np.log10(max(float(level), 1e-12))
+        latency_ms = 1e3 * (end - offset) / self.rate
+        return BurstEvent(kind, int(offset), offset / self.rate, db, latency_ms)
+
+
+class MovingPower:
+    """Moving-average |x|^2 of several channels in one vectorized pass."""
+
+    def __init__(self, window, channels=1):
+        self.window = max(1, int(window))
+        self.tail = np.zeros((channels, self.window - 1))
+
+    def process(self, x):
+        """x is (channels, n) complex; returns (channels, n) float32 power."""
+        p = x.real.astype(np.float64) ** 2 + x.imag.astype(np.float64) ** 2
+        ext = np.concatenate((self.tail, p), axis=1)
+        cs = np.zeros((ext.shape[0], ext.shape[1] + 1))
+        np.cumsum(ext, axis=1, out=cs[:, 1:])
+        if self.window > 1:
+            self.tail = ext[:, -(self.window - 1):]
+        return ((cs[:, self.window:] - cs[:, :-self.window]) / self.window).astype(np.float32)
+
+
+class ZcrGate:
+    """Frame-wise zero-crossing rate + power with a live/dead audio decision.
+
+    A frame is "dead" when it is near silent or its ZCR is above what voice
+    produces (demodulated noise after the carrier drops). `hang` dead frames
+    in a row flip the state to dead, two live frames flip it back. Events
+    carry the offset of the first frame of the run, so a recording can be
+    cut exactly where the tail starts.
+    """
+
+    def __init__(self, rate, frame=0.01, static_hz=1000.0, silence_db=-40.0, hang=3):
+        self.rate = rate
+        self.frame = max(2, int(frame * rate))
+        self.zcr_limit = 2.0 * static_hz / rate     # crossings per sample
+        self.silence = 10 ** (silence_db / 10)
+        self.hang = hang
+        self.carry = np.zeros(self.frame, dtype=np.float32)
+        self.fill = 0
+        self.dead = True
+        self.run = 0
+        self.run_start = 0
+        self.zcr = 0.0
+        self.power = 0.0
+
+    def features(self, frames):
+        """ZCR (fraction of sign changes) and mean power per frame row."""
+        s = np.signbit(frames)
+        zcr = np.count_nonzero(s[:, 1:] != s[:, :-1], axis=1) / (self.frame - 1)
+        power = np.einsum("ij,ij->i", frames, frames) / self.frame
+        return zcr, power
+
+    def process(self, x, base):
+        """Feed one block starting at absolute offset `base`, return events."""
+        end = base + len(x)
+        events = []
+        first = base - self.fill
+        if self.fill:
+            need = self.frame - self.fill
+            if len(x) < need:
+                self.carry[self.fill:self.fill + len(x)] = x
+                self.fill += len(x)
+                return events
+            self.carry[self.fill:] = x[:need]
+            self._decide(self.carry[None, :], first, end, events)
+            x = x[need:]
+            first += self.frame
+        nfull = len(x) // self.frame
+        if nfull:
+            self._decide(x[:nfull * self.frame].reshape(nfull, self.frame), first, end, events)
+        rest = len(x) - nfull * self.frame
+        self.carry[:rest] = x[nfull * self.frame:]
+        self.fill = rest
+        return events
+
+    def _decide(self, frames, first, end, events):
+        zcr, power = self.features(frames)
+        dead = (power < self.silence) | (zcr > self.zcr_limit)
+        self.zcr = float(zcr[-1])
+        self.power = float(power[-1])
+        if not self.run and not np.any(dead != self.dead):
+            return      # steady state, nothing to walk through
+        for i, d in enumerate(dead):
+            if d == self.dead:
+                self.run = 0
+                continue
+            if not self.run:
+                self.run_start = first + i * self.frame
+            self.run += 1
+            if self.run >= (self.hang if d else 2):
+                self.dead = bool(d)
+                self.run = 0
+                db = 10 * np.log10(max(float(power[i]), 1e-12))
+                latency_ms = 1e3 * (end - self.run_start) / self.rate
+                events.append(BurstEvent("dead" if d else "live", int(self.run_start),
+                                         self.run_start / self.rate, db, latency_ms))
+
+
+def burst_stamp(t=None):
+    """<unix time>_<ms> for burst file names: two key-ups in one second get two files."""
+    ms = int(round(1e3 * (time.time() if t is None else t)))
+    return f"{ms // 1000}_{ms % 1000:03d}"
+
+
+class WavWriter:
+    """16-bit mono PCM WAV file that can be trimmed before it is closed."""
+
+    def __init__(self, path, rate):
+        self.path = path
+        self.rate = int(rate)
+        self.frames = 0
+        self.f = open(path, "wb")
+        self.f.write(self._header(0))
+
+    def _header(self, frames):
+        data = 2 * frames
+        return struct.pack("<4sI4s4sIHHIIHH4sI", b"RIFF", 36 + data, b"WAVE",
+                           b"fmt ", 16, 1, 1, self.rate, 2 * self.rate, 2, 16,
+                           b"data", data)
+
+    def write(self, x):
+        if not len(x):
+            return
+        pcm = (np.clip(x, -1.0, 1.0) * 32767).astype("<i2")
+        self.f.write(pcm.tobytes())
+        self.frames += len(x)
+
+    def truncate(self, frames):
+        """Drop everything after the first `frames` samples."""
+        frames = max(0, min(frames, self.frames))
+        if frames < self.frames:
+            self.f.seek(44 + 2 * frames)
+            self.f.truncate()
+            self.frames = frames
+
+    def close(self):
+        self.f.seek(0)
+        self.f.write(self._header(self.frames))
+        self.f.close()
+
+
+class SyntheticNFM:
+    """Deterministic NFM burst generator (no hardware needed).
+
+    Each period is `gap` seconds of noise followed by a `burst` second
+    transmission with a raised-cosine power ramp of `ramp` seconds, a
+    carrier offset of offset+cfo Hz and two-tone "voice" at `dev` Hz peak
+    deviation. Signal power is noise_db + snr_db (dBFS).
+    """
+
+    def __init__(self, samp_rate, offset=0.0, cfo=300.0, dev=2.5e3, ramp=0.02,
+                 burst=2.0, gap=3.0, snr_db=25.0, noise_db=-40.0, seed=0):
+        self.rate = samp_rate
+        self.freq = offset + cfo
+        self.dev = dev
+        self.ramp = max(1, int(ramp * samp_rate))
+        self.burst = int(burst * samp_rate)
+        self.gap = int(gap * samp_rate)
+        self.period = self.burst + self.gap
+        self.amp = 10 ** ((noise_db + snr_db) / 20)
+        self.noise_amp = 10 ** (noise_db / 20) / np.sqrt(2)
+        self.rng = np.random.default_rng(seed)
+        self.n = 0
+        self.phase = 0.0
+
+    def bursts(self, until):
+        """Ground-truth (start, end) sample offsets of bursts before `until`."""
+        return [(k + self.gap, k + self.period) for k in range(0, int(until), self.period)
+                if k + self.gap < until]
+
+    def fill(self, out):
+        """Write the next len(out) samples into `out` (complex64)."""
+        n = len(out)
+        idx = self.n + np.arange(n)
+        pos = idx % self.period - self.gap          # samples into the burst, <0 in the gap
+        on = pos >= 0
+
+        # raised-cosine up/down ramps on the envelope
+        env = on.astype(np.float32)
+        up = on & (pos < self.ramp)
+        env[up] = 0.5 - 0.5 * np.cos(np.pi * pos[up] / self.ramp)
+        down = on & (pos >= self.burst - self.ramp)
+        env[down] = 0.5 - 0.5 * np.cos(np.pi * (self.burst - pos[down]) / self.ramp)
+
+        t = idx / self.rate
+        audio = 0.6 * np.sin(2 * np.pi * 350 * t) + 0.4 * np.sin(2 * np.pi * 900 * t)
+        phase = self.phase + 2 * np.pi * np.cumsum(self.freq + self.dev * audio) / self.rate
+        self.phase = float(phase[-1] % (2 * np.pi)) if n else self.phase
+
+        noise = self.rng.standard_normal((2, n), dtype=np.float32) * self.noise_amp
+        out.real[:] = self.amp * env * np.cos(phase) + noise[0]
+        out.imag[:] = self.amp * env * np.sin(phase) + noise[1]
+        self.n += n
+
+
+class SpectrumRows:
+    """Averaged, quantized waterfall rows at a fixed row rate.
+
+    Only `avg` Hann-windowed FFTs are taken per row; the samples between
+    rows are skipped, so the cost depends on the row rate, not on the
+    sample rate. Rows are fftshifted dB (power per bin, full scale = 0 dB)
+    mapped onto 0..255 between lo_db and hi_db.
+    """
+
+    def __init__(self, samp_rate, nfft=1024, rows_per_sec=10.0, avg=8, lo_db=-120.0, hi_db=0.0):
+        self.nfft = nfft
+        self.avg = avg
+        self.lo_db = lo_db
+        self.hi_db = hi_db
+        self.stride = max(nfft * avg, int(samp_rate / rows_per_sec))
+        self.window = np.hanning(nfft).astype(np.float32)
+        self.scale = 1.0 / (self.window.sum() ** 2)
+        self.buf = np.empty(nfft * avg, dtype=np.complex64)
+        self.fill = 0
+        self.skip = 0
+
+    def process(self, x):
+        """Consume samples, return the list of finished uint8 rows."""
+        rows = []
+        i, n = 0, len(x)
+        while i < n:
+            if self.skip:
+                k = min(self.skip, n - i)
+                self.skip -= k
+                i += k
+                continue
+            k = min(len(self.buf) - self.fill, n - i)
+            self.buf[self.fill:self.fill + k] = x[i:i + k]
+            self.fill += k
+            i += k
+            if self.fill == len(self.buf):
+                rows.append(self.row())
+                self.fill = 0
+                self.skip = self.stride - len(self.buf)
+        return rows
+
+    def row(self):
+        seg = self.buf.reshape(self.avg, self.nfft) * self.window
+        power = (np.abs(np.fft.fft(seg, axis=1)) ** 2).mean(axis=0) * self.scale
+        db = 10 * np.log10(np.fft.fftshift(power) + 1e-20)
+        q = (db - self.lo_db) * (255.0 / (self.hi_db - self.lo_db))
+        return np.clip(q, 0, 255).astype(np.uint8)
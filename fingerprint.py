@@ -0,0 +1,324 @@
+# Burst fingerprint features (NumPy only, safe to import in worker processes).
+import os
+import re
+import glob
+import json
+import time
+import wave
+
+import numpy as np
+
+# bump whenever fingerprint() changes: 12-refingerprint.py redoes older bursts
+VERSION = 2
+TAG = re.compile(r"_ramp(?P<ramp>-?[\d.]+)_cfo(?P<cfo>-?[\d.]+)kHz_bw(?P<bw>-?[\d.]+)kHz")
+
+BASIC_FEATURES = ("ramp", "cfo", "bw")
+RF_FEATURES = (
+    "rise_ms", "ramp_shape", "overshoot_db",        # turn-on power envelope
+    "chirp_hz", "settle_ms",                        # oscillator settling
+    "dev_rms_khz", "dev_peak_khz",                  # deviation statistics
+    "ctcss_hz", "subaudible_db",                    # CTCSS tone / DCS energy
+    "iq_amp_db", "iq_phase_deg",                    # IQ imbalance
+)
+FEATURES = BASIC_FEATURES + RF_FEATURES
+
+CTCSS = np.array([
+    67.0, 69.3, 71.9, 74.4, 77.0, 79.7, 82.5, 85.4, 88.5, 91.5, 94.8, 97.4,
+    100.0, 103.5, 107.2, 110.9, 114.8, 118.8, 123.0, 127.3, 131.8, 136.5,
+    141.3, 146.2, 151.4, 156.7, 159.8, 162.2, 165.5, 167.9, 171.3, 173.8,
+    177.3, 179.9, 183.5, 186.2, 189.9, 192.8, 196.6, 199.5, 203.5, 206.5,
+    210.7, 218.1, 225.7, 229.1, 233.6, 241.8, 250.3, 254.1,
+])
+
+_windows = {}
+
+
+def _window(n):
+    """Hamming window, built once per segment size."""
+    w = _windows.get(n)
+    if w is None:
+        w = _windows[n] = np.hamming(n).astype(np.float32)
+    return w
+
+
+def welch_psd(iq, samp_rate, nperseg=4096, overlap=0.5, batch=16):
+    """Averaged periodogram (fftshifted freqs, power) in constant memory.
+
+    Segments are strided views into `iq`; only `batch` of them are
+    transformed at a time, so memory depends on nperseg, not burst length.
+    Resolution is samp_rate / nperseg.
+    """
+    nperseg = int(min(nperseg, len(iq)))
+    step = max(1, int(nperseg * (1 - overlap)))
+    segs = np.lib.stride_tricks.sliding_window_view(iq, nperseg)[::step]
+    win = _window(nperseg)
+    batch = max(1, min(batch, (1 << 20) // nperseg))
+    acc = np.zeros(nperseg)
+    for i in range(0, len(segs), batch):
+        spec = np.fft.fft(segs[i:i + batch] * win, axis=1)
+        acc += (spec.real ** 2 + spec.imag ** 2).sum(axis=0)
+    acc /= len(segs)
+    freqs = np.fft.fftshift(np.fft.fftfreq(nperseg, d=1 / samp_rate))
+    return freqs, np.fft.fftshift(acc)
+
+
+def cfo_bw(freqs, power):
+    """CFO and occupied bandwidth (kHz) from a PSD.
+
+    The CFO is the power centroid of the occupied band rather than the
+    strongest bin: for FM the tallest line is often a modulation sideband.
+    """
+    mask = np.flatnonzero(power > power.max() * 0.1)
+    if not mask.size:
+        return 0.0, 0.0
+    band = slice(mask[0], mask[-1] + 1)
+    cfo = np.sum(freqs[band] * power[band]) / np.sum(power[band]) / 1e3
+    bw = (freqs[mask[-1]] - freqs[mask[0]]) / 1e3
+    return cfo, bw
+
+
+def _smooth(x, n):
+    """Moving average (same length, causal) via one cumsum."""
+    n = max(1, int(n))
+    c = np.cumsum(np.concatenate((np.zeros(1), x)))
+    out = np.empty(len(x))
+    out[n:] = (c[n + 1:] - c[1:-n]) / n
+    out[:n] = c[1:n + 1] / np.arange(1, min(n, len(x)) + 1)
+    return out
+
+
+def _inst_freq(x, samp_rate):
+    """Instantaneous frequency (Hz) between consecutive samples."""
+    return np.angle(x[1:] * np.conj(x[:-1])) * (samp_rate / (2 * np.pi))
+
+
+def _crossing(e, level, start=0):
+    hit = np.flatnonzero(e[start:] >= level)
+    return start + int(hit[0]) if hit.size else None
+
+
+def rf_features(iq, samp_rate, trigger_at, onset=0.2, steady=1.0):
+    """Transmitter features from raw channel IQ around the trigger.
+
+    `iq` must include pre-trigger samples (trigger_at of them) so the
+    turn-on transient is intact. Only `onset` s after the trigger and
+    `steady` s of the settled carrier are processed, so the cost does not
+    grow with the burst length.
+    """
+    rate = samp_rate
+    t = int(trigger_at)
+    feats = dict.fromkeys(RF_FEATURES, 0.0)
+    feats.update(_steady_features(iq[t + int(onset * rate):t + int((onset + steady) * rate)], rate))
+
+    lo = max(0, t - int(0.05 * rate))
+    win = iq[lo:t + int(onset * rate)]
+    if len(win) < int(0.1 * rate) or t - lo < 16:
+        return feats
+
+    # power ramp: 10/50/90 % points between noise floor and carrier
+    p = _smooth(win.real.astype(np.float64) ** 2 + win.imag.astype(np.float64) ** 2, 0.0005 * rate)
+    floor = np.median(p[:t - lo])
+    top = np.median(p[-len(p) // 3:])
+    e = (p - floor) / max(top - floor, 1e-20)
+    i10 = _crossing(e, 0.1)
+    i50 = _crossing(e, 0.5, i10 or 0)
+    i90 = _crossing(e, 0.9, i50 or 0)
+    if i10 is None or i50 is None or i90 is None:
+        return feats
+    span = max(i90 - i10, 1)
+    feats["rise_ms"] = 1e3 * span / rate
+    feats["ramp_shape"] = (i50 - i10) / span
+    peak = e[i90:i90 + int(0.02 * rate)].max()
+    feats["overshoot_db"] = float(10 * np.log10(max(peak, 1.0)))
+
+    # frequency settling after turn-on; averaging over one CTCSS period
+    # nulls the tone, 5 ms is enough for voice
+    period = 1.0 / feats["ctcss_hz"] if feats["ctcss_hz"] else 0.005
+    f = _smooth(_inst_freq(win[i10:], rate), period * rate)
+    final = np.median(f[len(f) // 2:])
+    dev = np.abs(f - final)
+    tol = max(150.0, 3 * np.median(dev[len(f) // 2:]))
+    feats["chirp_hz"] = float(f[min(i50 - i10, len(f) - 1)] - final)
+    off = np.flatnonzero(dev > tol)
+    feats["settle_ms"] = float(1e3 * (off[-1] + 1) / rate) if off.size else 0.0
+    return feats
+
+
+def _steady_features(s, rate):
+    """Deviation, sub-audible tone and IQ balance of the settled carrier."""
+    if len(s) < int(0.1 * rate):
+        return {}
+    feats = {}
+    fs = _inst_freq(s, rate)
+    d = fs - fs.mean()
+    a = np.abs(d)
+    feats["dev_rms_khz"] = float(np.sqrt(np.mean(d * d)) / 1e3)
+    k = int(0.995 * (len(a) - 1))
+    feats["dev_peak_khz"] = float(np.partition(a, k)[k] / 1e3)
+
+    # block-average to ~8 kHz (above the voice band, so nothing aliases
+    # down), then look for a CTCSS line in 60-260 Hz
+    dec = max(1, int(rate // 8000))
+    m = len(d) // dec
+    sub = d[:m * dec].reshape(m, dec).mean(axis=1)
+    nfft = max(8192, 1 << int(np.ceil(np.log2(m))))
+    spec = np.abs(np.fft.rfft(sub * np.hanning(m), nfft)) ** 2
+    freqs = np.fft.rfftfreq(nfft, d=dec / rate)
+    band = np.flatnonzero((freqs >= 60) & (freqs <= 260))
+    voice = (freqs > 300) & (freqs < 3000)
+    low = spec[band].sum()
+    feats["subaudible_db"] = float(10 * np.log10(max(low, 1e-20) / max(low + spec[voice].sum(), 1e-20)))
+    feats["ctcss_hz"] = 0.0
+    k = band[np.argmax(spec[band])]
+    # a tone is one line holding most of the band (DCS / voice spread out)
+    if feats["subaudible_db"] > -40 and spec[k - 2:k + 3].sum() > 0.5 * low:
+        tone = float(freqs[k])
+        near = CTCSS[np.argmin(np.abs(CTCSS - tone))]
+        feats["ctcss_hz"] = float(near) if abs(near - tone) < 1.5 else tone
+
+    ii = np.mean(s.real.astype(np.float64) ** 2)
+    qq = np.mean(s.imag.astype(np.float64) ** 2)
+    iq_ = np.mean(s.real.astype(np.float64) * s.imag)
+    feats["iq_amp_db"] = float(10 * np.log10(ii / max(qq, 1e-20)))
+    feats["iq_phase_deg"] = float(np.degrees(np.arcsin(np.clip(2 * iq_ / max(ii + qq, 1e-20), -1, 1))))
+    return feats
+
+
+def fingerprint(iq, audio, samp_rate, audio_rate, nperseg=4096, trigger_at=None):
+    """Return ramp (s), CFO (kHz) and occupied bandwidth (kHz) of one burst.
+
+    `iq` is expected to be the narrowband channel IQ at samp_rate. When
+    trigger_at (the index of the trigger inside `iq`) is given, the
+    RF_FEATURES from rf_features() are added.
+    """
+    # Ramp from audio
+    mag = np.abs(audio)
+    thr = mag.max() * 0.2 if mag.size else 0.0
+    idx = np.where(mag > thr)[0]
+    ramp = idx[0] / audio_rate if idx.size else 0.0
+    if len(iq) < 16:
+        fp = {"ramp": float(ramp), "cfo": 0.0, "bw": 0.0}
+    else:
+        # CFO & BW from the averaged spectrum
+        freqs, power = welch_psd(iq, samp_rate, nperseg)
+        cfo, bw = cfo_bw(freqs, power)
+        fp = {"ramp": float(ramp), "cfo": float(cfo), "bw": float(bw)}
+    if trigger_at is not None:
+        fp.update(rf_features(iq, samp_rate, trigger_at))
+    return fp
+
+
+def tagged_name(wav_path, fp):
+    """Encode the fingerprint into the recording's file name (replacing an older tag)."""
+    head, name = os.path.split(wav_path)
+    return os.path.join(head, TAG.sub("", name).replace(
+        ".wav",
+        f"_ramp{fp['ramp']:.3f}_cfo{fp['cfo']:.1f}kHz_bw{fp['bw']:.1f}kHz.wav"
+    ))
+
+
+def sidecar_paths(wav_path):
+    """(raw complex64 IQ, JSON metadata) files kept next to a recording."""
+    base = wav_path[:-4] if wav_path.endswith(".wav") else wav_path
+    return base + ".iq.cf32", base + ".iq.json"
+
+
+def _write_json(path, obj):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(obj, f)
+    os.replace(tmp, path)
+
+
+def save_sidecar(wav_path, iq, samp_rate, audio_rate, trigger_at, freq=None, audio_trigger_at=0):
+    """Keep the burst's channel IQ so it can be fingerprinted again later.
+
+    audio_trigger_at is the WAV frame the trigger fired on (the recorders
+    keep a lookback in front of it). The .cf32 also replays with
+    --source file:PATH.
+    """
+    iq_path, meta_path = sidecar_paths(wav_path)
+    np.asarray(iq, dtype=np.complex64).tofile(iq_path)
+    _write_json(meta_path, {
+        "samp_rate": float(samp_rate), "audio_rate": float(audio_rate),
+        "trigger_at": int(trigger_at), "samples": int(len(iq)),
+        "audio_trigger_at": int(audio_trigger_at),
+        "time": time.time(), "freq": freq,
+    })
+
+
+def load_sidecar(wav_path):
+    """(memory-mapped IQ, metadata) saved for a recording, or None."""
+    iq_path, meta_path = sidecar_paths(wav_path)
+    if not os.path.exists(meta_path):
+        return None
+    with open(meta_path) as f:
+        meta = json.load(f)
+    n = os.path.getsize(iq_path) // 8
+    iq = np.memmap(iq_path, dtype=np.complex64, mode="r", shape=(n,)) if n else np.zeros(0, np.complex64)
+    return iq, meta
+
+
+def read_wav(path):
+    """(float32 audio, rate) of a 16-bit mono WAV written by dsp.WavWriter."""
+    with wave.open(path, "rb") as w:
+        rate, frames = w.getframerate(), w.getnframes()
+    if not frames:
+        return np.zeros(0, np.float32), rate
+    pcm = np.memmap(path, dtype="<i2", mode="r", offset=44, shape=(frames,))
+    return pcm.astype(np.float32) / 32767, rate
+
+
+def rename_tagged(wav_path, fp):
+    """Rename a recording (and its sidecars) to its tagged name.
+
+    The fingerprint and VERSION are stored in the sidecar metadata, so an
+    interrupted batch run knows what is already up to date. The sidecars
+    move first and the WAV last: until the WAV is renamed the burst still
+    counts as not done, and resume_renames() finishes the job.
+    """
+    new = tagged_name(wav_path, fp)
+    old_iq, old_meta = sidecar_paths(wav_path)
+    new_iq, new_meta = sidecar_paths(new)
+    if os.path.exists(old_meta):
+        with open(old_meta) as f:
+            meta = json.load(f)
+        meta.update(version=VERSION, features=fp)
+        _write_json(new_meta, meta)
+        if new != wav_path:
+            os.rename(old_iq, new_iq)
+            os.remove(old_meta)
+    if new != wav_path:
+        os.rename(wav_path, new)
+    return new
+
+
+def resume_renames(meta_paths):
+    """Finish rename_tagged() calls cut short; returns [(old WAV, new WAV, metadata)].
+
+    Such a burst has its stamped metadata under the tagged name while the
+    WAV (and maybe the .iq.cf32) still has the old one.
+    """
+    done = []
+    for meta_path in meta_paths:
+        base = meta_path[:-len(".iq.json")]
+        if os.path.exists(base + ".wav") or not os.path.exists(meta_path):
+            continue
+        with open(meta_path) as f:
+            meta = json.load(f)
+        if not meta.get("features"):
+            continue
+        head, stem = os.path.split(TAG.sub("", base))
+        olds = [p for p in glob.glob(os.path.join(glob.escape(head), glob.escape(stem) + "*.wav"))
+                if tagged_name(p, meta["features"]) == base + ".wav"]
+        if len(olds) != 1:
+            continue
+        old_iq, old_meta = sidecar_paths(olds[0])
+        new_iq, _ = sidecar_paths(base + ".wav")
+        if os.path.exists(old_iq) and not os.path.exists(new_iq):
+            os.rename(old_iq, new_iq)
+        if os.path.exists(old_meta):
+            os.remove(old_meta)
+        os.rename(olds[0], base + ".wav")
+        done.append((olds[0], base + ".wav", meta))
+    return done
@@ -0,0 +1,371 @@
+# Persistent burst fingerprint store with nearest-neighbour radio matching.
+#
+# Metadata (time, frequency, file, radio label) lives in SQLite; feature
+# vectors (fingerprint.FEATURES, NaN where a burst has no RF features)
+# live in a memory-mapped float32 array (row = burst id - 1) so the store
+# opens instantly and survives restarts. Queries run against an in-RAM
+# scaled copy, bucketed into a coarse grid on (ramp, cfo, bw) so a
+# nearest-neighbour search only measures the bursts in the cells around the
+# query instead of every stored one.
+import os
+import json
+import sqlite3
+import threading
+
+import numpy as np
+
+from fingerprint import TAG, FEATURES, BASIC_FEATURES, sidecar_paths
+from burst_archive import BurstArchive
+
+# one unit of distance per feature: how far two bursts of one radio may differ
+SCALE = {
+    "ramp": 0.005, "cfo": 0.1, "bw": 0.5,
+    "rise_ms": 0.5, "ramp_shape": 0.1, "overshoot_db": 0.5,
+    "chirp_hz": 200.0, "settle_ms": 2.0,
+    "dev_rms_khz": 0.2, "dev_peak_khz": 0.5,
+    "ctcss_hz": 1.0, "subaudible_db": 3.0,          # a different tone is far away
+    "iq_amp_db": 0.05, "iq_phase_deg": 0.3,
+}
+RADIOS = ("UV-32", "DM-32UV", "TD-H8", "RT-4D")
+
+
+def parse_tagged_name(path):
+    """Fingerprint dict back from a fingerprint.tagged_name() file name, or None."""
+    m = TAG.search(os.path.basename(path))
+    return {k: float(v) for k, v in m.groupdict().items()} if m else None
+
+
+def recorded_fingerprint(path, archives=None):
+    """Fingerprint kept with a stored burst, or None.
+
+    path is a WAV (its .iq.json sidecar, else its tagged name) or an
+    "<archive dir>#<id>" burst of a burst_archive; `archives` caches the
+    opened archives between calls.
+    """
+    if "#" in path:
+        where, burst_id = path.rsplit("#", 1)
+        archives = {} if archives is None else archives
+        try:
+            if where not in archives:
+                archives[where] = BurstArchive(where)
+            fp = archives[where].features_of(int(burst_id))
+        except (OSError, ValueError, IndexError):
+            return None
+        return {k: v for k, v in fp.items() if not np.isnan(v)} or None
+    _, meta_path = sidecar_paths(path)
+    if os.path.exists(meta_path):
+        with open(meta_path) as f:
+            fp = json.load(f).get("features")
+        if fp:
+            return fp
+    return parse_tagged_name(path)
+
+
+class GridIndex:
+    """Rows of a scaled feature matrix bucketed by their first `dims` coordinates.
+
+    Rows are sorted by grid cell (`cell` units on a side), so the cells of
+    a box around a query are a few contiguous runs of that order.
+    rows(q, radius) returns every row that may lie within radius of q: those
+    of the cells the box covers, plus the rows added since the last sort
+    (the tail), which are sorted in once there are `tail` of them.
+    """
+
+    BITS = 21           # per coordinate of the packed cell key
+    MAX_RUNS = 4096     # a box needing more runs than this scans everything
+
+    def __init__(self, dims, cell=0.1, tail=4096):
+        self.dims, self.cell, self.tail = dims, cell, tail
+        self.n = 0              # rows sorted into cells
+        self.stale = False      # a sorted row changed
+        self.order = np.empty(0, dtype=np.int64)
+        self.keys = np.empty(0, dtype=np.int64)
+
+    def _coords(self, x):
+        c = np.floor(np.asarray(x, dtype=np.float64) / self.cell) + (1 << (self.BITS - 1))
+        return np.clip(np.nan_to_num(c), 0, (1 << self.BITS) - 1).astype(np.int64)
+
+    def sync(self, z, n):
+        if self.stale or n - self.n > self.tail or n < self.n:
+            self.rebuild(z, n)
+
+    def rebuild(self, z, n):
+        c = self._coords(z[:n, :self.dims])
+        keys = np.zeros(n, dtype=np.int64)
+        for j in range(self.dims):
+            keys = (keys << self.BITS) | c[:, j]
+        self.order = np.argsort(keys, kind="stable")
+        self.keys = keys[self.order]
+        self.n, self.stale = n, False
+
+    def rows(self, q, radius, n):
+        p = q[:self.dims]
+        lo, hi = self._coords(p - radius), self._coords(p + radius)
+        if np.prod(hi[:-1] - lo[:-1] + 1) > self.MAX_RUNS:
+            return np.arange(n)
+        # one run of keys per cell column along the last coordinate
+        base = np.zeros(1, dtype=np.int64)
+        for j in range(self.dims - 1):
+            base = ((base[:, None] << self.BITS) | np.arange(lo[j], hi[j] + 1)).ravel()
+        base <<= self.BITS
+        a = np.searchsorted(self.keys, base | lo[-1])
+        b = np.searchsorted(self.keys, base | hi[-1], side="right")
+        counts = b - a
+        at = np.repeat(a - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+        return np.concatenate([self.order[at], np.arange(self.n, n)])
+
+
+class FingerprintDB:
+    """SQLite metadata + memmapped feature vectors, safe to share between threads.
+
+    Bursts (or queries) without the RF features, e.g. imported from tagged
+    file names, are compared on ramp/cfo/bw only. A store written with
+    other features refuses to open unless migrate=True, which re-lays the
+    vectors out and fills the new features in from what each burst kept
+    (sidecar, archive index or file name).
+    """
+
+    def __init__(self, path, features=FEATURES, scale=None, capacity=1 << 16, migrate=False):
+        os.makedirs(path, exist_ok=True)
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(os.path.join(path, "bursts.sqlite"), check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self.db.execute("CREATE TABLE IF NOT EXISTS bursts ("
+                        "id INTEGER PRIMARY KEY, time REAL, freq REAL, path TEXT, radio TEXT)")
+        self.db.execute("CREATE INDEX IF NOT EXISTS bursts_radio ON bursts (radio)")
+        self.db.execute("CREATE INDEX IF NOT EXISTS bursts_time ON bursts (time)")
+
+        self.features = tuple(features)
+        self.scale = np.array([(scale or SCALE).get(f, 1.0) for f in self.features], dtype=np.float32)
+        self.basic = np.array([f in BASIC_FEATURES for f in self.features])
+        self.n = self.db.execute("SELECT COALESCE(MAX(id), 0) FROM bursts").fetchone()[0]
+        self.vec_path = os.path.join(path, "features.f32")
+
+        stored = self.db.execute("SELECT value FROM meta WHERE key = 'features'").fetchone()
+        self.migrated = 0
+        if stored and tuple(json.loads(stored[0])) != self.features:
+            if not migrate:
+                raise ValueError(f"{path} holds features {json.loads(stored[0])}, not {list(self.features)}"
+                                 f" (11-fingerprint_db.py migrate converts it)")
+            self.migrated = self._migrate(tuple(json.loads(stored[0])))
+        self.db.execute("INSERT OR REPLACE INTO meta VALUES ('features', ?)", (json.dumps(list(self.features)),))
+        self.db.commit()
+
+        # persistent vectors
+        self.capacity = max(capacity, self.n)
+        self._map(self.capacity)
+
+        # in-RAM scaled copy (NaN as 0) + squared norms, of all and of the basic features
+        self.z = np.empty((self.capacity, len(self.features)), dtype=np.float32)
+        self.zz = np.empty(self.capacity, dtype=np.float32)
+        self.zzb = np.empty(self.capacity, dtype=np.float32)
+        self.full = np.empty(self.capacity, dtype=np.float32)   # 1.0: has every feature
+        self._scale_rows(slice(0, self.n), self.vec[:self.n])
+        # the grid uses the leading basic features
+        self.index = GridIndex(max(1, int(np.argmin(np.r_[self.basic, False]))))
+
+        # labelled subset used for identification, with its own copy of the rows
+        self.names = list(RADIOS)
+        self.label_ids = np.empty(0, dtype=np.int64)
+        self._reload_labels()
+
+    def _migrate(self, old):
+        """Re-lay features.f32 out from `old` features to ours; returns the bursts filled in."""
+        n = self.n
+        vec = np.full((n, len(self.features)), np.nan, dtype=np.float32)
+        if os.path.exists(self.vec_path):
+            was = np.fromfile(self.vec_path, dtype=np.float32, count=n * len(old))
+            was = np.pad(was, (0, n * len(old) - len(was)), constant_values=np.nan).reshape(n, len(old))
+            for j, f in enumerate(self.features):
+                if f in old:
+                    vec[:, j] = was[:, old.index(f)]
+        filled, archives = 0, {}
+        for burst_id, path in self.db.execute("SELECT id, path FROM bursts").fetchall():
+            fp = recorded_fingerprint(path or "", archives)
+            if fp and any(f in fp for f in self.features if f not in old):
+                vec[burst_id - 1] = [fp.get(f, v) for f, v in zip(self.features, vec[burst_id - 1])]
+                filled += 1
+        tmp = self.vec_path + ".tmp"
+        vec.tofile(tmp)
+        os.replace(tmp, self.vec_path)
+        return filled
+
+    def _map(self, rows):
+        size = rows * len(self.features) * 4
+        if not os.path.exists(self.vec_path) or os.path.getsize(self.vec_path) < size:
+            with open(self.vec_path, "ab") as f:
+                f.truncate(size)
+        self.vec = np.memmap(self.vec_path, dtype=np.float32, mode="r+", shape=(rows, len(self.features)))
+
+    def _grow(self):
+        self.vec.flush()
+        self.capacity *= 2
+        self._map(self.capacity)
+        for name in ("z", "zz", "zzb", "full"):
+            old = getattr(self, name)
+            new = np.empty((self.capacity,) + old.shape[1:], dtype=np.float32)
+            new[:self.n] = old[:self.n]
+            setattr(self, name, new)
+
+    def _scale_rows(self, rows, v):
+        z = np.asarray(v, dtype=np.float32) / self.scale
+        self.full[rows] = ~np.isnan(z).any(axis=-1)
+        z = np.nan_to_num(z, nan=0.0)
+        self.z[rows] = z
+        self.zz[rows] = (z ** 2).sum(axis=-1)
+        self.zzb[rows] = (z[..., self.basic] ** 2).sum(axis=-1)
+
+    def _reload_labels(self):
+        rows = self.db.execute("SELECT id, radio FROM bursts WHERE radio IS NOT NULL ORDER BY id").fetchall()
+        for _, radio in rows:
+            if radio not in self.names:
+                self.names.append(radio)
+        self.label_ids = np.array([i for i, _ in rows], dtype=np.int64)
+        self.label_of = np.array([self.names.index(r) for _, r in rows], dtype=np.int32)
+        at = self.label_ids - 1
+        self.label_rows = self.z[at], self.zz[at], self.zzb[at], self.full[at]
+
+    def vector(self, fp):
+        """Raw feature vector; the RF features may be missing (NaN), ramp/cfo/bw not."""
+        return np.array([fp[f] if f in BASIC_FEATURES else fp.get(f, np.nan) for f in self.features],
+                        dtype=np.float32)
+
+    def _query(self, fp):
+        """(scaled query with NaN as 0, its squared norm over the basic and the other features, full)."""
+        q = self.vector(fp) / self.scale
+        full = not np.isnan(q).any()
+        q = np.nan_to_num(q, nan=0.0)
+        qqb = float(q[self.basic] @ q[self.basic])
+        return q, qqb, float(q @ q) - qqb, full
+
+    @staticmethod
+    def _dist(query, z, zz, zzb, full):
+        """Squared scaled distances from rows (z, zz, zzb, full) to a _query().
+
+        Missing features are 0 in z, so z @ q only sums what both have;
+        a pair where either side lacks the RF features counts ramp/cfo/bw only.
+        """
+        q, qqb, qqr, q_full = query
+        if q_full:
+            return zz - 2 * (z @ q) + qqb + full * qqr
+        return zzb - 2 * (z @ q) + qqb
+
+    def add(self, fp, time, freq, path, radio=None):
+        """Store one burst, returns its id."""
+        v = self.vector(fp)
+        with self.lock:
+            cur = self.db.execute("INSERT INTO bursts (time, freq, path, radio) VALUES (?, ?, ?, ?)",
+                                  (time, freq, path, radio))
+            self.db.commit()
+            burst_id = cur.lastrowid
+            if burst_id > self.capacity:
+                self._grow()
+            row = burst_id - 1
+            self.vec[row] = v
+            self._scale_rows(row, v)
+            self.n = max(self.n, burst_id)
+            if radio:
+                self._reload_labels()
+        return burst_id
+
+    def update(self, burst_id, fp, path=None):
+        """Replace a stored burst's features (and file path, if it moved)."""
+        v = self.vector(fp)
+        with self.lock:
+            if path is not None:
+                self.db.execute("UPDATE bursts SET path = ? WHERE id = ?", (path, burst_id))
+                self.db.commit()
+            row = burst_id - 1
+            self.vec[row] = v
+            self._scale_rows(row, v)
+            # it may have moved to another cell
+            self.index.stale |= row < self.index.n
+            at = np.searchsorted(self.label_ids, burst_id)
+            if at < len(self.label_ids) and self.label_ids[at] == burst_id:
+                for mine, rows in zip(self.label_rows, (self.z, self.zz, self.zzb, self.full)):
+                    mine[at] = rows[row]
+
+    def label(self, burst_id, radio):
+        """Mark a burst as coming from `radio` (None clears the label)."""
+        with self.lock:
+            self.db.execute("UPDATE bursts SET radio = ? WHERE id = ?", (radio, burst_id))
+            self.db.commit()
+            self._reload_labels()
+
+    def find(self, path):
+        """Burst id stored for a file path (or None)."""
+        with self.lock:
+            row = self.db.execute("SELECT id FROM bursts WHERE path = ?", (path,)).fetchone()
+        return row[0] if row else None
+
+    @staticmethod
+    def _best(d, k):
+        """Positions of the k smallest squared distances in d, closest first."""
+        k = min(k, len(d))
+        idx = np.argpartition(d, k - 1)[:k] if k < len(d) else np.arange(len(d))
+        return idx[np.argsort(d[idx])]
+
+    def _nearest(self, query, k):
+        """Rows of the k stored bursts nearest to a _query(), with their squared distances.
+
+        Exact: searches the grid cells within a radius that doubles until
+        the k-th hit lies inside it (every burst that could beat it then
+        has been measured; the grid features count in every distance).
+        """
+        self.index.sync(self.z, self.n)
+        radius = self.index.cell
+        while True:
+            rows = self.index.rows(query[0], radius, self.n)
+            if 16 * len(rows) > self.n or len(rows) == self.n:
+                break           # cheaper to measure everything than to gather most of it
+            if len(rows) >= k:
+                d = self._dist(query, self.z[rows], self.zz[rows], self.zzb[rows], self.full[rows])
+                idx = self._best(d, k)
+                if d[idx[-1]] <= radius * radius:
+                    return rows[idx], d[idx]
+            radius *= 2
+        n = self.n
+        d = self._dist(query, self.z[:n], self.zz[:n], self.zzb[:n], self.full[:n])
+        idx = self._best(d, k)
+        return idx, d[idx]
+
+    def nearest(self, fp, k=5):
+        """k nearest stored bursts: [(id, distance, path, radio)]."""
+        query = self._query(fp)
+        with self.lock:
+            rows, d = self._nearest(query, k)
+            found = dict((i, (path, radio)) for i, path, radio in self.db.execute(
+                f"SELECT id, path, radio FROM bursts WHERE id IN ({','.join('?' * len(rows))})",
+                [int(r) + 1 for r in rows]))
+        return [(int(r) + 1, float(np.sqrt(max(x, 0))), *found[int(r) + 1]) for r, x in zip(rows, d)]
+
+    def identify(self, fp, k=5, max_dist=3.0):
+        """(radio, distance) by distance-weighted vote of the k nearest labelled bursts.
+
+        radio is None when nothing labelled lies within max_dist.
+        """
+        query = self._query(fp)
+        with self.lock:
+            d = self._dist(query, *self.label_rows)
+            idx = self._best(d, k)
+            labels = self.label_of[idx]
+        dist = np.sqrt(np.maximum(d[idx], 0))
+        keep = dist <= max_dist
+        if not keep.any():
+            return None, float(dist[0]) if dist.size else float("inf")
+        votes = np.bincount(labels[keep], weights=1.0 / (dist[keep] + 1e-3), minlength=len(self.names))
+        best = int(np.argmax(votes))
+        return self.names[best], float(dist[keep][labels[keep] == best].min())
+
+    def stats(self):
+        with self.lock:
+            counts = dict(self.db.execute(
+                "SELECT radio, COUNT(*) FROM bursts WHERE radio IS NOT NULL GROUP BY radio"))
+        return {"bursts": self.n, "labelled": int(len(self.label_ids)), "radios": counts}
+
+    def close(self):
+        with self.lock:
+            self.vec.flush()
+            self.db.close()
@@ -0,0 +1,309 @@
+# Fixed-size process pool for burst fingerprinting.
+#
+# Bursts are copied once into preallocated shared-memory slots; workers get
+# only (slot, length) over their task pipe, never pickled sample arrays.
+# Each worker has pipes of its own, so one that dies (OOM, a crash in
+# numpy) takes no shared queue lock with it: the collector sees its
+# sentinel, fails its job, frees the slot and starts a replacement.
+import os
+import time
+import threading
+import multiprocessing as mp
+from collections import deque
+from multiprocessing import shared_memory
+from multiprocessing.connection import wait
+
+import numpy as np
+
+from fingerprint import fingerprint
+
+POLICIES = ("block", "drop", "latest")
+
+
+def _slot_views(buf, max_iq, n_iq, n_audio):
+    iq = np.ndarray((n_iq,), dtype=np.complex64, buffer=buf)
+    audio = np.ndarray((n_audio,), dtype=np.float32, buffer=buf, offset=max_iq * 8)
+    return iq, audio
+
+
+def _worker(names, max_iq, tasks, results, cpus=None):
+    if cpus and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, set(cpus))
+    shms = []
+    for name in names:
+        # spawned children share the parent's resource tracker, which
+        # unlinks the segments when the parent closes the pool
+        shms.append(shared_memory.SharedMemory(name=name))
+
+    while True:
+        try:
+            job = tasks.recv()
+        except EOFError:
+            break
+        if job is None:
+            break
+        job_id, slot, n_iq, n_audio, samp_rate, audio_rate, trigger_at = job
+        t0 = time.time()
+        try:
+            iq, audio = _slot_views(shms[slot].buf, max_iq, n_iq, n_audio)
+            fp = fingerprint(iq, audio, samp_rate, audio_rate, trigger_at=trigger_at)
+            del iq, audio
+            results.send((job_id, fp, None, time.time() - t0))
+        except Exception as e:
+            results.send((job_id, None, repr(e), time.time() - t0))
+
+    for shm in shms:
+        shm.close()
+
+
+class FingerprintPool:
+    """Bounded fingerprint job queue in front of N worker processes.
+
+    policy decides what happens when `depth` jobs are already waiting:
+      "block"  - submit() waits (back-pressure), up to its timeout
+      "drop"   - the new burst is rejected
+      "latest" - the oldest waiting burst is discarded for the new one
+    on_result(key, fingerprint, error) runs on the pool's collector thread;
+    a burst whose worker died gets an error too, and a new worker starts.
+    With `cpus` the workers only run on those cores.
+    """
+
+    def __init__(self, max_iq, max_audio, workers=2, depth=4, policy="latest", on_result=None, cpus=None):
+        if policy not in POLICIES:
+            raise ValueError(f"policy must be one of {POLICIES}")
+        self.max_iq = int(max_iq)
+        self.max_audio = int(max_audio)
+        self.workers = workers
+        self.depth = depth
+        self.policy = policy
+        self.on_result = on_result
+
+        # every queued or running job owns a slot, so this never runs dry
+        size = self.max_iq * 8 + self.max_audio * 4
+        self.shms = [shared_memory.SharedMemory(create=True, size=size)
+                     for _ in range(depth + workers)]
+        self.free = list(range(len(self.shms)))
+
+        self.cond = threading.Condition()
+        self.pending = deque()
+        self.reserved = 0                   # slots taken by submit() but not queued yet
+        self.jobs = {}
+        self.inflight = 0
+        self.next_id = 0
+        self.closed = False
+
+        # stats
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.dropped = 0
+        self.restarts = 0
+        self.max_depth = 0
+        self.latency = deque(maxlen=256)    # submit -> result, seconds
+        self.compute = deque(maxlen=256)    # time inside the worker
+
+        self.ctx = mp.get_context("spawn")  # never fork a running flowgraph
+        self.names = [shm.name for shm in self.shms]
+        self.cpus = cpus
+        self.procs = [None] * workers
+        self.tasks = [None] * workers
+        self.results = [None] * workers
+        self.busy = [None] * workers        # job id each worker is on
+        for i in range(workers):
+            self._spawn(i)
+        self.wake, self.waker = self.ctx.Pipe(duplex=False)
+
+        self.dispatcher = threading.Thread(target=self._dispatch, daemon=True)
+        self.collector = threading.Thread(target=self._collect, daemon=True)
+        self.dispatcher.start()
+        self.collector.start()
+
+    def submit(self, key, iq, audio, samp_rate, audio_rate, timeout=None, trigger_at=None):
+        """Queue one burst; returns False if it was dropped.
+
+        trigger_at (index of the trigger in `iq`) enables the RF features.
+        """
+        with self.cond:
+            if self.closed:
+                return False
+            if len(self.pending) + self.reserved >= self.depth:
+                if self.policy == "drop":
+                    self.dropped += 1
+                    return False
+                if self.policy == "latest" and self.pending:
+                    old = self.pending.popleft()
+                    self.free.append(self.jobs.pop(old)[0])
+                    self.dropped += 1
+                # nothing queued to replace (other submitters hold the slots): wait for them
+                elif not self.cond.wait_for(
+                        lambda: len(self.pending) + self.reserved < self.depth or self.closed, timeout):
+                    self.dropped += 1
+                    return False
+                if self.closed:
+                    return False
+            slot = self.free.pop()
+            self.reserved += 1
+
+        # one copy, straight into shared memory, outside the lock
+        n_iq = min(len(iq), self.max_iq)
+        n_audio = min(len(audio), self.max_audio)
+        dst_iq, dst_audio = _slot_views(self.shms[slot].buf, self.max_iq, n_iq, n_audio)
+        dst_iq[:] = iq[:n_iq]
+        dst_audio[:] = audio[:n_audio]
+        del dst_iq, dst_audio
+
+        with self.cond:
+            job_id = self.next_id
+            self.next_id += 1
+            self.jobs[job_id] = (slot, n_iq, n_audio, samp_rate, audio_rate, trigger_at, key, time.time())
+            self.pending.append(job_id)
+            self.reserved -= 1
+            self.submitted += 1
+            self.max_depth = max(self.max_depth, len(self.pending))
+            self.cond.notify_all()
+        return True
+
+    def _spawn(self, i):
+        tasks, self.tasks[i] = self.ctx.Pipe(duplex=False)
+        self.results[i], results = self.ctx.Pipe(duplex=False)
+        self.procs[i] = self.ctx.Process(target=_worker, args=(self.names, self.max_iq, tasks, results, self.cpus),
+                                         daemon=True)
+        self.procs[i].start()
+        tasks.close()                       # the worker has its own ends now
+        results.close()
+
+    def _dispatch(self):
+        while True:
+            with self.cond:
+                self.cond.wait_for(lambda: self.closed or (
+                    self.pending and self.inflight < self.workers and None in self.busy))
+                if self.closed:
+                    return
+                job_id = self.pending.popleft()
+                i = self.busy.index(None)
+                self.busy[i] = job_id
+                self.inflight += 1
+                try:
+                    # one small tuple per idle worker: never blocks
+                    self.tasks[i].send((job_id,) + self.jobs[job_id][:6])
+                except OSError:
+                    pass                    # the worker just died; the collector fails the job
+                self.cond.notify_all()
+
+    def _finish(self, job_id, fp, err, compute=None):
+        with self.cond:
+            slot, _, _, _, _, _, key, t_submit = self.jobs.pop(job_id)
+            self.free.append(slot)
+            self.latency.append(time.time() - t_submit)
+            if compute is not None:
+                self.compute.append(compute)
+            if err:
+                self.failed += 1
+            else:
+                self.completed += 1
+            self.cond.notify_all()
+        if self.on_result:
+            self.on_result(key, fp, err)
+
+    def _receive(self, i):
+        """Handle what worker i has sent; False once its pipe is closed."""
+        try:
+            while self.results[i].poll():
+                job_id, fp, err, compute = self.results[i].recv()
+                with self.cond:
+                    self.busy[i] = None
+                    self.inflight -= 1
+                self._finish(job_id, fp, err, compute)
+        except (EOFError, OSError):
+            return False
+        return True
+
+    def _reap(self, i):
+        """Worker i exited: fail its job and start a replacement. False after close()."""
+        self._receive(i)                    # whatever it sent before it went
+        p = self.procs[i]
+        p.join(timeout=1)
+        with self.cond:
+            if self.closed:
+                return False                # close() counts what was left running
+            job_id, self.busy[i] = self.busy[i], False      # no jobs until the replacement is up
+            if job_id is not None:
+                self.inflight -= 1
+            self.restarts += 1
+        self.tasks[i].close()
+        self.results[i].close()
+        self._spawn(i)
+        with self.cond:
+            self.busy[i] = None
+            self.cond.notify_all()
+        print(f"⚠️ Fingerprint worker died (exit code {p.exitcode}), started a new one", flush=True)
+        if job_id is not None:
+            self._finish(job_id, None, f"worker died (exit code {p.exitcode})")
+        return True
+
+    def _collect(self):
+        gone = set()                        # workers that exited after close()
+        while True:
+            live = [i for i in range(len(self.procs)) if i not in gone]
+            ready = wait([self.results[i] for i in live] + [self.procs[i].sentinel for i in live] + [self.wake])
+            for i in live:
+                died = self.procs[i].sentinel in ready
+                if self.results[i] in ready and not self._receive(i):
+                    died = True
+                if died and not self._reap(i):
+                    gone.add(i)
+            if self.wake in ready:
+                return
+
+    def stats(self):
+        """Queue depth, drop counts and latency figures (ms)."""
+        with self.cond:
+            lat = np.array(self.latency) * 1e3
+            comp = np.array(self.compute) * 1e3
+            return {
+                "queued": len(self.pending),
+                "inflight": self.inflight,
+                "max_queued": self.max_depth,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "dropped": self.dropped,
+                "restarts": self.restarts,
+                "latency_ms_mean": float(lat.mean()) if lat.size else 0.0,
+                "latency_ms_p95": float(np.percentile(lat, 95)) if lat.size else 0.0,
+                "latency_ms_max": float(lat.max()) if lat.size else 0.0,
+                "compute_ms_mean": float(comp.mean()) if comp.size else 0.0,
+            }
+
+    def close(self, drain=0.0):
+        """Stop the workers; with `drain` seconds, queued bursts get that long to finish.
+
+        Returns the number of bursts discarded unfinished (also printed).
+        """
+        with self.cond:
+            if drain:
+                self.cond.wait_for(lambda: not self.pending and not self.inflight, drain)
+            self.closed = True
+            discarded = len(self.pending)
+            self.pending.clear()
+            self.cond.notify_all()
+            for conn in self.tasks:
+                try:
+                    conn.send(None)
+                except OSError:
+                    pass
+        for p in self.procs:
+            p.join(timeout=2)
+            if p.is_alive():
+                p.terminate()
+        self.waker.send(None)
+        self.collector.join(timeout=2)
+        for conn in self.tasks + self.results + [self.wake, self.waker]:
+            conn.close()
+        discarded += self.inflight          # workers that had to be terminated
+        if discarded:
+            print(f"⚠️ Fingerprint pool closed with {discarded} bursts unfinished", flush=True)
+        for shm in self.shms:
+            shm.close()
+            shm.unlink()
+        return discarded
@@ -0,0 +1,243 @@
+# Native reader for the Heimdall DAQ IQ server (KrakenSDR, port 5000).
+#
+# Wire protocol (eth interface): after connecting the client sends
+# "streaming" once, then "IQDownload" per frame; the server answers with a
+# 1024-byte IQ header (iq_header.h, native C alignment) followed by
+# cpi_length samples per active channel, channel after channel, as
+# complex64 for data_type 1. Dummy frames carry no payload.
+#
+# Frames are received with recv_into() into preallocated buffers and
+# exposed as NumPy views, so a 5 x 2.4 MS/s stream allocates nothing per
+# frame. A view stays valid for `buffers - 1` further read() calls.
+import time
+import socket
+import threading
+from collections import namedtuple
+
+import numpy as np
+
+HEADER_SIZE = 1024
+SYNC_WORD = 0x2BF7B95A
+FRAME_DATA, FRAME_DUMMY, FRAME_RAMP, FRAME_CAL, FRAME_TRIGW = range(5)
+
+HEADER_DTYPE = np.dtype([
+    ("sync_word", "<u4"),
+    ("frame_type", "<u4"),
+    ("hardware_id", "S16"),
+    ("unit_id", "<u4"),
+    ("active_ant_chs", "<u4"),
+    ("ioo_type", "<u4"),
+    ("rf_center_freq", "<u8"),
+    ("adc_sampling_freq", "<u8"),
+    ("sampling_freq", "<u8"),
+    ("cpi_length", "<u4"),
+    ("time_stamp", "<u8"),
+    ("daq_block_index", "<u4"),
+    ("cpi_index", "<u4"),
+    ("ext_integration_cntr", "<u8"),
+    ("data_type", "<u4"),
+    ("sample_bit_depth", "<u4"),
+    ("adc_overdrive_flags", "<u4"),
+    ("if_gains", "<u4", 32),
+    ("delay_sync_flag", "<u4"),
+    ("iq_sync_flag", "<u4"),
+    ("sync_state", "<u4"),
+    ("noise_source_state", "<u4"),
+    ("reserved", "<u4", 192),
+    ("header_version", "<u4"),
+], align=True)
+assert HEADER_DTYPE.itemsize == HEADER_SIZE
+
+# header is a zero-copy record over the receive buffer; iq is (channels, cpi_length)
+Frame = namedtuple("Frame", "header iq")
+
+
+class HeimdallReader:
+    """Blocking frame reader with sequence tracking and automatic reconnect."""
+
+    def __init__(self, host="127.0.0.1", port=5000, max_channels=5, max_cpi=1 << 20,
+                 buffers=2, retry=1.0, timeout=5.0):
+        self.addr = (host, port)
+        self.retry = retry
+        self.timeout = timeout
+        self.sock = None
+        self.header_buf = bytearray(HEADER_SIZE)
+        self.header = np.frombuffer(self.header_buf, dtype=HEADER_DTYPE, count=1)[0]
+        self.payloads = [bytearray(max_channels * max_cpi * 8) for _ in range(buffers)]
+        self.turn = 0
+
+        # stats
+        self.frames = 0
+        self.dummies = 0
+        self.bytes = 0
+        self.gaps = 0               # times daq_block_index skipped ahead
+        self.dropped = 0            # frames missing in those gaps
+        self.sync_errors = 0
+        self.reconnects = 0
+        self.last_index = None
+
+    def connect(self):
+        """(Re)connect until the DAQ answers."""
+        while True:
+            try:
+                self.sock = socket.create_connection(self.addr, timeout=self.timeout)
+                self.sock.sendall(b"streaming")
+                self.last_index = None
+                return
+            except OSError:
+                self.sock = None
+                time.sleep(self.retry)
+
+    def close(self):
+        if self.sock:
+            try:
+                self.sock.close()
+            except OSError:
+                pass
+        self.sock = None
+
+    def _recv_exact(self, view):
+        got = 0
+        while got < len(view):
+            n = self.sock.recv_into(view[got:])
+            if not n:
+                raise ConnectionError("Heimdall IQ server closed the connection")
+            got += n
+        self.bytes += got
+
+    def _fetch(self):
+        """One request/response round trip; returns the payload view."""
+        self.sock.sendall(b"IQDownload")
+        self._recv_exact(memoryview(self.header_buf))
+        if self.header["sync_word"] != SYNC_WORD:
+            self.sync_errors += 1
+            raise ConnectionError("lost frame sync")
+        h = self.header
+        nbytes = int(h["cpi_length"]) * int(h["active_ant_chs"]) * int(h["sample_bit_depth"]) // 4
+        if h["frame_type"] == FRAME_DUMMY:
+            nbytes = 0
+        buf = self.payloads[self.turn]
+        if nbytes > len(buf):
+            # larger CPI than configured: grow once, never per frame
+            buf = self.payloads[self.turn] = bytearray(nbytes)
+        view = memoryview(buf)[:nbytes]
+        self._recv_exact(view)
+        return buf, nbytes
+
+    def read(self):
+        """Next data frame as zero-copy views; dummy frames are skipped."""
+        while True:
+            if self.sock is None:
+                self.connect()
+            try:
+                buf, nbytes = self._fetch()
+            except OSError:
+                self.close()
+                self.reconnects += 1
+                continue
+
+            h = self.header
+            idx = int(h["daq_block_index"])
+            if self.last_index is not None and idx > self.last_index + 1:
+                self.gaps += 1
+                self.dropped += idx - self.last_index - 1
+            self.last_index = idx
+
+            if h["frame_type"] == FRAME_DUMMY or not nbytes:
+                self.dummies += 1
+                continue
+            self.frames += 1
+            self.turn = (self.turn + 1) % len(self.payloads)
+            chans, cpi = int(h["active_ant_chs"]), int(h["cpi_length"])
+            iq = np.frombuffer(buf, dtype=np.complex64, count=chans * cpi).reshape(chans, cpi)
+            return Frame(h, iq)
+
+    def stats(self):
+        return {
+            "frames": self.frames,
+            "dummies": self.dummies,
+            "bytes": self.bytes,
+            "gaps": self.gaps,
+            "dropped_frames": self.dropped,
+            "sync_errors": self.sync_errors,
+            "reconnects": self.reconnects,
+        }
+
+
+class StandInServer:
+    """Local Heimdall look-alike for tests and benchmarks (no hardware).
+
+    Serves `channels` identical copies of `gen` (anything with fill(out),
+    e.g. dsp.SyntheticNFM) in CPIs of `cpi` samples. Every `drop_every`-th
+    block index is skipped to exercise gap tracking; `dummy_every` inserts
+    payload-less dummy frames.
+    """
+
+    def __init__(self, port=0, channels=5, cpi=1 << 16, samp_rate=2.4e6, freq=437.225e6,
+                 gen=None, drop_every=0, dummy_every=0, host="127.0.0.1"):
+        self.channels = channels
+        self.cpi = cpi
+        self.samp_rate = samp_rate
+        self.freq = freq
+        self.gen = gen
+        self.drop_every = drop_every
+        self.dummy_every = dummy_every
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind((host, port))
+        self.sock.listen(1)
+        self.port = self.sock.getsockname()[1]
+        self.thread = threading.Thread(target=self._serve, daemon=True)
+        self.thread.start()
+
+    def _header(self, index, frame_type, cpi):
+        h = np.zeros(1, dtype=HEADER_DTYPE)[0]
+        h["sync_word"] = SYNC_WORD
+        h["frame_type"] = frame_type
+        h["hardware_id"] = b"standin"
+        h["active_ant_chs"] = self.channels
+        h["rf_center_freq"] = int(self.freq)
+        h["adc_sampling_freq"] = int(self.samp_rate)
+        h["sampling_freq"] = int(self.samp_rate)
+        h["cpi_length"] = cpi
+        h["time_stamp"] = int(time.time() * 1e3)
+        h["daq_block_index"] = index
+        h["cpi_index"] = index
+        h["data_type"] = 1
+        h["sample_bit_depth"] = 32
+        h["header_version"] = 7
+        return h.tobytes()
+
+    def _serve(self):
+        block = np.zeros(self.cpi, dtype=np.complex64)
+        while True:
+            try:
+                conn, _ = self.sock.accept()
+            except OSError:
+                return
+            index = 0
+            try:
+                while True:
+                    req = conn.recv(64)
+                    if not req:
+                        break
+                    if b"IQDownload" not in req:
+                        continue
+                    index += 1
+                    if self.drop_every and index % self.drop_every == 0:
+                        index += 1
+                    if self.dummy_every and index % self.dummy_every == 0:
+                        conn.sendall(self._header(index, FRAME_DUMMY, 0))
+                        continue
+                    if self.gen is not None:
+                        self.gen.fill(block)
+                    conn.sendall(self._header(index, FRAME_DATA, self.cpi))
+                    for _ in range(self.channels):
+                        conn.sendall(block)
+            except OSError:
+                pass
+            finally:
+                conn.close()
+
+    def close(self):
+        self.sock.close()
@@ -0,0 +1,302 @@
+# Pluggable IQ sources so every script can run from a dongle, a recording
+# or a synthetic generator:
+#
+#   rtl=0                           osmosdr device args (the default)
+#   file:/tmp/cap.cu8               replay an IQ file as fast as possible
+#   file:/tmp/cap.cf32,realtime     ...paced to the sample rate
+#   file:/tmp/cap.cu8,loop          ...forever
+#   synth:cfo=600,burst=2,gap=3     synthetic NFM bursts (see dsp.SyntheticNFM)
+#   tcp:127.0.0.1:5100              complex64 stream from a recorder's IQ tap
+#
+# Recordings are raw interleaved IQ: .cu8 (rtl_sdr style, 8-bit offset) or
+# .cf32 / .cfile (complex64).
+import time
+import socket
+
+import numpy as np
+from gnuradio import gr
+
+from dsp import SyntheticNFM
+from heimdall import HeimdallReader
+
+SOURCE_HELP = "rtl=0 | file:PATH.cu8|.cf32[,realtime][,loop] | synth:key=val,... | tcp:HOST:PORT (default rtl=0)"
+
+
+def iq_format(path):
+    return "cu8" if path.endswith(".cu8") else "cf32"
+
+
+class _pacer:
+    """Sleep just enough to hold a source to real time.
+
+    A dongle only buffers `slack` seconds (rtl-sdr: 15 x 128k samples); when
+    the flowgraph falls further behind than that, a real device would drop
+    the excess, so it is counted in `dropped` and the schedule slips.
+    """
+
+    def __init__(self, rate, slack=None):
+        self.rate = rate
+        self.slack = slack if slack is not None else 15 * 131072 / rate
+        self.t0 = None
+        self.sent = 0
+        self.dropped = 0
+        self.max_lag = 0.0
+
+    def wait(self, n):
+        if self.t0 is None:
+            self.t0 = time.time()
+        self.sent += n
+        ahead = self.sent / self.rate - (time.time() - self.t0)
+        if ahead > 0:
+            time.sleep(ahead)
+            return
+        self.max_lag = max(self.max_lag, -ahead)
+        if -ahead > self.slack:
+            over = -ahead - self.slack
+            self.dropped += int(over * self.rate)
+            self.t0 += over
+
+
+class _retunable:
+    """Mixin so scripts can call the usual osmosdr setters on any source."""
+
+    def set_center_freq(self, freq, chan=0):
+        self.center_freq = freq
+        return freq
+
+    def set_gain(self, gain, chan=0):
+        return gain
+
+    def set_sample_rate(self, rate):
+        return rate
+
+
+class iq_file_source(gr.sync_block, _retunable):
+    """Replay a raw .cu8/.cf32 capture through a memory map (no full read)."""
+
+    def __init__(self, path, samp_rate, realtime=False, loop=False):
+        gr.sync_block.__init__(
+            self,
+            name="iq_file_source",
+            in_sig=None,
+            out_sig=[np.complex64]
+        )
+        self.path = path
+        self.fmt = iq_format(path)
+        if self.fmt == "cu8":
+            self.raw = np.memmap(path, dtype=np.uint8, mode="r")
+            self.total = len(self.raw) // 2
+        else:
+            self.raw = np.memmap(path, dtype=np.complex64, mode="r")
+            self.total = len(self.raw)
+        self.loop = loop
+        self.pos = 0
+        self.pacer = _pacer(samp_rate) if realtime else None
+
+    def dropped(self):
+        """Samples a real device would have lost while we lagged (realtime only)."""
+        return self.pacer.dropped if self.pacer else 0
+
+    def work(self, input_items, output_items):
+        out = output_items[0]
+        if self.pos >= self.total:
+            if not self.loop or not self.total:
+                return -1           # WORK_DONE
+            self.pos = 0
+        k = min(len(out), self.total - self.pos)
+        if self.fmt == "cu8":
+            b = self.raw[2 * self.pos:2 * (self.pos + k)]
+            out.real[:k] = (b[0::2] - 127.5) / 127.5
+            out.imag[:k] = (b[1::2] - 127.5) / 127.5
+        else:
+            out[:k] = self.raw[self.pos:self.pos + k]
+        self.pos += k
+        if self.pacer:
+            self.pacer.wait(k)
+        return k
+
+
+class synthetic_nfm_source(gr.sync_block, _retunable):
+    """Endless (or `seconds` long) synthetic NFM bursts."""
+
+    def __init__(self, samp_rate, realtime=False, seconds=None, **params):
+        gr.sync_block.__init__(
+            self,
+            name="synthetic_nfm_source",
+            in_sig=None,
+            out_sig=[np.complex64]
+        )
+        self.gen = SyntheticNFM(samp_rate, **params)
+        self.limit = int(seconds * samp_rate) if seconds else None
+        self.pacer = _pacer(samp_rate) if realtime else None
+
+    def dropped(self):
+        """Samples a real device would have lost while we lagged (realtime only)."""
+        return self.pacer.dropped if self.pacer else 0
+
+    def work(self, input_items, output_items):
+        out = output_items[0]
+        n = len(out)
+        if self.limit is not None:
+            n = min(n, self.limit - self.gen.n)
+            if n <= 0:
+                return -1           # WORK_DONE
+        self.gen.fill(out[:n])
+        if self.pacer:
+            self.pacer.wait(n)
+        return n
+
+
+class tcp_iq_source(gr.sync_block, _retunable):
+    """complex64 samples from a TCP server (e.g. 08's --tap-port), reconnecting."""
+
+    def __init__(self, host, port, retry=1.0):
+        gr.sync_block.__init__(
+            self,
+            name="tcp_iq_source",
+            in_sig=None,
+            out_sig=[np.complex64]
+        )
+        self.addr = (host, int(port))
+        self.retry = retry
+        self.sock = None
+        self.partial = bytearray()      # bytes of a sample split across recv()s
+
+    def _connect(self):
+        try:
+            self.sock = socket.create_connection(self.addr, timeout=self.retry)
+            self.partial.clear()
+            print(f"🔌 Connected to IQ tap {self.addr[0]}:{self.addr[1]}")
+        except OSError:
+            self.sock = None
+            time.sleep(self.retry)
+
+    def work(self, input_items, output_items):
+        out = output_items[0]
+        if self.sock is None:
+            self._connect()
+            return 0
+        buf = out.view(np.uint8)
+        k = len(self.partial)
+        buf[:k] = np.frombuffer(self.partial, dtype=np.uint8)
+        try:
+            got = self.sock.recv_into(memoryview(buf)[k:])
+        except socket.timeout:
+            return 0
+        except OSError:
+            got = 0
+        if not got:
+            print(f"🔌 IQ tap {self.addr[0]}:{self.addr[1]} closed, reconnecting")
+            self.sock.close()
+            self.sock = None
+            return 0
+        total = k + got
+        n = total // 8
+        self.partial[:] = buf[n * 8:total].tobytes()
+        return n
+
+    def stop(self):
+        if self.sock:
+            self.sock.close()
+        return True
+
+
+class heimdall_source(gr.sync_block):
+    """All channels of a Heimdall DAQ IQ server, one output per channel."""
+
+    def __init__(self, host="127.0.0.1", port=5000, channels=5):
+        gr.sync_block.__init__(
+            self,
+            name="heimdall_source",
+            in_sig=None,
+            out_sig=[np.complex64] * channels
+        )
+        self.reader = HeimdallReader(host, port, max_channels=channels)
+        self.frame = None
+        self.pos = 0
+
+    def work(self, input_items, output_items):
+        if self.frame is None or self.pos >= self.frame.iq.shape[1]:
+            self.frame = self.reader.read()
+            self.pos = 0
+        iq = self.frame.iq
+        k = min(len(output_items[0]), iq.shape[1] - self.pos)
+        for ch, out in enumerate(output_items):
+            if ch < iq.shape[0]:
+                out[:k] = iq[ch, self.pos:self.pos + k]
+            else:
+                out[:k] = 0
+        self.pos += k
+        return k
+
+    def stop(self):
+        self.reader.close()
+        return True
+
+
+class iq_file_sink(gr.sync_block):
+    """Write raw IQ to .cu8 (8-bit offset, rtl_sdr compatible) or .cf32."""
+
+    def __init__(self, path):
+        gr.sync_block.__init__(
+            self,
+            name="iq_file_sink",
+            in_sig=[np.complex64],
+            out_sig=None
+        )
+        self.fmt = iq_format(path)
+        self.f = open(path, "wb")
+        self.count = 0
+
+    def work(self, input_items, output_items):
+        x = input_items[0]
+        if self.fmt == "cu8":
+            b = np.empty(2 * len(x), dtype=np.float32)
+            b[0::2] = x.real
+            b[1::2] = x.imag
+            np.clip(b * 127.5 + 127.5, 0, 255).astype(np.uint8).tofile(self.f)
+        else:
+            x.tofile(self.f)
+        self.count += len(x)
+        return len(x)
+
+    def stop(self):
+        self.f.close()
+        return True
+
+
+def _parse_opts(text):
+    flags, params = set(), {}
+    for item in filter(None, text.split(",")):
+        if "=" in item:
+            k, v = item.split("=", 1)
+            params[k.strip()] = float(v)
+        else:
+            flags.add(item.strip())
+    return flags, params
+
+
+def make_source(spec, samp_rate, freq, gain):
+    """Build the source block described by `spec` (see SOURCE_HELP)."""
+    if spec.startswith("file:"):
+        path, _, opts = spec[5:].partition(",")
+        flags, _ = _parse_opts(opts)
+        src = iq_file_source(path, samp_rate, "realtime" in flags, "loop" in flags)
+    elif spec.startswith("synth:") or spec == "synth":
+        flags, params = _parse_opts(spec[6:])
+        seconds = params.pop("seconds", None)
+        if "seed" in params:
+            params["seed"] = int(params["seed"])
+        src = synthetic_nfm_source(samp_rate, "realtime" in flags, seconds, **params)
+    elif spec.startswith("tcp:"):
+        host, _, port = spec[4:].rpartition(":")
+        src = tcp_iq_source(host or "127.0.0.1", port)
+    else:
+        import osmosdr
+        src = osmosdr.source(args=f"numchan=1 {spec}")
+        src.set_sample_rate(samp_rate)
+        src.set_freq_corr(0)
+        src.set_gain_mode(False)
+        src.set_gain(gain)
+    src.set_center_freq(freq)
+    return src
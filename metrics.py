@@ -0,0 +1,295 @@
+# Runtime metrics for a running recorder: per-block throughput, work time
+# and buffer fullness from GNU Radio's performance counters, samples a
+# dongle must have dropped (inferred from the sample clock), trigger
+# latency, event dispatch delay and fingerprint queue figures.
+#
+# A collector thread takes a snapshot every `interval` seconds; the HTTP
+# server hands out the last one as Prometheus text (/metrics) or JSON
+# (/metrics.json), and a JSON file can be rewritten instead. With metrics
+# off the scripts create none of this: hot paths only test `if self.metrics`.
+#
+# Block counters need perf counters switched on before the flowgraph is
+# built (enable_perf_counters()); without them only item counts and the
+# derived rates are reported.
+import os
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from gnuradio import gr
+
+PREFIX = "baofeng"
+
+
+def enable_perf_counters():
+    """Turn on GNU Radio's per-block counters for blocks created after this."""
+    os.environ["GR_CONF_PERFCOUNTERS_ON"] = "True"
+    try:
+        gr.prefs().set_bool("PerfCounters", "on", True)
+    except (AttributeError, TypeError):
+        pass
+
+
+def _ticks_per_second():
+    try:
+        return float(gr.high_res_timer_tps())
+    except AttributeError:
+        return 1e9
+
+
+def _counter(block, name, *args):
+    """A perf counter, or None where the block has none (hier blocks, counters off)."""
+    fn = getattr(block, name, None)
+    if fn is None:
+        return None
+    try:
+        v = fn(*args)
+    except (RuntimeError, TypeError, ValueError):
+        return None
+    if isinstance(v, (list, tuple)):
+        return float(max(v)) if v else None        # the fullest port
+    return float(v)
+
+
+class Summary:
+    """count / sum / max of observed values (ms, seconds, ...)."""
+
+    def __init__(self):
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self.lock = threading.Lock()
+
+    def observe(self, v):
+        with self.lock:
+            self.count += 1
+            self.sum += v
+            self.max = max(self.max, v)
+
+    def snapshot(self):
+        with self.lock:
+            return {"count": self.count, "mean": self.sum / self.count if self.count else 0.0, "max": self.max}
+
+
+def prometheus_lines(s, labels=""):
+    """One snapshot as Prometheus lines; `labels` ('device="rtl=0"') goes on every one."""
+    def name(metric, extra=""):
+        both = ",".join(x for x in (labels, extra) if x)
+        return f"{PREFIX}_{metric}{{{both}}}" if both else f"{PREFIX}_{metric}"
+
+    out = [f"{name('uptime_seconds')} {s.get('uptime_s', 0.0):.3f}"]
+    for block, row in s["blocks"].items():
+        label = f'block="{block}"'
+        for key, v in row.items():
+            if v is not None:
+                out.append(f"{name('block_' + key, label)} {v:.6g}")
+    for metric, v in s["counters"].items():
+        out.append(f"{name(metric + '_total')} {v}")
+    for metric, v in s["gauges"].items():
+        if isinstance(v, dict):
+            out += [f"{name(metric + '_' + k)} {x:.6g}" for k, x in v.items() if x is not None]
+        elif v is not None:
+            out.append(f"{name(metric)} {v:.6g}")
+    for metric, v in s["summaries"].items():
+        out += [f"{name(metric + '_count')} {v['count']}", f"{name(metric + '_sum')} {v['mean'] * v['count']:.6g}",
+                f"{name(metric + '_max')} {v['max']:.6g}"]
+    return out
+
+
+class Metrics:
+    """Registry plus the periodic collector."""
+
+    def __init__(self, interval=5.0, path=None, on_snapshot=None):
+        self.interval = interval
+        self.path = path                # JSON file rewritten on every snapshot
+        self.on_snapshot = on_snapshot  # ...and/or snap handed to this (e.g. a supervisor's queue)
+        self.blocks = {}
+        self.sources = {}
+        self.counters = {}
+        self.gauges = {}
+        self.summaries = {}
+        self.prev = {}
+        self.tps = _ticks_per_second()
+        self.started = time.time()
+        self.snap = {"time": self.started, "blocks": {}, "counters": {}, "gauges": {}, "summaries": {}}
+        self.lock = threading.Lock()
+        self.thread = None
+        self.stopped = threading.Event()
+
+    def watch(self, blocks):
+        """Track {name: block}; hier blocks without counters are listed but skipped."""
+        self.blocks.update(blocks)
+
+    def watch_source(self, name, block, rate, slack=15 * 131072 / 2.4e6):
+        """Count samples the device could not have buffered (like osmosdr's "O").
+
+        `block` is the first sync block after the source: once it has read
+        more than `slack` seconds fewer samples than the clock says were
+        produced, the excess was dropped.
+        """
+        self.sources[name] = (block, rate, slack)
+
+    def count(self, name, n=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def gauge(self, name, fn):
+        """fn() -> number or {field: number}, evaluated at snapshot time only."""
+        self.gauges[name] = fn
+
+    def summary(self, name):
+        if name not in self.summaries:
+            self.summaries[name] = Summary()
+        return self.summaries[name]
+
+    def observe(self, name, v):
+        self.summary(name).observe(v)
+
+    def _block(self, name, block, now):
+        read = _counter(block, "nitems_read", 0)
+        written = _counter(block, "nitems_written", 0)
+        work = _counter(block, "pc_work_time_total")
+        row = {
+            "items_in": read, "items_out": written,
+            "work_us_avg": None, "busy": None,
+            "input_full": _counter(block, "pc_input_buffers_full_avg"),
+            "output_full": _counter(block, "pc_output_buffers_full_avg"),
+        }
+        avg = _counter(block, "pc_work_time_avg")
+        if avg is not None:
+            row["work_us_avg"] = 1e6 * avg / self.tps
+        prev = self.prev.get(name)
+        if prev:
+            dt = now - prev["t"]
+            for key, rate in (("items_in", "in_per_s"), ("items_out", "out_per_s")):
+                if row[key] is not None and prev[key] is not None and dt > 0:
+                    row[rate] = (row[key] - prev[key]) / dt
+            if work is not None and prev["work"] is not None and dt > 0:
+                row["busy"] = (work - prev["work"]) / self.tps / dt      # fraction of one core
+        self.prev[name] = {"t": now, "items_in": read, "items_out": written, "work": work}
+        return row
+
+    def _dropped(self, block, rate, slack):
+        read = _counter(block, "nitems_read", 0)
+        if read is None:
+            return None
+        lag = (time.time() - self.started) - read / rate
+        return {"lag_s": lag, "dropped_samples": max(0.0, lag - slack) * rate}
+
+    def collect(self):
+        """Take a snapshot now (also done by the collector thread)."""
+        now = time.time()
+        blocks = {name: self._block(name, b, now) for name, b in self.blocks.items()}
+        gauges = {}
+        for name, fn in self.gauges.items():
+            try:
+                gauges[name] = fn()
+            except Exception as e:
+                gauges[name] = None
+                print(f"⚠️ Metric {name} failed: {e!r}", flush=True)
+        for name, (block, rate, slack) in self.sources.items():
+            gauges[name] = self._dropped(block, rate, slack)
+        with self.lock:
+            counters = dict(self.counters)
+        snap = {"time": now, "uptime_s": now - self.started, "blocks": blocks, "counters": counters,
+                "gauges": gauges, "summaries": {k: s.snapshot() for k, s in self.summaries.items()}}
+        self.snap = snap
+        if self.path:
+            tmp = self.path + ".tmp"
+            with open(tmp, "w") as f:
+                json.dump(snap, f)
+            os.replace(tmp, self.path)
+        if self.on_snapshot:
+            self.on_snapshot(snap)
+        return snap
+
+    def json(self):
+        return json.dumps(self.snap)
+
+    def prometheus(self):
+        """The last snapshot in the Prometheus text format."""
+        return "\n".join(prometheus_lines(self.snap)) + "\n"
+
+    def _run(self):
+        while not self.stopped.wait(self.interval):
+            try:
+                self.collect()
+            except Exception as e:
+                print(f"⚠️ Metrics snapshot failed: {e!r}", flush=True)
+
+    def start(self, started=None):
+        """Start the collector thread.
+
+        `started` is time.time() taken just before the flowgraph's start():
+        the source lag counts from there, not from this (later) call.
+        """
+        self.started = time.time() if started is None else started
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def close(self):
+        self.stopped.set()
+        if self.thread:
+            self.thread.join()
+        self.collect()
+
+
+class MergedMetrics:
+    """Last snapshot of each of several recorders, served as one (MetricsServer-compatible).
+
+    Prometheus lines carry a device="..." label; the JSON is {device: snapshot}.
+    """
+
+    def __init__(self):
+        self.snaps = {}
+        self.lock = threading.Lock()
+
+    def update(self, device, snap):
+        with self.lock:
+            self.snaps[device] = snap
+
+    def json(self):
+        with self.lock:
+            return json.dumps(self.snaps)
+
+    def prometheus(self):
+        with self.lock:
+            snaps = dict(self.snaps)
+        out = []
+        for device, snap in snaps.items():
+            out += prometheus_lines(snap, f'device="{device}"')
+        return "\n".join(out) + "\n"
+
+
+class MetricsServer:
+    """GET /metrics (Prometheus text) or /metrics.json on a daemon thread."""
+
+    def __init__(self, metrics, port, host="127.0.0.1"):
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.startswith("/metrics.json"):
+                    body, kind = metrics.json().encode(), "application/json"
+                elif self.path.startswith("/metrics"):
+                    body, kind = metrics.prometheus().encode(), "text/plain; version=0.0.4"
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", kind)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self.port = self.httpd.server_address[1]
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
@@ -0,0 +1,171 @@
+# Several RTL-SDRs from one supervisor.
+#
+# Every device runs its own RecorderDaemon (08's pipeline: NFMRecorder,
+# burst files, fingerprint workers) in its own process, pinned to its own
+# share of the cores, so no two flowgraphs share a GIL or a core and each
+# added dongle brings its own CPU. All of them write into one outdir with
+# the channel in the file names (baofeng_<MHz>_<time>_<ms>...). The supervisor
+# keeps the single fingerprint index (FingerprintDB) and serves everyone's
+# metrics on one port, each series labelled device="...".
+#
+# Config (JSON):
+#
+#   {"outdir": "/data/bursts", "db": "/data/fpdb", "metrics_port": 9100,
+#    "devices": [{"source": "rtl=0", "freq": 437.225e6},
+#                {"source": "rtl=1", "freq": 462.5625e6, "cpus": [2, 3], "on_db": -18}]}
+#
+# "name" labels a device (default: its source), "cpus" pins it (default: an
+# even share of the cores this process may use); any other key goes to
+# RecorderDaemon as is. An "archive" belongs to one device: two devices
+# writing the same directory would overwrite each other's index.bin, so
+# such a config is refused. "db" and "metrics_port" are the supervisor's
+# (top level only): a device entry that sets them is refused as well.
+import os
+import json
+import queue
+import signal
+import ctypes
+import ctypes.util
+import multiprocessing as mp
+
+from shm_ring import pin
+from fingerprint_db import FingerprintDB
+from metrics import MergedMetrics, MetricsServer
+
+# one fingerprint index and one metrics port for all devices
+SUPERVISOR_KEYS = ("db", "metrics_port")
+
+
+def discover():
+    """Attached RTL-SDRs as [(source spec, serial)], via librtlsdr; [] without it.
+
+    The spec uses the device index: osmosdr reads an all-digit serial
+    (the usual "00000001") as an index anyway.
+    """
+    path = ctypes.util.find_library("rtlsdr")
+    if not path:
+        return []
+    lib = ctypes.CDLL(path)
+    lib.rtlsdr_get_device_count.restype = ctypes.c_uint32
+    found = []
+    for i in range(lib.rtlsdr_get_device_count()):
+        vendor, product, serial = (ctypes.create_string_buffer(256) for _ in range(3))
+        if lib.rtlsdr_get_device_usb_strings(i, vendor, product, serial) != 0:
+            serial.value = b""
+        found.append((f"rtl={i}", serial.value.decode(errors="replace")))
+    return found
+
+
+def load_config(path):
+    with open(path) as f:
+        cfg = json.load(f)
+    if not cfg.get("devices"):
+        raise ValueError(f"{path}: no devices")
+    for dev in cfg["devices"]:
+        if "source" not in dev or "freq" not in dev:
+            raise ValueError(f"{path}: every device needs a source and a freq: {dev}")
+    return cfg
+
+
+def share_cpus(n, cpus=None):
+    """Split `cpus` (default: this process's affinity) into n even shares."""
+    if cpus is None:
+        cpus = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else list(range(os.cpu_count()))
+    if n > len(cpus):
+        # more dongles than cores: they double up
+        return [[cpus[i % len(cpus)]] for i in range(n)]
+    # the first len(cpus) % n shares get one core more
+    k, extra = divmod(len(cpus), n)
+    bounds = [i * k + min(i, extra) for i in range(n + 1)]
+    return [cpus[bounds[i]:bounds[i + 1]] for i in range(n)]
+
+
+def run_device(name, source, freq, cpus, out, stop, metrics, status_every, kw):
+    """Device process: one RecorderDaemon, reporting bursts and metrics to the supervisor."""
+    pin(cpus)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)    # the supervisor stops us
+    from recorder_daemon import RecorderDaemon      # only the device processes need GNU Radio
+
+    daemon = RecorderDaemon(
+        source, freq, tag_freq=True,
+        on_indexed=lambda path, fp, t, f: out.put(("burst", name, path, fp, t, f)),
+        on_snapshot=(lambda snap: out.put(("metrics", name, snap))) if metrics else None,
+        **kw)
+    daemon.run(status_every, stop_event=stop)
+    out.put(("exit", name, daemon.saved))
+
+
+class Supervisor:
+    """Starts one device process per entry of `devices` (dicts as in the config)."""
+
+    def __init__(self, devices, outdir="/tmp", db=None, metrics_port=0, metrics_host="127.0.0.1",
+                 metrics_every=5.0, status_every=60.0):
+        names = [d.get("name", d["source"]) for d in devices]
+        if len(set(names)) != len(names):
+            raise ValueError(f"device names must be unique: {names}")
+        for name, dev in zip(names, devices):
+            shared = [k for k in SUPERVISOR_KEYS if k in dev]
+            if shared:
+                raise ValueError(f"{name}: {', '.join(shared)} belongs at the top level of the config")
+        archives = [os.path.realpath(d["archive"]) for d in devices if d.get("archive")]
+        if len(set(archives)) != len(archives):
+            raise ValueError(f"every device needs an archive of its own: {archives}")
+        self.db = FingerprintDB(db) if db else None
+        self.metrics = MergedMetrics() if metrics_port else None
+        self.metrics_port, self.metrics_host = metrics_port, metrics_host
+        self.server = None
+        self.saved = {}
+
+        ctx = mp.get_context("spawn")                   # never fork a running flowgraph
+        self.stop_event = ctx.Event()
+        self.out = ctx.Queue()
+        self.procs = {}
+        for name, dev, share in zip(names, devices, share_cpus(len(devices))):
+            kw = {k: v for k, v in dev.items() if k not in ("name", "source", "freq", "cpus")}
+            kw.update(outdir=outdir, metrics_every=metrics_every)
+            # not a daemon: it starts the fingerprint workers
+            self.procs[name] = ctx.Process(
+                target=run_device, name=f"dongle {name}",
+                args=(name, dev["source"], float(dev["freq"]), dev.get("cpus", share), self.out,
+                      self.stop_event, bool(metrics_port), status_every, kw))
+
+    def start(self):
+        if self.metrics:
+            self.server = MetricsServer(self.metrics, self.metrics_port, self.metrics_host)
+        for proc in self.procs.values():
+            proc.start()
+
+    def stop(self):
+        self.stop_event.set()
+
+    def handle(self, msg):
+        kind, name = msg[:2]
+        if kind == "burst":
+            path, fp, t, freq = msg[2:]
+            if self.db:
+                burst_id = self.db.add(fp, t, freq, path)
+                radio, dist = self.db.identify(fp)
+                print(f"🆔 [{name}] #{burst_id}: {radio or 'unknown radio'} (distance {dist:.2f})", flush=True)
+        elif kind == "metrics":
+            self.metrics.update(name, msg[2])
+        elif kind == "exit":
+            self.saved[name] = msg[2]
+
+    def wait(self):
+        """Until every device process has exited; their queued messages are handled first."""
+        while any(p.is_alive() for p in self.procs.values()):
+            try:
+                self.handle(self.out.get(timeout=0.5))
+            except queue.Empty:
+                pass
+        while True:
+            try:
+                self.handle(self.out.get_nowait())
+            except queue.Empty:
+                break
+        for proc in self.procs.values():
+            proc.join()
+        if self.server:
+            self.server.close()
+        if self.db:
+            self.db.close()
@@ -0,0 +1,584 @@
+# Custom GNU Radio blocks shared by the numbered recorder scripts.
+import time
+import threading
+from collections import deque
+
+import numpy as np
+import pmt
+from gnuradio import gr, blocks, analog, filter
+from gnuradio.filter import firdes, pfb
+
+from dsp import BurstRing, HysteresisTrigger, MovingPower, NoiseFloor, ZcrGate, WavWriter, SpectrumRows
+
+
+class burst_ring_buffer(gr.sync_block):
+    """Sink that keeps a fixed-size pre-trigger window and a capped burst."""
+
+    def __init__(self, dtype=np.complex64, pre_samples=0, post_samples=0, slots=2):
+        gr.sync_block.__init__(
+            self,
+            name="burst_ring_buffer",
+            in_sig=[dtype],
+            out_sig=None
+        )
+        self.ring = BurstRing(pre_samples, post_samples, dtype, slots)
+
+    def trigger(self, at=None):
+        self.ring.trigger(at)
+
+    def release(self, at=None):
+        self.ring.release(at=at)
+
+    def when_done(self, fn):
+        self.ring.when_done(fn)
+
+    def data(self):
+        return self.ring.view()
+
+    def work(self, input_items, output_items):
+        self.ring.push(input_items[0])
+        return len(input_items[0])
+
+
+class shm_ring_sink(gr.sync_block):
+    """Copies a stream into a shm_ring.ShmRing for another process."""
+
+    def __init__(self, ring):
+        gr.sync_block.__init__(
+            self,
+            name="shm_ring_sink",
+            in_sig=[ring.dtype.type],
+            out_sig=None
+        )
+        self.ring = ring
+
+    def work(self, input_items, output_items):
+        self.ring.write(input_items[0])
+        return len(input_items[0])
+
+    def stop(self):
+        self.ring.close_writer()
+        return True
+
+
+class _event_sink(gr.sync_block):
+    """Float sink running a detector whose process() returns BurstEvents.
+
+    Events are published on the `port` message port and handed to any
+    subscribed Python callbacks, right from work(), so nothing has to poll
+    a probe. Other threads change the detector through apply(), which
+    work() runs before its next block, never in the middle of one.
+    """
+
+    def __init__(self, name, detector, port):
+        gr.sync_block.__init__(
+            self,
+            name=name,
+            in_sig=[np.float32],
+            out_sig=None
+        )
+        self.det = detector
+        self.callbacks = []
+        self.port = pmt.intern(port)
+        self.message_port_register_out(self.port)
+        self.requests = []
+        self.lock = threading.Lock()
+
+    def subscribe(self, callback):
+        """callback(BurstEvent) runs on the flowgraph thread, keep it short."""
+        self.callbacks.append(callback)
+
+    def apply(self, fn):
+        """fn(detector) runs on the flowgraph thread before the next block."""
+        with self.lock:
+            self.requests.append(fn)
+
+    def work(self, input_items, output_items):
+        x = input_items[0]
+        if self.requests:
+            with self.lock:
+                requests, self.requests = self.requests, []
+            for fn in requests:
+                fn(self.det)
+        for ev in self.det.process(x, self.nitems_read(0)):
+            msg = pmt.make_dict()
+            msg = pmt.dict_add(msg, pmt.intern("event"), pmt.intern(ev.kind))
+            msg = pmt.dict_add(msg, pmt.intern("offset"), pmt.from_uint64(ev.offset))
+            msg = pmt.dict_add(msg, pmt.intern("db"), pmt.from_double(ev.db))
+            self.message_port_pub(self.port, msg)
+            for cb in self.callbacks:
+                cb(ev)
+        return len(x)
+
+
+class power_trigger(_event_sink):
+    """In-graph hysteresis detector on a power stream ("burst" port).
+
+    With floor_db the thresholds keep their distance to a tracked noise
+    floor instead of staying fixed (see dsp.NoiseFloor).
+    """
+
+    def __init__(self, rate, on_db=-20.0, off_db=-28.0, hold=0.1, floor_db=None):
+        _event_sink.__init__(self, "power_trigger", HysteresisTrigger(rate, on_db, off_db, hold, floor_db), "burst")
+        self.trig = self.det
+
+    def set_thresholds(self, on_db, off_db):
+        self.apply(lambda trig: trig.set_thresholds(on_db, off_db))
+
+    def reset(self):
+        """Forget a burst in progress (e.g. after a retune), from the next block on."""
+        self.apply(lambda trig: trig.reset())
+
+    def noise_floor(self):
+        """Tracked floor in dB (None when fixed or not known yet)."""
+        if self.trig.floor is None:
+            return None
+        db = float(self.trig.floor.db()[0])
+        return db if np.isfinite(db) else None
+
+    def active(self):
+        return self.trig.active
+
+
+class zcr_gate(_event_sink):
+    """Frame-wise ZCR live/dead detector on demodulated audio ("zcr" port)."""
+
+    def __init__(self, rate, frame=0.01, static_hz=1000.0, silence_db=-40.0, hang=3):
+        _event_sink.__init__(self, "zcr_gate", ZcrGate(rate, frame, static_hz, silence_db, hang), "zcr")
+        self.gate = self.det
+
+    def dead(self):
+        return self.gate.dead
+
+    def zcr(self):
+        return self.gate.zcr
+
+
+class multi_burst_capture(gr.sync_block):
+    """Coherent N-channel burst detector + IQ capture (KrakenSDR).
+
+    Power for all channels comes out of one vectorized moving average.
+    Every channel has its own trigger (events carry chan=0..N-1), and a
+    combined trigger on the loudest channel (chan=None) captures all N
+    channels sample-aligned, lookback included, split exactly on its edges.
+    Callbacks get (chan, BurstEvent) on the flowgraph thread; data() is the
+    last capture as an (n, N) view.
+    """
+
+    def __init__(self, nchan, rate, on_db=-20.0, off_db=-28.0, hold=0.1,
+                 avg=512, pre=0.5, max_burst=30.0, floor_db=None):
+        gr.sync_block.__init__(
+            self,
+            name="multi_burst_capture",
+            in_sig=[np.complex64] * nchan,
+            out_sig=None
+        )
+        self.nchan = nchan
+        self.power = MovingPower(avg, nchan)
+        self.trigs = [HysteresisTrigger(rate, on_db, off_db, hold, floor_db) for _ in range(nchan)]
+        self.any = HysteresisTrigger(rate, on_db, off_db, hold, floor_db)
+        # one vectorized floor tracker for all channels; triggers just follow it
+        self.floor = None
+        if floor_db is not None:
+            self.floor = NoiseFloor(rate, nchan)
+            for t in self.trigs + [self.any]:
+                t.floor = None
+        self.ring = BurstRing(int(pre * rate), int(max_burst * rate), np.complex64, channels=nchan)
+        self.level = np.zeros(nchan, dtype=np.float32)
+        self.callbacks = []
+        self.port = pmt.intern("burst")
+        self.message_port_register_out(self.port)
+
+    def subscribe(self, callback):
+        self.callbacks.append(callback)
+
+    def set_thresholds(self, on_db, off_db):
+        for t in self.trigs + [self.any]:
+            t.set_thresholds(on_db, off_db)
+
+    def data(self):
+        return self.ring.view()
+
+    def _publish(self, chan, ev):
+        msg = pmt.make_dict()
+        msg = pmt.dict_add(msg, pmt.intern("event"), pmt.intern(ev.kind))
+        msg = pmt.dict_add(msg, pmt.intern("chan"), pmt.from_long(-1 if chan is None else chan))
+        msg = pmt.dict_add(msg, pmt.intern("offset"), pmt.from_uint64(ev.offset))
+        msg = pmt.dict_add(msg, pmt.intern("db"), pmt.from_double(ev.db))
+        self.message_port_pub(self.port, msg)
+        for cb in self.callbacks:
+            cb(chan, ev)
+
+    def work(self, input_items, output_items):
+        x = np.stack(input_items)               # (nchan, n)
+        n = x.shape[1]
+        base = self.nitems_read(0)
+        p = self.power.process(x)
+        self.level = p[:, -1]
+
+        busy = np.zeros(self.nchan, dtype=bool)
+        for c, trig in enumerate(self.trigs):
+            for ev in trig.process(p[c], base):
+                self._publish(c, ev)
+                busy[c] = True
+            busy[c] |= trig.active
+        if self.floor is not None:
+            self.floor.update(p, busy)
+            floor_db = self.floor.db()
+            for trig, db in zip(self.trigs, floor_db):
+                trig.follow(db)
+            # the capture trigger runs on the loudest channel
+            if np.isfinite(floor_db).any():
+                self.any.follow(float(np.nanmax(floor_db)))
+
+        # capture edges land on their exact sample
+        rows = x.T
+        i = 0
+        for ev in self.any.process(p.max(axis=0), base):
+            k = ev.offset - base
+            if k < i:
+                # an end edge found after its hold time may lie in an earlier block
+                self.ring.release(i - k)
+            else:
+                self.ring.push(rows[i:k])
+                i = k
+                if ev.kind == "start":
+                    self.ring.trigger()
+                else:
+                    self.ring.release()
+            self._publish(None, ev)
+        self.ring.push(rows[i:])
+        return n
+
+
+class spectrum_tap(gr.sync_block):
+    """Complex sink turning the capture into quantized waterfall rows.
+
+    Computed once per process however many viewers there are; callbacks
+    get (time, uint8 row) on the flowgraph thread.
+    """
+
+    def __init__(self, samp_rate, nfft=1024, rows_per_sec=10.0, avg=8, lo_db=-120.0, hi_db=0.0):
+        gr.sync_block.__init__(
+            self,
+            name="spectrum_tap",
+            in_sig=[np.complex64],
+            out_sig=None
+        )
+        self.rows = SpectrumRows(samp_rate, nfft, rows_per_sec, avg, lo_db, hi_db)
+        self.callbacks = []
+
+    def subscribe(self, callback):
+        self.callbacks.append(callback)
+
+    def work(self, input_items, output_items):
+        x = input_items[0]
+        for row in self.rows.process(x):
+            now = time.time()
+            for cb in self.callbacks:
+                cb(now, row)
+        return len(x)
+
+
+class scan_probe(gr.sync_block):
+    """Complex sink that grabs a short snapshot of the capture on request.
+
+    snapshot() skips `settle` seconds (after a retune: everything the
+    source had already captured, see scanner.retune_settle) and returns the
+    next `seconds` of samples; between requests work() only counts samples,
+    so an idle probe costs nothing.
+    """
+
+    def __init__(self, samp_rate, max_seconds=0.1):
+        gr.sync_block.__init__(
+            self,
+            name="scan_probe",
+            in_sig=[np.complex64],
+            out_sig=None
+        )
+        self.rate = samp_rate
+        self.buf = np.empty(int(max_seconds * samp_rate), dtype=np.complex64)
+        self.cond = threading.Condition()
+        self.skip = 0
+        self.want = 0
+        self.fill = 0
+
+    def snapshot(self, settle, seconds=0.02, timeout=2.0):
+        """IQ view (valid until the next call), or None on timeout."""
+        with self.cond:
+            self.skip = int(settle * self.rate)
+            self.want = min(int(seconds * self.rate), len(self.buf))
+            self.fill = 0
+            if not self.cond.wait_for(lambda: self.fill >= self.want, timeout):
+                self.want = 0
+                return None
+            self.want = 0
+            return self.buf[:self.fill]
+
+    def work(self, input_items, output_items):
+        x = input_items[0]
+        with self.cond:
+            if self.want and self.fill < self.want:
+                skip = min(self.skip, len(x))
+                self.skip -= skip
+                k = min(len(x) - skip, self.want - self.fill)
+                self.buf[self.fill:self.fill + k] = x[skip:skip + k]
+                self.fill += k
+                if self.fill >= self.want:
+                    self.cond.notify_all()
+        return len(x)
+
+
+class burst_wav_sink(gr.sync_block):
+    """Always-connected WAV writer that opens and closes files on command.
+
+    open()/close() take an absolute input-sample offset, so a stop followed
+    by a start lands on the exact samples while the flowgraph keeps running
+    (no lock()/unlock(), nothing dropped). Without an offset the command is
+    applied at the start of the next work() call; a close offset that has
+    already been written trims the file back to it.
+
+    With `pre` seconds every file starts that long before its open offset,
+    so the key-up is in the recording. The lookback is GNU Radio's own
+    input history (plus `slack` for edges that arrive late), so nothing is
+    copied while idle. Lookback the stream never had (right after start)
+    is padded with silence: the trigger lands on frame `pre`.
+    """
+
+    def __init__(self, rate, pre=0.0, slack=0.5):
+        gr.sync_block.__init__(
+            self,
+            name="burst_wav_sink",
+            in_sig=[np.float32],
+            out_sig=None
+        )
+        self.rate = int(rate)
+        self.pre = int(pre * rate)
+        if self.pre:
+            self.set_history(self.pre + int(slack * rate) + 1)
+        self.wav = None
+        self.path = None
+        self.frames = 0
+        self.file_start = 0         # absolute offset of the file's first frame
+        self.pending = deque()
+        self.lock = threading.Lock()
+
+    def open(self, path, offset=None):
+        with self.lock:
+            self.pending.append(("open", offset, path))
+
+    def close(self, offset=None, on_closed=None):
+        """on_closed(path, frames) runs on the flowgraph thread once the file is final."""
+        with self.lock:
+            self.pending.append(("close", offset, on_closed))
+
+    def is_open(self):
+        return self.wav is not None
+
+    def _open(self, path, at):
+        self._close(None)
+        self.wav = WavWriter(path, self.rate)
+        self.path = path
+        self.frames = 0
+        self.file_start = at
+
+    def _close(self, on_closed, at=None):
+        if self.wav is None:
+            return
+        if at is not None:
+            self.wav.truncate(at - self.file_start)
+        self.wav.close()
+        path, frames = self.path, self.wav.frames
+        self.wav = None
+        self.path = None
+        if on_closed:
+            on_closed(path, frames)
+
+    def _write(self, x):
+        if self.wav is None:
+            return
+        self.wav.write(x)
+        self.frames = self.wav.frames
+
+    def stop(self):
+        # a close still waiting for its end sample: the file ends here, but
+        # its owner still gets on_closed with the frames actually written
+        on_closed = None
+        with self.lock:
+            if self.pending and self.pending[0][0] == "close":
+                on_closed = self.pending.popleft()[2]
+        self._close(on_closed)
+        return True
+
+    def work(self, input_items, output_items):
+        x = input_items[0]
+        h = self.history() - 1      # x[:h] is lookback, already consumed
+        n = len(x) - h
+        base = self.nitems_read(0) - h          # absolute offset of x[0]
+
+        # commands due inside this block, in the order they were issued
+        due = []
+        with self.lock:
+            while self.pending and (self.pending[0][1] is None or self.pending[0][1] < base + h + n):
+                due.append(self.pending.popleft())
+
+        pos = h
+        for kind, offset, arg in due:
+            if kind == "open":
+                start = (base + pos if offset is None else offset) - self.pre
+                at = max(min(start - base, len(x)), -self.pre)
+                if at < pos:
+                    # starts in the lookback: the old file ends here, the new one
+                    # gets the history up to now
+                    self._open(arg, base + at)
+                    if at < 0:
+                        self._write(np.zeros(-at, dtype=np.float32))
+                    self._write(x[max(at, 0):pos])
+                else:
+                    self._write(x[pos:at])
+                    pos = at
+                    self._open(arg, base + at)
+            else:
+                at = pos if offset is None else min(max(offset - base, pos), len(x))
+                self._write(x[pos:at])
+                pos = at
+                # an offset already written means "trim back to there"
+                self._close(arg, offset if offset is not None and offset < base + pos else None)
+        self._write(x[pos:])
+        return n
+
+
+class nfm_demod(gr.hier_block2):
+    """Squelch + RSSI + NBFM demod on an already narrowband channel.
+
+    Output 0 is audio at audio_rate, output 1 is the moving-average channel
+    power (linear, at quad_rate).
+    """
+
+    def __init__(self, quad_rate, audio_rate=48e3, squelch_db=-60, rssi_tau=5e-3):
+        gr.hier_block2.__init__(
+            self, "nfm_demod",
+            gr.io_signature(1, 1, gr.sizeof_gr_complex),
+            gr.io_signaturev(2, 2, [gr.sizeof_float, gr.sizeof_float])
+        )
+        self.quad_rate = quad_rate
+        self.audio_rate = audio_rate
+        rssi_len = max(1, int(quad_rate * rssi_tau))
+
+        self.squelch = analog.simple_squelch_cc(squelch_db, 1)
+        self.nfm = analog.nbfm_rx(
+            audio_rate=audio_rate,
+            quad_rate=quad_rate,
+            tau=75e-6,
+            max_dev=5e3
+        )
+        self.mag = blocks.complex_to_mag_squared()
+        self.avg = blocks.moving_average_ff(rssi_len, 1.0 / rssi_len, 4000, 1)
+
+        self.connect(self, self.squelch, self.nfm, (self, 0))
+        self.connect(self, self.mag, self.avg, (self, 1))
+
+    def audio_offset(self, offset):
+        """Map a power-stream sample offset onto the audio output."""
+        return int(offset * self.audio_rate / self.quad_rate)
+
+
+class nfm_channel(gr.hier_block2):
+    """Translate one channel to baseband, decimate, then demodulate.
+
+    Everything after the xlating filter (squelch, RSSI, nbfm_rx) runs at
+    channel_rate instead of the full capture rate. With iq_out=True the
+    narrowband channel IQ is exposed as output 2.
+    """
+
+    def __init__(self, samp_rate, offset=0.0, channel_rate=96e3,
+                 audio_rate=48e3, squelch_db=-60, iq_out=False):
+        sizes = [gr.sizeof_float, gr.sizeof_float] + ([gr.sizeof_gr_complex] if iq_out else [])
+        gr.hier_block2.__init__(
+            self, "nfm_channel",
+            gr.io_signature(1, 1, gr.sizeof_gr_complex),
+            gr.io_signaturev(len(sizes), len(sizes), sizes)
+        )
+        self.decim = max(1, int(round(samp_rate / channel_rate)))
+        self.channel_rate = samp_rate / self.decim
+
+        # 25 kHz raster: pass +-10 kHz, fully stopped by +-18 kHz
+        taps = firdes.low_pass(1.0, samp_rate, 10e3, 8e3, firdes.WIN_HAMMING)
+        self.xlate = filter.freq_xlating_fir_filter_ccf(self.decim, taps, offset, samp_rate)
+        self.demod = nfm_demod(self.channel_rate, audio_rate, squelch_db)
+
+        self.connect(self, self.xlate, self.demod)
+        self.connect((self.demod, 0), (self, 0))
+        self.connect((self.demod, 1), (self, 1))
+        if iq_out:
+            self.connect(self.xlate, (self, 2))
+
+    def set_offset(self, offset):
+        self.xlate.set_center_freq(offset)
+
+    def audio_offset(self, offset):
+        return self.demod.audio_offset(offset)
+
+
+class nfm_channel_bank(gr.hier_block2):
+    """Polyphase channelizer feeding one nfm_demod per selected 25 kHz slot.
+
+    The PFB splits the whole capture into samp_rate/spacing channels for
+    roughly the cost of one filter + FFT; only the slots listed in `offsets`
+    (Hz from the tuned center) get a demodulator. Outputs are interleaved:
+    2*i is audio and 2*i+1 is power for offsets[i]. Offsets must sit on the
+    `spacing` grid inside the capture, one per slot (ValueError otherwise).
+    """
+
+    def __init__(self, samp_rate, offsets, spacing=25e3, oversample=2, squelch_db=-60):
+        offsets = list(offsets)
+        numchans = int(round(samp_rate / spacing))
+        # PFB output k sits at k*spacing for k < N/2, negative frequencies above;
+        # an offset off the grid or sharing a slot would leave outputs unconnected
+        wanted = {}
+        for i, off in enumerate(offsets):
+            k = int(round(off / spacing))
+            if abs(off - k * spacing) > 1.0:
+                raise ValueError(f"offset {off:.0f} Hz is not on the {spacing:.0f} Hz channel grid")
+            if abs(k) > numchans // 2:
+                raise ValueError(f"offset {off:.0f} Hz is outside the {samp_rate / 1e6:g} MS/s capture")
+            if k % numchans in wanted:
+                raise ValueError(f"offsets {offsets[wanted[k % numchans]]:.0f} and {off:.0f} Hz "
+                                 f"fall in the same channel")
+            wanted[k % numchans] = i
+
+        nout = 2 * len(offsets)
+        gr.hier_block2.__init__(
+            self, "nfm_channel_bank",
+            gr.io_signature(1, 1, gr.sizeof_gr_complex),
+            gr.io_signature(nout, nout, gr.sizeof_float)
+        )
+        self.offsets = offsets
+        self.numchans = numchans
+        self.channel_rate = spacing * oversample
+        self.audio_rate = self.channel_rate / 2
+
+        taps = firdes.low_pass_2(1.0, samp_rate, 10e3, 5e3, 80, firdes.WIN_BLACKMAN_hARRIS)
+        self.pfb = pfb.channelizer_ccf(self.numchans, taps, oversample, 80)
+        self.connect(self, self.pfb)
+
+        self.demods = [None] * len(self.offsets)
+        for k in range(self.numchans):
+            if k not in wanted:
+                self.connect((self.pfb, k), blocks.null_sink(gr.sizeof_gr_complex))
+                continue
+            i = wanted[k]
+            demod = nfm_demod(self.channel_rate, self.audio_rate, squelch_db)
+            self.connect((self.pfb, k), demod)
+            self.connect((demod, 0), (self, 2 * i))
+            self.connect((demod, 1), (self, 2 * i + 1))
+            self.demods[i] = demod
+
+    def audio_port(self, i):
+        return (self, 2 * i)
+
+    def power_port(self, i):
+        return (self, 2 * i + 1)
+
+    def audio_offset(self, offset):
+        return int(offset * self.audio_rate / self.channel_rate)
@@ -0,0 +1,143 @@
+# The 05 recorder flowgraph without any Qt, so the benchmark harness and
+# headless tools can drive it directly.
+import math
+import threading
+
+import numpy as np
+from gnuradio import gr, blocks
+
+from nfm_blocks import burst_ring_buffer, burst_wav_sink, nfm_channel, power_trigger
+from iq_sources import make_source
+
+
+class NFMRecorder(gr.top_block):
+    def __init__(self, freq=437.225e6, on_db=-20.0, off_db=-25.0, hang_time=0.1, source="rtl=0",
+                 floor_db=None):
+        super().__init__("NFM Recorder")
+        self.freq = freq
+        self.samp_rate = 2.4e6
+        self.audio_rate = 48e3
+        self.rf_gain = 40
+
+        # Burst capture windows (seconds)
+        self.pre_trigger = 0.5
+        self.max_burst = 30.0
+
+        # Demod chain: channel filter + decimate, then squelch / RSSI / NFM;
+        # output 2 is the 96 kS/s channel IQ used for fingerprinting
+        self.chan = nfm_channel(self.samp_rate, audio_rate=self.audio_rate, iq_out=True)
+        self.iq_rate = self.chan.channel_rate
+
+        # IQ buffer: bounded ring, memory stays flat while the channel is idle
+        self.iq_sink = burst_ring_buffer(
+            np.complex64,
+            int(self.pre_trigger * self.iq_rate),
+            int(self.max_burst * self.iq_rate)
+        )
+
+        # Audio buffer for ramp detection, with the same lookback as the IQ
+        self.audio_sink = burst_ring_buffer(
+            np.float32,
+            int(self.pre_trigger * self.audio_rate),
+            int(self.max_burst * self.audio_rate)
+        )
+
+        # Source
+        self.src = make_source(source, self.samp_rate, self.freq, self.rf_gain)
+
+        # Probe for channel power
+        self.probe = blocks.probe_signal_f()
+
+        # Burst detector on channel power: sample-accurate start/end events;
+        # with floor_db the thresholds follow the measured noise floor
+        self.trigger = power_trigger(self.chan.channel_rate, on_db, off_db, hang_time, floor_db)
+        self.trigger.subscribe(self._capture_edge)
+
+        # Persistent WAV writer; files start pre_trigger before the edge
+        self.wav_sink = burst_wav_sink(self.audio_rate, self.pre_trigger)
+        self.current_wav = None
+
+        # Connections
+        self.connect(self.src, self.chan)
+        self.connect((self.chan, 1), self.probe)
+        self.connect((self.chan, 1), self.trigger)
+        self.connect((self.chan, 2), self.iq_sink)                        # channel IQ always
+        self.connect((self.chan, 0), self.audio_sink)                     # audio for ramp
+        self.connect((self.chan, 0), self.wav_sink)                       # writer never disconnects
+
+    def start_record(self, wav_path, offset=None):
+        """Begin writing demodulated audio to WAV (offset in audio samples).
+
+        The file starts pre_trigger seconds before the offset. With wav_path
+        None nothing is written: the burst buffers (get_audio()) follow the
+        trigger edges by themselves.
+        """
+        self.current_wav = wav_path
+        if wav_path:
+            self.wav_sink.open(wav_path, offset)
+
+    def stop_record(self, offset=None, on_closed=None):
+        """Stop writing audio; on_closed(path, frames) fires once the file is final."""
+        if self.current_wav:
+            self.wav_sink.close(offset, on_closed)
+            self.current_wav = None
+
+    def _capture_edge(self, ev):
+        """Flowgraph thread: start/stop the burst buffers on the edge's own samples."""
+        audio = self.chan.audio_offset(ev.offset)
+        if ev.kind == "start":
+            self.iq_sink.trigger(ev.offset)
+            self.audio_sink.trigger(audio)
+        else:
+            self.iq_sink.release(ev.offset)
+            self.audio_sink.release(audio)
+
+    def when_captured(self, fn):
+        """fn(iq, iq_trigger_at, audio, audio_trigger_at) once both burst buffers hold the last burst.
+
+        An end edge can reach the buffers before the samples do, so views
+        taken on the edge itself may miss the tail. Call this from a trigger
+        subscriber (flowgraph thread, after the edge): no other burst can
+        start in between. Audio includes the lookback.
+        """
+        parts = {}
+        lock = threading.Lock()
+
+        def done(name, view, trigger_at):
+            with lock:
+                parts[name] = (view, trigger_at)
+                if len(parts) < 2:
+                    return
+            fn(*parts["iq"], *parts["audio"])
+        self.iq_sink.when_done(lambda view, at: done("iq", view, at))
+        self.audio_sink.when_done(lambda view, at: done("audio", view, at))
+
+    def metric_blocks(self):
+        """{name: block} of the hot path, for metrics.Metrics.watch()."""
+        demod = self.chan.demod
+        named = {
+            "xlate": self.chan.xlate, "squelch": demod.squelch,
+            "nfm.demod": getattr(demod.nfm, "quad_demod", None),
+            "nfm.filter": getattr(demod.nfm, "audio_filter", None),
+            "nfm.deemph": getattr(demod.nfm, "deemph", None),
+            "mag": demod.mag, "avg": demod.avg, "trigger": self.trigger,
+            "iq_sink": self.iq_sink, "audio_sink": self.audio_sink, "wav_sink": self.wav_sink,
+        }
+        return {k: b for k, b in named.items() if b is not None}
+
+    def get_audio_db(self):
+        lvl = self.probe.level()
+        return 10 * math.log10(lvl) if lvl > 0 else -120
+
+    def get_iq(self):
+        """Zero-copy view of the last burst (pre-trigger window included)."""
+        return self.iq_sink.data()
+
+    def get_audio(self, lookback=False):
+        """Audio of the last burst from the trigger on (lookback=True: from pre_trigger before it)."""
+        audio = self.audio_sink.data()
+        return audio if lookback else audio[self.audio_sink.ring.trigger_at:]
+
+    def audio_lead(self):
+        """Frames of each WAV before its trigger."""
+        return self.wav_sink.pre
@@ -0,0 +1,268 @@
+# 08's recorder daemon as a class (no Qt, no argparse), so the multi-dongle
+# supervisor can run one per device.
+import os
+import time
+import queue
+import signal
+import threading
+
+from gnuradio import gr, blocks
+
+from dsp import burst_stamp
+from nfm_recorder import NFMRecorder
+from fingerprint import rename_tagged, save_sidecar
+from fingerprint_pool import FingerprintPool
+from fingerprint_db import FingerprintDB
+from burst_archive import ArchiveWriter
+from spectrum_server import attach_spectrum
+from metrics import Metrics, MetricsServer, enable_perf_counters
+
+
+class RecorderDaemon:
+    """05's recorder + fingerprinting with no Qt: for unattended nodes over SSH.
+
+    tag_freq puts the channel in the file names (baofeng_<MHz>_<time>_<ms>.wav),
+    so several receivers can share one outdir. on_indexed(path, fp, t, freq)
+    gets every fingerprinted burst, and on_snapshot(snap) every metrics
+    snapshot, for a supervisor that keeps the index and metrics of all of them.
+    """
+
+    def __init__(self, source="rtl=0", freq=437.225e6, on_db=-20.0, off_db=-25.0,
+                 outdir="/tmp", fingerprint=True, tap_port=0, tap_host="127.0.0.1", spectrum_port=0, db=None,
+                 save_iq=True, archive=None, codec="flac", floor_db=-30.0,
+                 metrics_port=0, metrics_file=None, metrics_every=5.0,
+                 tag_freq=False, on_indexed=None, on_snapshot=None):
+        self.outdir = outdir
+        self.tag_freq = tag_freq
+        self.on_indexed = on_indexed
+        self.save_iq = save_iq
+        if metrics_port or metrics_file or on_snapshot:
+            enable_perf_counters()      # before any block exists
+        self.rec = NFMRecorder(freq=freq, on_db=on_db, off_db=off_db, source=source, floor_db=floor_db)
+        self.events = queue.Queue()
+        self.pending = {}
+        self.recording = None
+        self.saved = 0
+
+        # Compressed archive instead of one WAV (+ sidecar) per burst
+        self.archive = None
+        if archive:
+            self.archive = ArchiveWriter(archive, self.rec.audio_rate, self.rec.iq_rate, codec, keep_iq=save_iq)
+        self.archive_path = archive
+
+        # Known-radio matching against the persistent fingerprint store
+        self.db = FingerprintDB(db) if db and fingerprint else None
+
+        self.fp_pool = None
+        if fingerprint:
+            self.fp_pool = FingerprintPool(
+                self.rec.iq_sink.ring.capacity,
+                self.rec.audio_sink.ring.capacity,
+                workers=2, depth=4, policy="latest",
+                on_result=self.fingerprint_done
+            )
+
+        # Optional IQ tap: a waterfall client (09) can attach and detach at will;
+        # with nobody connected the samples are simply discarded
+        if tap_port:
+            self.tap = blocks.tcp_server_sink(gr.sizeof_gr_complex, tap_host, tap_port, True)
+            self.rec.connect((self.rec.chan, 2), self.tap)
+
+        # Optional spectrum rows for 10-spectrum_client.py (uint8 dB, computed once)
+        self.spectrum = None
+        if spectrum_port:
+            self.spectrum = attach_spectrum(self.rec, self.rec.src, self.rec.samp_rate,
+                                            self.rec.freq, spectrum_port, tap_host)
+
+        self.rec.trigger.subscribe(self.on_edge)
+
+        # Metrics: nothing below exists (or runs) unless asked for
+        self.metrics = self.metrics_server = None
+        if metrics_port or metrics_file or on_snapshot:
+            self.metrics = Metrics(metrics_every, metrics_file, on_snapshot)
+            self.metrics.watch(self.rec.metric_blocks())
+            self.metrics.watch_source("source", self.rec.chan.xlate, self.rec.samp_rate)
+            if self.fp_pool:
+                self.metrics.gauge("fingerprint", self.fp_pool.stats)
+            if self.archive:
+                self.metrics.gauge("archive_dropped", lambda: self.archive.dropped)
+            if metrics_port:
+                self.metrics_server = MetricsServer(self.metrics, metrics_port, tap_host)
+
+    def on_edge(self, ev):
+        """Flowgraph thread: file edges land on the burst samples."""
+        offset = self.rec.chan.audio_offset(ev.offset)
+        self.events.put(("edge", ev, time.time()))
+        if self.metrics:
+            self.metrics.observe("trigger_latency_ms", ev.latency_ms)
+            self.metrics.count("edges")
+        if self.archive:
+            # no file per burst: audio goes to the burst buffer, the archive thread compresses it
+            if ev.kind == "start":
+                self.recording = time.time()
+                self.rec.start_record(None, offset)
+            elif self.recording:
+                # the buffers may still be short of the edge: hand the burst over once they have it
+                self.rec.when_captured(lambda iq, iq_at, audio, audio_at, t=self.recording:
+                                       self.events.put(("burst", iq, audio, iq_at, audio_at, t)))
+                self.rec.stop_record(offset)
+                self.recording = None
+        elif ev.kind == "start":
+            chan = f"{self.rec.freq / 1e6:.4f}_" if self.tag_freq else ""
+            self.recording = os.path.join(self.outdir, f"baofeng_{chan}{burst_stamp()}.wav")
+            self.rec.start_record(self.recording, offset)
+        elif self.recording:
+            # ring slots hold this burst until the next one ends
+            self.rec.when_captured(lambda iq, iq_at, audio, audio_at, path=self.recording:
+                                   self.events.put(("captured", path, (iq, audio[audio_at:], iq_at))))
+            self.rec.stop_record(offset, lambda path, frames: self.events.put(("saved", path, frames)))
+            self.recording = None
+
+    def join(self, path, **part):
+        """A WAV is handled once the file is final and its burst buffers are complete."""
+        got = self.pending.setdefault(path, {})
+        got.update(part)
+        if "frames" in got and "burst" in got:
+            del self.pending[path]
+            self.on_saved(path, got["frames"], *got["burst"])
+
+    def on_saved(self, path, frames, iq=None, audio=None, trigger_at=None):
+        if not frames:
+            os.remove(path)
+            print(f"⚠️ Deleted empty file: {path}", flush=True)
+            return
+        self.saved += 1
+        if self.metrics:
+            self.metrics.count("saved")
+        print(f"💾 Saved: {path}", flush=True)
+        if self.save_iq and iq is not None:
+            # IQ sidecar: lets 12-refingerprint.py redo this burst later
+            save_sidecar(path, iq, self.rec.iq_rate, self.rec.audio_rate, trigger_at, self.rec.freq,
+                         self.rec.audio_lead())
+        if self.fp_pool and iq is not None and not self.fp_pool.submit(
+                path, iq, audio, self.rec.iq_rate, self.rec.audio_rate, trigger_at=trigger_at):
+            print(f"⚠️ Fingerprint queue full, skipped {path}", flush=True)
+
+    def on_burst(self, iq, audio, trigger_at, audio_at, t):
+        """Archive the burst with its lookback; the fingerprint sees audio from the trigger on."""
+        if len(audio) <= audio_at:
+            print("⚠️ Dropped empty burst", flush=True)
+            return
+        burst_id = self.archive.write(audio, iq, trigger_at, t, self.rec.freq, audio_at)
+        if burst_id is None:
+            print("⚠️ Archive queue full, dropped burst", flush=True)
+            return
+        self.saved += 1
+        if self.metrics:
+            self.metrics.count("saved")
+        print(f"💾 Archived #{burst_id}: {(len(audio) - audio_at) / self.rec.audio_rate:.1f} s", flush=True)
+        if self.fp_pool and not self.fp_pool.submit(burst_id, iq, audio[audio_at:], self.rec.iq_rate,
+                                                  self.rec.audio_rate, trigger_at=trigger_at):
+            print(f"⚠️ Fingerprint queue full, skipped #{burst_id}", flush=True)
+
+    def fingerprint_done(self, wav_path, fp, err):
+        if err:
+            print(f"⚠️ Fingerprint failed for {wav_path}: {err}", flush=True)
+            return
+        if self.archive:
+            # pool key is the archive row
+            self.archive.set_features(wav_path, fp)
+            new = f"{self.archive_path}#{wav_path}"
+            print(f"🧬 Fingerprinted #{wav_path}", flush=True)
+        else:
+            new = rename_tagged(wav_path, fp)
+            print(f"🧬 Renamed → {new}", flush=True)
+        if self.db:
+            burst_id = self.db.add(fp, time.time(), self.rec.freq, new)
+            radio, dist = self.db.identify(fp)
+            print(f"🆔 #{burst_id}: {radio or 'unknown radio'} (distance {dist:.2f})", flush=True)
+        if self.on_indexed:
+            self.on_indexed(new, fp, time.time(), self.rec.freq)
+
+    def handle(self, msg):
+        kind = msg[0]
+        if kind == "burst":
+            self.on_burst(*msg[1:])
+        elif kind == "captured":
+            self.join(msg[1], burst=msg[2])
+        elif kind == "saved":
+            self.join(msg[1], frames=msg[2])
+
+    def status(self):
+        line = f"📡 {self.rec.freq/1e6:.6f} MHz {self.rec.get_audio_db():.1f} dBFS, {self.saved} saved"
+        floor = self.rec.trigger.noise_floor()
+        if floor is not None:
+            line += f", floor {floor:.1f} dBFS"
+        if self.fp_pool:
+            st = self.fp_pool.stats()
+            line += f", fingerprints {st['completed']} done / {st['dropped']} dropped"
+        return line
+
+    def run(self, status_every=60.0, stop_event=None):
+        """Until SIGINT/SIGTERM (or stop_event is set) or a finite source ends."""
+        stop = []
+        if stop_event is None:
+            for sig in (signal.SIGINT, signal.SIGTERM):
+                signal.signal(sig, lambda *args: stop.append(True))
+        else:
+            threading.Thread(target=lambda: (stop_event.wait(), stop.append(True)), daemon=True).start()
+
+        started = time.time()
+        self.rec.start()
+        if self.metrics:
+            self.metrics.start(started)
+        # a finite source (file replay, synth seconds=) ends the run too
+        waiter = threading.Thread(target=lambda: (self.rec.wait(), stop.append(True)), daemon=True)
+        waiter.start()
+        print(f"Monitoring {self.rec.freq/1e6:.6f} MHz (NFM), writing to {self.outdir}", flush=True)
+        next_status = time.time() + status_every
+        while not stop:
+            try:
+                msg = self.events.get(timeout=0.5)
+            except queue.Empty:
+                msg = None
+            if msg and msg[0] == "edge":
+                ev = msg[1]
+                if self.metrics:
+                    # how long the edge waited for this loop (GIL, fingerprint callbacks, disk)
+                    self.metrics.observe("event_dispatch_ms", 1e3 * (time.time() - msg[2]))
+                if ev.kind == "start":
+                    print(f"🔴 Recording start @ {ev.db:.1f} dBFS (trigger latency {ev.latency_ms:.1f} ms)", flush=True)
+                else:
+                    print(f"⚫️ Recording stop @ {ev.db:.1f} dBFS", flush=True)
+            elif msg:
+                self.handle(msg)
+            if status_every and time.time() >= next_status:
+                print(self.status(), flush=True)
+                next_status += status_every
+
+        print("🛑 Shutting down...", flush=True)
+        if self.metrics:
+            self.metrics.close()            # last snapshot while the blocks still exist
+        if self.metrics_server:
+            self.metrics_server.close()
+        self.rec.stop()           # burst_wav_sink finalizes an open file on stop
+        waiter.join()
+        if self.archive and self.recording:
+            # keep the burst that was still on the air
+            self.rec.iq_sink.release()
+            self.rec.audio_sink.release()
+            self.rec.when_captured(lambda iq, iq_at, audio, audio_at, t=self.recording:
+                                   self.events.put(("burst", iq, audio, iq_at, audio_at, t)))
+        while not self.events.empty():
+            msg = self.events.get()
+            if msg[0] != "edge":
+                self.handle(msg)
+        for path, got in list(self.pending.items()):
+            if "frames" in got:
+                # the flowgraph stopped before the buffers reached the end edge
+                self.on_saved(path, got["frames"], *got.get("burst", ()))
+        if self.spectrum:
+            self.spectrum.close()
+        if self.fp_pool:
+            # let queued bursts finish (bounded) so a replay run gets all its names
+            self.fp_pool.close(drain=10)
+        if self.archive:
+            self.archive.close()
+        if self.db:
+            self.db.close()
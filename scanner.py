@@ -0,0 +1,101 @@
+# Band scanning for a single RTL (NumPy only): which 2.4 MHz window to tune
+# next and which 25 kHz channels in it are busy.
+#
+# A window is checked with one short averaged FFT; the channel raster is
+# summed out of it in a single reshape (about 1.5 ms for 20 ms of IQ).
+# Windows are revisited by priority x time since the last look, scaled up
+# by how often they were busy lately.
+import numpy as np
+
+from fingerprint import welch_psd, _window
+
+RTL_TRANSFER = 131072       # samples per rtl-sdr USB transfer at osmosdr's default buflen (256 KiB)
+GR_BUFFER = 8192            # complex samples GNU Radio queues between two blocks by default
+
+
+def band_windows(start, stop, usable=2.0e6):
+    """Window centers whose usable spans tile [start, stop] (Hz)."""
+    n = max(1, int(np.ceil((stop - start) / usable - 1e-9)))
+    return start + usable * (np.arange(n) + 0.5)
+
+
+def retune_settle(samp_rate, transfer=RTL_TRANSFER, gr_buffer=GR_BUFFER, tuner=0.005):
+    """Seconds of samples to discard after a retune before a look.
+
+    An rtl-sdr hands samples over one USB transfer at a time: the transfer
+    in flight when the tuner moved and one already queued still hold the
+    old window, and so does GNU Radio's buffer in front of the probe. Then
+    the tuner itself needs `tuner` s to lock.
+    """
+    return (2 * transfer + gr_buffer) / samp_rate + tuner
+
+
+def channel_power(iq, samp_rate, spacing=25e3, usable=2.0e6, bins=16):
+    """(offsets, power) of every raster channel inside the usable span.
+
+    offsets are Hz from the tuned center; power is the mean |x|^2 that
+    falls into each channel, so 10*log10() is comparable to the channel
+    power the recorders trigger on.
+    """
+    nperseg = int(round(samp_rate / spacing)) * bins
+    freqs, psd = welch_psd(iq, samp_rate, nperseg)
+    # bin i sits at -fs/2 + i*df; drop half a channel so slots line up on the raster
+    half = bins // 2
+    nch = (nperseg - bins) // bins
+    per = psd[half:half + nch * bins].reshape(nch, bins).sum(axis=1)
+    per /= nperseg * float(np.sum(_window(nperseg) ** 2))
+    offsets = (np.arange(nch) - nch // 2) * spacing
+    keep = np.abs(offsets) <= usable / 2 - spacing / 2
+    return offsets[keep], per[keep]
+
+
+def active_channels(offsets, power, rise_db=10.0):
+    """Channels more than rise_db above the window's median (most slots are idle).
+
+    Returns (offsets, dB above the floor, floor dB), loudest first.
+    """
+    floor = float(np.median(power))
+    with np.errstate(divide="ignore"):
+        above = 10 * np.log10(power / max(floor, 1e-20))
+    hot = np.flatnonzero(above > rise_db)
+    hot = hot[np.argsort(above[hot])[::-1]]
+    return offsets[hot], above[hot], 10 * np.log10(max(floor, 1e-20))
+
+
+class ScanScheduler:
+    """Chooses the next window to look at.
+
+    score = priority x seconds since the last look x (1 + boost x activity),
+    where activity is the fraction of recent looks that found something
+    (exponential average over `memory` looks). A quiet window is still
+    revisited, just less often than a busy or high-priority one.
+    """
+
+    def __init__(self, centers, priority=None, boost=4.0, memory=20):
+        self.centers = np.asarray(centers, dtype=np.float64)
+        n = len(self.centers)
+        self.priority = np.ones(n) if priority is None else np.asarray(priority, dtype=np.float64)
+        self.boost = boost
+        self.alpha = 1.0 / memory
+        self.activity = np.zeros(n)
+        self.last = np.zeros(n)
+        self.looks = np.zeros(n, dtype=np.int64)
+        self.hits = np.zeros(n, dtype=np.int64)
+
+    def set_priority(self, freq, weight, usable=2.0e6):
+        """Give the window containing `freq` (Hz) a weight."""
+        i = int(np.argmin(np.abs(self.centers - freq)))
+        if abs(self.centers[i] - freq) <= usable / 2:
+            self.priority[i] = weight
+        return i
+
+    def next(self, now):
+        score = self.priority * (now - self.last) * (1 + self.boost * self.activity)
+        return int(np.argmax(score))
+
+    def visited(self, i, now, busy):
+        """Record a look at window i (busy: anything above the floor)."""
+        self.last[i] = now
+        self.looks[i] += 1
+        self.hits[i] += bool(busy)
+        self.activity[i] += self.alpha * (float(bool(busy)) - self.activity[i])
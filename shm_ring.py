@@ -0,0 +1,104 @@
+# Sample rings in shared memory, for pipelines split over processes.
+#
+# One process writes, any number read. The header holds the total number of
+# samples ever written; each reader keeps its own absolute position, so a
+# slow reader never holds up the writer. A reader that falls more than the
+# ring's capacity behind has lost the oldest samples and is told how many.
+# Positions are absolute sample offsets, the same numbers the trigger
+# events carry, so edges from one ring line up with samples from another.
+import os
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+HEADER = 64                 # int64: written, capacity, closed
+
+
+def pin(cpus):
+    """Restrict the calling process to `cpus` (ignored where unsupported)."""
+    if cpus and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, set(cpus))
+
+
+class ShmRing:
+    """Single-writer ring of `capacity` samples of `dtype`.
+
+    ShmRing(capacity, dtype) creates the segment; ShmRing(dtype=..., name=)
+    attaches to it from another process. The creator unlinks it on close().
+    """
+
+    def __init__(self, capacity=0, dtype=np.complex64, name=None):
+        self.dtype = np.dtype(dtype)
+        self.owner = name is None
+        if self.owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=HEADER + int(capacity) * self.dtype.itemsize)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.head = np.ndarray((3,), dtype=np.int64, buffer=self.shm.buf)
+        if self.owner:
+            self.head[:] = (0, int(capacity), 0)
+        self.capacity = int(self.head[1])
+        self.data = np.ndarray((self.capacity,), dtype=self.dtype, buffer=self.shm.buf, offset=HEADER)
+        self.name = self.shm.name
+
+    @property
+    def written(self):
+        return int(self.head[0])
+
+    @property
+    def closed(self):
+        return bool(self.head[2])
+
+    def write(self, x):
+        """Append a block (writer only); the count is published after the samples."""
+        n = len(x)
+        w = int(self.head[0])
+        if n > self.capacity:
+            w += n - self.capacity
+            x = x[n - self.capacity:]
+            n = self.capacity
+        i = w % self.capacity
+        first = min(n, self.capacity - i)
+        self.data[i:i + first] = x[:first]
+        self.data[:n - first] = x[first:]
+        self.head[0] = w + n
+
+    def read(self, pos, out):
+        """Copy samples from absolute `pos` into `out`; returns (n, new pos, lost)."""
+        w = int(self.head[0])
+        lost = max(0, w - self.capacity - pos)
+        pos += lost
+        n = min(w - pos, len(out))
+        i = pos % self.capacity
+        first = min(n, self.capacity - i)
+        out[:first] = self.data[i:i + first]
+        out[first:n] = self.data[:n - first]
+        # the writer may have lapped us while we copied
+        over = max(0, int(self.head[0]) - self.capacity - pos)
+        if over:
+            k = min(over, n)
+            out[:n - k] = out[k:n]
+            n -= k
+            pos += k
+            lost += k
+        return n, pos + n, lost
+
+    def wait(self, pos, timeout=0.1, poll=0.001):
+        """Until samples past `pos` exist or the writer closed; True if there is data."""
+        deadline = time.time() + timeout
+        while int(self.head[0]) <= pos and not self.head[2]:
+            if time.time() >= deadline:
+                return False
+            time.sleep(poll)
+        return int(self.head[0]) > pos
+
+    def close_writer(self):
+        """Tell readers no more samples will come."""
+        self.head[2] = 1
+
+    def close(self):
+        del self.head, self.data
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
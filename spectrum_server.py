@@ -0,0 +1,157 @@
+# Remote waterfall without X11: the recorder computes quantized spectrum
+# rows once (nfm_blocks.spectrum_tap) and this server fans them out over
+# TCP, each client at its own rate.
+#
+# Protocol: the client may send "rate=<rows per second>\n" right after
+# connecting; the server answers with one JSON header line
+#   {"nfft": 1024, "samp_rate": 2400000.0, "lo_db": -120.0, "hi_db": 0.0, "frame": 1040}
+# followed by fixed-size frames: <float64 time><float64 center Hz><nfft x uint8 dB>.
+# A slow client only ever gets the newest row; nothing queues up.
+import json
+import time
+import socket
+import struct
+import threading
+
+FRAME_HEAD = struct.Struct("<dd")
+
+
+class _Client:
+    def __init__(self, server, sock, addr):
+        self.server = server
+        self.sock = sock
+        self.addr = addr
+        self.rate = server.max_rate
+        self.cond = threading.Condition()
+        self.latest = None
+        self.closed = False
+        self.sent = 0
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def offer(self, frame):
+        with self.cond:
+            self.latest = frame
+            self.cond.notify()
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify()
+
+    def _hello(self):
+        """Optional "rate=N" line; anything else (or nothing) keeps the default."""
+        self.sock.settimeout(0.3)
+        try:
+            line = self.sock.recv(64).decode(errors="ignore").strip()
+            if line.startswith("rate="):
+                self.rate = min(self.server.max_rate, max(0.1, float(line[5:])))
+        except (OSError, ValueError):
+            pass
+        self.sock.settimeout(self.server.send_timeout)
+
+    def _run(self):
+        try:
+            self._hello()
+            self.sock.sendall(self.server.header())
+            last = 0.0
+            while True:
+                with self.cond:
+                    self.cond.wait_for(lambda: self.latest is not None or self.closed)
+                    if self.closed:
+                        break
+                wait = last + 1.0 / self.rate - time.time()
+                if wait > 0:
+                    time.sleep(wait)
+                with self.cond:
+                    frame, self.latest = self.latest, None
+                if frame is None:
+                    continue
+                self.sock.sendall(frame)
+                self.sent += 1
+                last = time.time()
+        except OSError:
+            pass
+        finally:
+            self.sock.close()
+            self.server._drop(self)
+
+
+class SpectrumServer:
+    """Fan quantized spectrum rows out to TCP viewers, rate limited per client."""
+
+    def __init__(self, port, samp_rate, center, nfft=1024, lo_db=-120.0, hi_db=0.0,
+                 host="127.0.0.1", max_rate=10.0, max_clients=8, send_timeout=5.0):
+        self.samp_rate = samp_rate
+        self.center = center
+        self.nfft = nfft
+        self.lo_db = lo_db
+        self.hi_db = hi_db
+        self.max_rate = max_rate
+        self.max_clients = max_clients
+        self.send_timeout = send_timeout
+        self.clients = []
+        self.lock = threading.Lock()
+
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind((host, port))
+        self.sock.listen(4)
+        self.thread = threading.Thread(target=self._accept, daemon=True)
+        self.thread.start()
+        print(f"📺 Spectrum server on {host}:{port} ({nfft} bins, ≤{max_rate:g} rows/s per client)")
+
+    def header(self):
+        return (json.dumps({
+            "nfft": self.nfft, "samp_rate": self.samp_rate,
+            "lo_db": self.lo_db, "hi_db": self.hi_db,
+            "frame": FRAME_HEAD.size + self.nfft,
+        }) + "\n").encode()
+
+    def set_center(self, freq):
+        self.center = freq
+
+    def publish(self, t, row):
+        """Flowgraph thread: hand the newest row to every client (never blocks)."""
+        frame = FRAME_HEAD.pack(t, self.center) + row.tobytes()
+        with self.lock:
+            clients = list(self.clients)
+        for c in clients:
+            c.offer(frame)
+
+    def _accept(self):
+        while True:
+            try:
+                sock, addr = self.sock.accept()
+            except OSError:
+                return
+            with self.lock:
+                if len(self.clients) >= self.max_clients:
+                    sock.close()
+                    continue
+                self.clients.append(_Client(self, sock, addr))
+            print(f"📺 Viewer {addr[0]}:{addr[1]} connected ({len(self.clients)} total)")
+
+    def _drop(self, client):
+        with self.lock:
+            if client in self.clients:
+                self.clients.remove(client)
+        print(f"📺 Viewer {client.addr[0]}:{client.addr[1]} left after {client.sent} rows")
+
+    def close(self):
+        self.sock.close()
+        with self.lock:
+            clients = list(self.clients)
+        for c in clients:
+            c.close()
+
+
+def attach_spectrum(tb, src, samp_rate, center, port, host="127.0.0.1", rows_per_sec=10.0, nfft=1024):
+    """Hang a spectrum_tap off `src` in `tb` and serve its rows on `port`."""
+    from nfm_blocks import spectrum_tap     # keeps this module GNU Radio free for viewers
+    tap = spectrum_tap(samp_rate, nfft, rows_per_sec)
+    server = SpectrumServer(port, samp_rate, center, nfft, tap.rows.lo_db, tap.rows.hi_db,
+                            host=host, max_rate=rows_per_sec)
+    tap.subscribe(server.publish)
+    tb.connect(src, tap)
+    return server
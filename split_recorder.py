@@ -0,0 +1,223 @@
+# The 08 recorder split over processes that only share memory rings
+# (shm_ring.ShmRing):
+#
+#   dsp       GNU Radio: source -> nfm_channel -> rings (channel IQ, power, audio)
+#   recorder  NumPy: trigger on the power ring, lookback burst buffers,
+#             one WAV (+ IQ sidecar) per burst
+#   features  fingerprint_pool workers, fed by the recorder
+#
+# No two stages share a GIL, and each can be pinned to its own cores: a slow
+# fingerprint only delays the recorder's queue, never the flowgraph. Every
+# ring holds `ring_seconds` of its stream, so the recorder may fall that
+# far behind before samples are lost (and counted).
+import os
+import signal
+import threading
+import multiprocessing as mp
+
+import numpy as np
+
+from shm_ring import ShmRing, pin
+from dsp import BurstRing, HysteresisTrigger, WavWriter, burst_stamp
+from fingerprint import rename_tagged, save_sidecar
+from fingerprint_pool import FingerprintPool
+
+SAMP_RATE = 2.4e6
+AUDIO_RATE = 48e3
+STREAMS = {"iq": np.complex64, "power": np.float32, "audio": np.float32}
+
+
+def run_dsp(source, freq, names, stop, cpus=None, samp_rate=SAMP_RATE):
+    """DSP process: source and channel chain, streams written into the rings."""
+    pin(cpus)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)    # the supervisor stops us
+    from gnuradio import gr                         # only this stage needs GNU Radio
+    from iq_sources import make_source
+    from nfm_blocks import nfm_channel, shm_ring_sink
+
+    rings = {k: ShmRing(dtype=STREAMS[k], name=n) for k, n in names.items()}
+    tb = gr.top_block("NFM DSP")
+    src = make_source(source, samp_rate, freq, 40)
+    chan = nfm_channel(samp_rate, audio_rate=AUDIO_RATE, iq_out=True)
+    tb.connect(src, chan)
+    tb.connect((chan, 0), shm_ring_sink(rings["audio"]))
+    tb.connect((chan, 1), shm_ring_sink(rings["power"]))
+    tb.connect((chan, 2), shm_ring_sink(rings["iq"]))
+    tb.start()
+    # a finite source (file replay, synth seconds=) ends the stage too
+    done = threading.Event()
+    threading.Thread(target=lambda: (tb.wait(), done.set()), daemon=True).start()
+    while not stop.is_set() and not done.is_set():
+        stop.wait(0.2)
+    tb.stop()
+    tb.wait()
+    for ring in rings.values():
+        ring.close_writer()
+        ring.close()
+
+
+class RingRecorder:
+    """Recorder stage: trigger and burst capture on rings another process writes.
+
+    Edges carry absolute sample offsets, so it does not matter which ring
+    has been read further: a burst is written out once both burst buffers
+    have reached its end edge.
+    """
+
+    def __init__(self, names, channel_rate, audio_rate=AUDIO_RATE, outdir="/tmp", on_db=-20.0, off_db=-25.0,
+                 floor_db=-30.0, hang=0.1, pre=0.5, max_burst=30.0, freq=None, save_iq=True,
+                 fingerprint=True, fp_workers=2, fp_cpus=None, chunk=0.05):
+        self.rings = {k: ShmRing(dtype=STREAMS[k], name=n) for k, n in names.items()}
+        self.pos = dict.fromkeys(self.rings, 0)
+        self.lost = dict.fromkeys(self.rings, 0)
+        rates = {"iq": channel_rate, "power": channel_rate, "audio": audio_rate}
+        self.bufs = {k: np.empty(int(chunk * rates[k]), dtype=STREAMS[k]) for k in self.rings}
+        self.channel_rate = channel_rate
+        self.audio_rate = audio_rate
+        self.outdir = outdir
+        self.freq = freq
+        self.save_iq = save_iq
+
+        self.trigger = HysteresisTrigger(channel_rate, on_db, off_db, hang, floor_db)
+        self.iq = BurstRing(int(pre * channel_rate), int(max_burst * channel_rate))
+        self.audio = BurstRing(int(pre * audio_rate), int(max_burst * audio_rate), np.float32)
+        self.current = None             # WAV path of the burst being captured
+        self.ending = None              # ...once its end edge is known
+        self.saved = 0
+        self.pool = None
+        if fingerprint:
+            self.pool = FingerprintPool(self.iq.capacity, self.audio.capacity, fp_workers, depth=4,
+                                        policy="latest", on_result=self.fingerprint_done, cpus=fp_cpus)
+
+    def _read(self, k):
+        ring = self.rings[k]
+        n, self.pos[k], lost = ring.read(self.pos[k], self.bufs[k])
+        if lost:
+            self.lost[k] += lost
+            print(f"⚠️ Recorder fell behind: {lost} {k} samples lost", flush=True)
+        return self.bufs[k][:n], self.pos[k] - n
+
+    def step(self):
+        """Consume what the rings hold; returns the number of power samples handled."""
+        x, _ = self._read("iq")
+        self.iq.push(x)
+        x, _ = self._read("audio")
+        self.audio.push(x)
+        p, base = self._read("power")
+        for ev in self.trigger.process(p, base):
+            audio_at = int(ev.offset * self.audio_rate / self.channel_rate)
+            if ev.kind == "start":
+                self._finish()          # a burst still waiting for its tail is cut here
+                self.current = os.path.join(self.outdir, f"baofeng_{burst_stamp()}.wav")
+                self.iq.trigger(ev.offset)
+                self.audio.trigger(audio_at)
+                print(f"🔴 Recording start @ {ev.db:.1f} dBFS", flush=True)
+            elif self.current:
+                self.iq.release(at=ev.offset)
+                self.audio.release(at=audio_at)
+                self.ending = self.current
+                print(f"⚫️ Recording stop @ {ev.db:.1f} dBFS", flush=True)
+        if self.ending and not self.iq.capturing and not self.audio.capturing:
+            self._finish()
+        return len(p)
+
+    def _finish(self):
+        """Write the captured burst (lookback included) and hand it to the feature stage."""
+        path, self.current, self.ending = self.current, None, None
+        if not path:
+            return
+        audio, iq = self.audio.view(), self.iq.view()
+        if len(audio) <= self.audio.trigger_at:
+            return
+        wav = WavWriter(path, self.audio_rate)
+        wav.write(audio)
+        wav.close()
+        self.saved += 1
+        print(f"💾 Saved: {path}", flush=True)
+        if self.save_iq:
+            save_sidecar(path, iq, self.channel_rate, self.audio_rate, self.iq.trigger_at, self.freq,
+                         self.audio.trigger_at)
+        if self.pool and not self.pool.submit(path, iq, audio[self.audio.trigger_at:], self.channel_rate,
+                                              self.audio_rate, trigger_at=self.iq.trigger_at):
+            print(f"⚠️ Fingerprint queue full, skipped {path}", flush=True)
+
+    def fingerprint_done(self, path, fp, err):
+        if err:
+            print(f"⚠️ Fingerprint failed for {path}: {err}", flush=True)
+            return
+        print(f"🧬 Renamed → {rename_tagged(path, fp)}", flush=True)
+
+    def run(self):
+        """Until the DSP stage has closed its rings and they are drained."""
+        while True:
+            if self.step():
+                continue
+            power = self.rings["power"]
+            if power.closed and self.pos["power"] >= power.written:
+                break                   # the DSP stage ended and everything is consumed
+            power.wait(self.pos["power"], 0.1)
+        if self.current:
+            # keep the burst that was still on the air
+            self.iq.release()
+            self.audio.release()
+            self._finish()
+
+    def close(self, timeout=10.0):
+        if self.pool:
+            # let queued bursts finish (bounded) so a replay run gets all its names
+            self.pool.close(drain=timeout)
+        for ring in self.rings.values():
+            ring.close()
+
+
+def run_recorder(names, channel_rate, cpus=None, **kw):
+    """Recorder process (spawns the feature workers itself)."""
+    pin(cpus)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    rec = RingRecorder(names, channel_rate, **kw)
+    try:
+        rec.run()
+    finally:
+        rec.close()
+    print(f"📊 Recorder: {rec.saved} bursts, samples lost {rec.lost}", flush=True)
+
+
+class SplitRecorder:
+    """Supervisor: owns the rings and starts the dsp and recorder processes.
+
+    `dsp` is the DSP stage's entry point (run_dsp's signature); anything
+    that fills the three rings will do.
+    """
+
+    def __init__(self, source="rtl=0", freq=437.225e6, ring_seconds=2.0, dsp_cpus=None, rec_cpus=None,
+                 fp_cpus=None, samp_rate=SAMP_RATE, dsp=run_dsp, **rec_kw):
+        decim = max(1, int(round(samp_rate / 96e3)))       # as nfm_channel picks it
+        self.channel_rate = samp_rate / decim
+        rates = {"iq": self.channel_rate, "power": self.channel_rate, "audio": AUDIO_RATE}
+        self.rings = {k: ShmRing(int(ring_seconds * rates[k]), STREAMS[k]) for k in STREAMS}
+        names = {k: r.name for k, r in self.rings.items()}
+
+        ctx = mp.get_context("spawn")                       # never fork a running flowgraph
+        self.stop_event = ctx.Event()
+        self.dsp = ctx.Process(target=dsp, name="dsp",
+                               args=(source, freq, names, self.stop_event, dsp_cpus, samp_rate))
+        # not a daemon: it starts the fingerprint workers
+        self.rec = ctx.Process(target=run_recorder, name="recorder",
+                               args=(names, self.channel_rate, rec_cpus),
+                               kwargs=dict(rec_kw, freq=freq, fp_cpus=fp_cpus))
+
+    def start(self):
+        self.rec.start()
+        self.dsp.start()
+
+    def stop(self):
+        self.stop_event.set()
+
+    def wait(self):
+        """Until both stages exit (the recorder drains the rings first)."""
+        self.dsp.join()
+        for ring in self.rings.values():
+            ring.close_writer()         # also if the dsp stage died
+        self.rec.join()
+        for ring in self.rings.values():
+            ring.close()
@@ -0,0 +1,93 @@
+import os
+import json
+
+import numpy as np
+import pytest
+
+from burst_archive import ArchiveWriter, BurstArchive, index_dtype, soundfile
+
+CODECS = ["zlib"] + (["flac"] if soundfile is not None else [])
+
+
+def burst(n, seed):
+    rng = np.random.default_rng(seed)
+    audio = (0.5 * np.sin(np.arange(n) / 7.0)).astype(np.float32)
+    iq = (rng.standard_normal(2 * n) * 0.1).astype(np.float32).view(np.complex64)
+    return audio, iq
+
+
+@pytest.mark.parametrize("codec", CODECS)
+def test_round_trip_and_reopen(tmp_path, codec):
+    path = str(tmp_path / "arch")
+    w = ArchiveWriter(path, 48000, 96000, codec)
+    a0, q0 = burst(4800, 0)
+    a1, q1 = burst(9600, 1)
+    assert w.write(a0, q0, trigger_at=100, t=1.0, freq=437e6, audio_trigger_at=2400) == 0
+    assert w.write(a1, q1, trigger_at=200, t=2.0, freq=446e6) == 1
+    w.set_features(1, {"ramp": 3.0})
+    w.close()
+
+    w = ArchiveWriter(path, 48000, 96000, codec)        # appends
+    assert w.write(*burst(480, 2), t=3.0) == 2
+    w.close()
+
+    ar = BurstArchive(path)
+    assert len(ar) == 3
+    np.testing.assert_allclose(ar.audio(0), a0, atol=1 / 32767)
+    np.testing.assert_allclose(ar.audio(1), a1, atol=1 / 32767)
+    iq, at = ar.iq(1)
+    assert at == 200
+    np.testing.assert_allclose(iq, q1, atol=np.abs(q1.view(np.float32)).max() / 32767)
+    assert ar.audio_trigger_at(0) == 2400 and ar.audio_trigger_at(1) == 0
+    # on the air from the trigger, not counting the lookback
+    assert ar.index[0]["duration"] == pytest.approx(0.05)
+    assert ar.features_of(1)["ramp"] == 3.0
+    assert np.isnan(ar.features_of(0)["ramp"])
+    assert list(ar.query(freq=446e6)) == [1]
+    assert list(ar.query(start=1.5, end=2.5)) == [1]
+    assert list(ar.query(min_duration=0.15)) == [1]
+    assert list(ar.query(min_duration=0.08)) == [1]
+
+
+def test_layout_1_archives_still_read(tmp_path):
+    path = str(tmp_path / "arch")
+    os.makedirs(path)
+    with open(os.path.join(path, "index.json"), "w") as f:
+        json.dump({"codec": "zlib", "audio_rate": 48000, "iq_rate": 96000.0, "features": ["ramp"]}, f)
+    row = np.zeros(1, index_dtype(("ramp",), layout=1))
+    row["duration"], row["trigger_at"] = 0.5, 7
+    row.tofile(os.path.join(path, "index.bin"))
+    ar = BurstArchive(path)
+    assert len(ar) == 1 and ar.index[0]["duration"] == 0.5 and ar.audio_trigger_at(0) == 0
+    with pytest.raises(ValueError):
+        ArchiveWriter(path, 48000, 96000, "zlib", features=("ramp",))
+
+
+def test_torn_last_row_is_dropped(tmp_path):
+    path = str(tmp_path / "arch")
+    w = ArchiveWriter(path, 48000, 96000, "zlib")
+    w.write(*burst(480, 0))
+    w.close()
+    with open(os.path.join(path, "index.bin"), "ab") as f:
+        f.write(b"\0" * 5)
+    w = ArchiveWriter(path, 48000, 96000, "zlib")
+    assert w.write(*burst(480, 1)) == 1
+    w.close()
+    assert os.path.getsize(os.path.join(path, "index.bin")) == 2 * index_dtype().itemsize
+
+
+def test_changed_settings_are_refused(tmp_path):
+    path = str(tmp_path / "arch")
+    ArchiveWriter(path, 48000, 96000, "zlib").close()
+    with pytest.raises(ValueError):
+        ArchiveWriter(path, 44100, 96000, "zlib")
+    with open(os.path.join(path, "index.json")) as f:
+        assert json.load(f)["audio_rate"] == 48000
+
+
+def test_features_for_unknown_burst_are_ignored(tmp_path):
+    path = str(tmp_path / "arch")
+    w = ArchiveWriter(path, 48000, 96000, "zlib")
+    w.set_features(5, {"ramp": 1.0})
+    w.close()
+    assert len(BurstArchive(path)) == 0
@@ -0,0 +1,284 @@
+import numpy as np
+import pytest
+
+from dsp import BurstRing, NoiseFloor, HysteresisTrigger, MovingPower, ZcrGate, WavWriter, SyntheticNFM, burst_stamp
+
+BLOCKS = (1, 7, 256, 4096, 1 << 20)
+
+
+def chunks(x, size):
+    for i in range(0, len(x), size):
+        yield i, x[i:i + size]
+
+
+def nfm(n, rate=96e3, **kw):
+    out = np.empty(n, dtype=np.complex64)
+    SyntheticNFM(rate, burst=0.2, gap=0.3, seed=1, **kw).fill(out)
+    return out
+
+
+def power(x):
+    return MovingPower(48).process(x[None])[0]
+
+
+# --- BurstRing ---------------------------------------------------------------
+
+def capture(x, block, start, end, pre=100, post=1000):
+    """Push x in `block`-sized pieces, each edge given before the block that holds it."""
+    ring = BurstRing(pre, post, dtype=np.float32)
+    for base, chunk in chunks(x, block):
+        if base <= start < base + len(chunk):
+            ring.trigger(start)
+        if base <= end < base + len(chunk):
+            ring.release(at=end)
+        ring.push(chunk)
+    return ring
+
+
+@pytest.mark.parametrize("block", (1, 13, 64, 500))
+def test_burst_ring_offsets_are_block_size_invariant(block):
+    x = np.arange(5000, dtype=np.float32)
+    ring = capture(x, block, 1000, 1400)
+    assert not ring.capturing
+    np.testing.assert_array_equal(ring.view(), x[900:1400])
+    assert ring.trigger_at == 100
+
+
+def test_burst_ring_release_ahead_of_stream_keeps_capturing():
+    x = np.arange(1000, dtype=np.float32)
+    ring = BurstRing(10, 500, dtype=np.float32)
+    ring.push(x[:100])
+    ring.trigger(100)
+    ring.release(at=300)
+    assert ring.capturing
+    ring.push(x[100:200])
+    assert ring.capturing and len(ring.view()) == 110
+    ring.push(x[200:400])
+    assert not ring.capturing
+    np.testing.assert_array_equal(ring.view(), x[90:300])
+
+
+def test_burst_ring_when_done_waits_for_the_tail():
+    x = np.arange(1000, dtype=np.float32)
+    ring = BurstRing(10, 500, dtype=np.float32)
+    got = []
+    ring.push(x[:100])
+    ring.trigger(100)
+    ring.release(at=300)                        # edge ahead of the samples
+    ring.when_done(lambda view, at: got.append((view.copy(), at)))
+    ring.push(x[100:200])
+    assert not got
+    ring.push(x[200:400])
+    np.testing.assert_array_equal(got[0][0], x[90:300])
+    assert got[0][1] == 10 and len(got) == 1
+
+
+def test_burst_ring_when_done_now_or_on_cut():
+    x = np.arange(1000, dtype=np.float32)
+    ring = BurstRing(10, 500, dtype=np.float32)
+    got = []
+    ring.push(x[:100])
+    ring.trigger(100)
+    ring.push(x[100:300])
+    ring.release(at=200)
+    ring.when_done(lambda view, at: got.append(len(view)))
+    assert got == [110]                         # already complete
+    ring.trigger()
+    ring.release(at=800)
+    ring.when_done(lambda view, at: got.append(len(view)))
+    ring.push(x[300:400])
+    ring.trigger()                              # cuts the burst still capturing
+    assert got == [110, 110]
+
+
+def test_burst_ring_trigger_older_than_the_lookback():
+    x = np.arange(1000, dtype=np.float32)
+    ring = BurstRing(10, 500, dtype=np.float32)
+    ring.push(x[:300])
+    ring.trigger(200)                           # 100 samples late, only 10 kept
+    assert ring.trigger_at == 0
+    np.testing.assert_array_equal(ring.view(), x[290:300])
+    ring.push(x[300:400])
+    ring.release(at=350)
+    np.testing.assert_array_equal(ring.view(), x[290:350])
+
+
+@pytest.mark.parametrize("edge", [dict(at=100), dict(back=500)])
+def test_burst_ring_release_before_the_burst_is_empty(edge):
+    x = np.arange(1000, dtype=np.float32)
+    ring = BurstRing(10, 500, dtype=np.float32)
+    got = []
+    ring.push(x[:300])
+    ring.trigger(200)
+    ring.release(**edge)                        # ends before the burst's first sample
+    assert ring.fill == 0 and not ring.capturing
+    ring.when_done(lambda view, at: got.append((len(view), at)))
+    assert got == [(0, 0)]
+    ring.push(x[300:400])                       # nothing stale shows up
+    assert len(ring.view()) == 0
+
+
+def test_burst_ring_caps_at_capacity():
+    x = np.arange(3000, dtype=np.float32)
+    ring = BurstRing(10, 100, dtype=np.float32)
+    ring.push(x[:50])
+    ring.trigger()
+    ring.push(x[50:])
+    assert ring.truncated and not ring.capturing
+    np.testing.assert_array_equal(ring.view(), x[40:150])
+
+
+def test_burst_ring_lookback_shorter_than_history():
+    x = np.arange(100, dtype=np.float32)
+    ring = BurstRing(50, 100, dtype=np.float32)
+    ring.push(x[:20])
+    ring.trigger()
+    ring.push(x[20:40])
+    ring.release()
+    np.testing.assert_array_equal(ring.view(), x[:40])
+    assert ring.trigger_at == 20
+
+
+def test_burst_ring_previous_slot_survives_next_trigger():
+    x = np.arange(400, dtype=np.float32)
+    ring = BurstRing(0, 100, dtype=np.float32)
+    ring.trigger()
+    ring.push(x[:50])
+    ring.release()
+    first = ring.view()
+    ring.trigger()
+    ring.push(x[50:80])
+    np.testing.assert_array_equal(first, x[:50])
+
+
+def test_burst_ring_multichannel_rows():
+    x = np.arange(600, dtype=np.complex64).reshape(300, 2)
+    ring = BurstRing(20, 100, channels=2)
+    for base, chunk in chunks(x, 37):
+        if base <= 100 < base + len(chunk):
+            ring.trigger(100)
+            ring.release(at=150)
+        ring.push(chunk)
+    np.testing.assert_array_equal(ring.view(), x[80:150])
+
+
+# --- trigger / floor / power / ZCR: results must not depend on block size ---
+
+def run_blocks(fn, x, block):
+    out = []
+    for base, chunk in chunks(x, block):
+        out += fn(chunk, base)
+    return [(e.kind, e.offset) for e in out]
+
+
+def test_hysteresis_trigger_is_block_size_invariant():
+    p = power(nfm(110000))
+    ref = None
+    for block in BLOCKS:
+        trig = HysteresisTrigger(96e3, on_db=-30.0, off_db=-35.0, hold=0.01)
+        ev = run_blocks(trig.process, p, block)
+        ref = ev if ref is None else ref
+        assert ev == ref, block
+    assert [k for k, _ in ref] == ["start", "end"] * 2
+
+
+def test_hysteresis_trigger_follows_floor():
+    # thresholds move once per block, so only small blocks are compared
+    p = power(nfm(192000))
+    ref = None
+    for block in (256, 960, 4096):
+        trig = HysteresisTrigger(96e3, on_db=-30.0, off_db=-35.0, hold=0.01, floor_db=-50.0)
+        ev = [e for e in run_blocks(trig.process, p, block) if e[1] > 96e3 * 0.1]
+        ref = ev if ref is None else ref
+        assert [k for k, _ in ev] == [k for k, _ in ref]
+        assert np.all(np.abs(np.subtract([o for _, o in ev], [o for _, o in ref])) < 200)
+    assert len(ref) >= 4
+    assert -45 < trig.floor.db()[0] < -35
+
+
+def test_hysteresis_trigger_edges_on_the_burst():
+    gen = SyntheticNFM(96e3, burst=0.2, gap=0.3, seed=1, ramp=0.001)
+    x = np.empty(96000, dtype=np.complex64)
+    gen.fill(x)
+    trig = HysteresisTrigger(96e3, on_db=-30.0, off_db=-35.0, hold=0.01)
+    ev = trig.process(MovingPower(48).process(x[None])[0], 0)
+    for (start, end), (s, e) in zip(gen.bursts(len(x)), zip(ev[::2], ev[1::2])):
+        assert abs(s.offset - start) < 100 and abs(e.offset - end) < 100
+
+
+def test_hysteresis_trigger_quiet_run_across_blocks():
+    p = np.zeros(100, dtype=np.float32)
+    p[:10] = 1.0
+    trig = HysteresisTrigger(1000, on_db=-10.0, off_db=-20.0, hold=0.02)
+    ev = []
+    for i in range(0, 100, 3):
+        ev += trig.process(p[i:i + 3], i)
+    assert [(e.kind, e.offset) for e in ev] == [("start", 0), ("end", 10)]
+
+
+def test_noise_floor_is_block_size_invariant():
+    rng = np.random.default_rng(0)
+    p = rng.exponential(1e-4, size=(2, 200000))
+    ref = None
+    for block in BLOCKS:
+        nf = NoiseFloor(96e3, channels=2)
+        for _, chunk in chunks(p.T, block):
+            nf.update(chunk.T)
+        ref = nf.lin if ref is None else ref
+        np.testing.assert_allclose(nf.lin, ref, rtol=1e-9)
+    assert np.all(np.abs(10 * np.log10(ref / 1e-4)) < 1.5)
+
+
+def test_noise_floor_holds_while_busy():
+    nf = NoiseFloor(1000, block=0.01, span=1.0)
+    nf.update(np.full(2000, 1e-4))
+    held = nf.lin.copy()
+    nf.update(np.full(2000, 1.0), busy=True)
+    np.testing.assert_allclose(nf.lin, held)
+    nf = NoiseFloor(1000, block=0.01, span=1.0, hold=1.0)
+    nf.update(np.full(2000, 1e-4))
+    for _ in range(5):
+        nf.update(np.full(1000, 1.0), busy=True)
+    assert nf.lin[0] > 0.5                       # a step that lasts gets learned
+
+
+def test_moving_power_is_block_size_invariant():
+    x = nfm(20000)[None]
+    ref = MovingPower(48).process(x)
+    for block in BLOCKS:
+        mp = MovingPower(48)
+        out = np.concatenate([mp.process(c.reshape(1, -1)) for _, c in chunks(x[0], block)], axis=1)
+        np.testing.assert_allclose(out, ref, rtol=1e-5, atol=1e-12)
+
+
+def test_zcr_gate_is_block_size_invariant():
+    rate = 48000
+    t = np.arange(rate) / rate
+    x = (0.3 * np.sin(2 * np.pi * 400 * t)).astype(np.float32)
+    x[rate // 2:] = np.random.default_rng(0).uniform(-0.3, 0.3, rate // 2)
+    ref = None
+    for block in BLOCKS:
+        gate = ZcrGate(rate)
+        ev = run_blocks(gate.process, x, block)
+        ref = ev if ref is None else ref
+        assert ev == ref, block
+    assert ref == [("live", 0), ("dead", rate // 2)]
+
+
+def test_wav_writer_truncate(tmp_path):
+    path = str(tmp_path / "a.wav")
+    wav = WavWriter(path, 8000)
+    wav.write(np.zeros(100, np.float32))
+    wav.truncate(40)
+    wav.write(np.zeros(10, np.float32))
+    wav.close()
+    with open(path, "rb") as f:
+        data = f.read()
+    assert len(data) == 44 + 2 * 50
+    assert int.from_bytes(data[40:44], "little") == 100
+
+
+def test_burst_stamp_keeps_the_milliseconds():
+    assert burst_stamp(1747234676.1234) == "1747234676_123"
+    assert burst_stamp(1747234676.9996) == "1747234677_000"
+    assert burst_stamp(1747234676.2) != burst_stamp(1747234676.7)
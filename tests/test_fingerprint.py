@@ -0,0 +1,59 @@
+import os
+import json
+
+import numpy as np
+import pytest
+
+import fingerprint
+from dsp import WavWriter
+from fingerprint import rename_tagged, resume_renames, save_sidecar, sidecar_paths, tagged_name
+
+FP = {"ramp": 0.012, "cfo": 1.2, "bw": 12.5}
+
+
+def recording(tmp_path):
+    wav = str(tmp_path / "baofeng_1718000000.wav")
+    w = WavWriter(wav, 48000)
+    w.write(np.zeros(480, np.float32))
+    w.close()
+    save_sidecar(wav, np.ones(960, np.complex64), 96e3, 48e3, 100)
+    return wav
+
+
+def files(tmp_path):
+    return sorted(os.listdir(tmp_path))
+
+
+def test_rename_moves_the_sidecars_and_stamps_them(tmp_path):
+    wav = recording(tmp_path)
+    new = rename_tagged(wav, FP)
+    assert new == tagged_name(wav, FP)
+    base = os.path.basename(new)[:-4]
+    assert files(tmp_path) == [base + ".iq.cf32", base + ".iq.json", base + ".wav"]
+    with open(sidecar_paths(new)[1]) as f:
+        meta = json.load(f)
+    assert meta["version"] == fingerprint.VERSION and meta["features"] == FP
+
+
+@pytest.mark.parametrize("fail_on", [".iq.cf32", ".wav"])
+def test_a_rename_cut_short_is_finished_later(tmp_path, monkeypatch, fail_on):
+    wav = recording(tmp_path)
+    rename = os.rename
+
+    def dies(src, dst):
+        if src.endswith(fail_on):
+            raise KeyboardInterrupt
+        rename(src, dst)
+    monkeypatch.setattr(os, "rename", dies)
+    with pytest.raises(KeyboardInterrupt):
+        rename_tagged(wav, FP)
+    monkeypatch.setattr(os, "rename", rename)
+    assert os.path.exists(wav)                  # the WAV goes last
+
+    metas = [str(tmp_path / n) for n in files(tmp_path) if n.endswith(".iq.json")]
+    done = resume_renames(metas)
+    new = tagged_name(wav, FP)
+    assert [(old, moved) for old, moved, _ in done] == [(wav, new)]
+    base = os.path.basename(new)[:-4]
+    assert files(tmp_path) == [base + ".iq.cf32", base + ".iq.json", base + ".wav"]
+    assert resume_renames(metas) == []
@@ -0,0 +1,109 @@
+import json
+
+import numpy as np
+import pytest
+
+from fingerprint import sidecar_paths
+from fingerprint_db import FingerprintDB, FEATURES, SCALE
+
+CENTRES = np.array([(0.020, 0.4, 11.0), (0.035, -0.3, 10.0), (0.012, 1.2, 12.5)])
+SPREAD = np.array([0.002, 0.05, 0.2])
+
+
+def filled(path, n, rng, **kw):
+    """n bursts with ramp/cfo/bw only (as imported from tagged names)."""
+    db = FingerprintDB(str(path), capacity=64, **kw)
+    which = rng.integers(0, len(CENTRES), n)
+    for i, v in enumerate(CENTRES[which] + rng.normal(0, SPREAD, (n, 3))):
+        db.add(dict(zip(FEATURES, v)), float(i), 437.225e6, f"burst_{i}.wav")
+    return db
+
+
+def brute(db, fp, k):
+    """The k smallest distances over every stored burst."""
+    q = db.vector(fp) / db.scale
+    # a missing feature (NaN on either side) doesn't count
+    return np.sort(np.sqrt(np.nansum((db.vec[:db.n] / db.scale - q) ** 2, axis=1)))[:k]
+
+
+def test_nearest_matches_a_full_scan(tmp_path):
+    rng = np.random.default_rng(0)
+    db = filled(tmp_path, 5000, rng)
+    db.index.tail = 500                 # most rows sorted into cells, some in the tail
+    db.update(7, dict(zip(FEATURES, CENTRES[2])))
+    try:
+        near = CENTRES[rng.integers(0, len(CENTRES), 100)] + rng.normal(0, SPREAD, (100, 3))
+        far = rng.normal(0, (0.05, 5.0, 20.0), (50, 3))     # outside every cluster
+        for v in np.concatenate([near, far]):
+            fp = dict(zip(FEATURES, v))
+            # ids may swap on near-ties, the distances may not (float32 kernel)
+            got = np.array([d for _, d, *_ in db.nearest(fp, 7)])
+            np.testing.assert_allclose(got ** 2, brute(db, fp, 7) ** 2, rtol=1e-4, atol=2e-3)
+    finally:
+        db.close()
+
+
+def test_identify_follows_labels_and_updates(tmp_path):
+    rng = np.random.default_rng(1)
+    db = filled(tmp_path, 200, rng)
+    try:
+        a = db.add(dict(zip(FEATURES, CENTRES[0])), 0.0, 437.225e6, "a.wav", "UV-32")
+        b = db.add(dict(zip(FEATURES, CENTRES[1])), 0.0, 437.225e6, "b.wav", "TD-H8")
+        assert db.identify(dict(zip(FEATURES, CENTRES[0] + 0.1 * SPREAD)))[0] == "UV-32"
+        db.update(a, dict(zip(FEATURES, CENTRES[2])))
+        assert db.identify(dict(zip(FEATURES, CENTRES[0])))[0] is None
+        db.label(b, None)
+        assert db.identify(dict(zip(FEATURES, CENTRES[1])))[0] is None
+        assert db.nearest(dict(zip(FEATURES, CENTRES[2])), 1)[0][:1] == (a,)
+    finally:
+        db.close()
+
+
+def radio(ctcss_hz=88.5, iq_amp_db=0.1, **basic):
+    fp = dict(zip(FEATURES, (0.020, 0.4, 11.0, 2.4, 0.45, 0.8, 350, 6.0, 2.0, 3.1, 0.0, -18, 0.0, 0.8)))
+    fp.update(basic, ctcss_hz=ctcss_hz, iq_amp_db=iq_amp_db)
+    return fp
+
+
+def test_rf_features_tell_apart_radios_with_the_same_basic_fingerprint(tmp_path):
+    rng = np.random.default_rng(2)
+    db = FingerprintDB(str(tmp_path), capacity=64)
+    try:
+        radios = {"UV-32": radio(88.5, 0.1), "TD-H8": radio(100.0, 0.1), "RT-4D": radio(88.5, 0.4)}
+        for name, fp in radios.items():
+            for i in range(5):
+                noisy = {f: v + rng.normal(0, 0.2 * SCALE[f]) for f, v in fp.items()}
+                db.add(noisy, float(i), 437.225e6, f"{name}_{i}.wav", name)
+        for name, fp in radios.items():
+            assert db.identify(fp)[0] == name
+            assert {path.split("_")[0] for _, _, path, _ in db.nearest(fp, 5)} == {name}
+        # the file-name tag alone can't tell them apart: all three stay candidates
+        basic = {f: radios["UV-32"][f] for f in ("ramp", "cfo", "bw")}
+        assert {path.split("_")[0] for _, _, path, _ in db.nearest(basic, 15)} == set(radios)
+    finally:
+        db.close()
+
+
+def test_migrate_fills_new_features_from_sidecars(tmp_path):
+    store, wav = tmp_path / "db", tmp_path / "burst.wav"
+    fp = radio(100.0, 0.3)
+    _, meta = sidecar_paths(str(wav))
+    with open(meta, "w") as f:
+        json.dump({"features": fp}, f)
+    old = FingerprintDB(str(store), features=("ramp", "cfo", "bw"), capacity=64)
+    old.add(fp, 0.0, 437.225e6, str(wav), "TD-H8")
+    old.add(radio(cfo=0.6), 1.0, 437.225e6, str(tmp_path / "gone.wav"), "UV-32")
+    old.close()
+
+    with pytest.raises(ValueError, match="migrate"):
+        FingerprintDB(str(store))
+    db = FingerprintDB(str(store), migrate=True)
+    try:
+        assert db.migrated == 1
+        assert db.vec[0, FEATURES.index("ctcss_hz")] == 100.0
+        assert np.isnan(db.vec[1, FEATURES.index("ctcss_hz")])      # no sidecar: basic features only
+        assert np.allclose(db.vec[1, :3], [radio(cfo=0.6)[f] for f in ("ramp", "cfo", "bw")])
+        assert db.identify(fp)[0] == "TD-H8"
+    finally:
+        db.close()
+    FingerprintDB(str(store)).close()       # converted for good
@@ -0,0 +1,80 @@
+import os
+import time
+import signal
+import threading
+
+import numpy as np
+import pytest
+
+from dsp import SyntheticNFM
+from fingerprint_pool import FingerprintPool
+
+
+@pytest.fixture(scope="module")
+def burst():
+    iq = np.empty(9600, dtype=np.complex64)
+    SyntheticNFM(96e3, burst=0.08, gap=0.02, seed=0).fill(iq)
+    audio = np.angle(iq[1:] * np.conj(iq[:-1]))[::2].astype(np.float32)
+    return iq, audio
+
+
+def test_latest_waits_when_only_reservations_fill_the_queue(burst):
+    pool = FingerprintPool(len(burst[0]), len(burst[1]), workers=1, depth=2, policy="latest")
+    try:
+        with pool.cond:
+            pool.reserved = pool.depth          # other submitters mid-copy, nothing queued
+
+        def release():
+            with pool.cond:
+                pool.reserved = 0
+                pool.cond.notify_all()
+        threading.Timer(0.2, release).start()
+        assert pool.submit("a", *burst, 96e3, 48e3)
+    finally:
+        pool.close()
+
+
+def test_close_drains_queued_bursts(burst):
+    done = []
+    pool = FingerprintPool(len(burst[0]), len(burst[1]), workers=1, depth=4, policy="block",
+                           on_result=lambda key, fp, err: done.append((key, err)))
+    for k in range(4):
+        assert pool.submit(k, *burst, 96e3, 48e3)
+    assert pool.close(drain=30) == 0
+    assert sorted(k for k, _ in done) == [0, 1, 2, 3]
+    assert all(err is None for _, err in done)
+
+
+def test_close_reports_discarded_bursts(burst):
+    pool = FingerprintPool(len(burst[0]), len(burst[1]), workers=1, depth=4, policy="block")
+    with pool.cond:
+        pool.workers = 0                        # dispatcher holds everything back
+    for k in range(3):
+        pool.submit(k, *burst, 96e3, 48e3)
+    assert pool.close() == 3
+
+
+def test_dead_worker_fails_its_burst_and_is_replaced(burst):
+    done = []
+    iq = np.tile(burst[0], 100)                 # 10 s: still running when the worker is killed
+    audio = np.tile(burst[1], 100)
+    pool = FingerprintPool(len(iq), len(audio), workers=1, depth=2, policy="block",
+                           on_result=lambda key, fp, err: done.append((key, err)))
+    try:
+        pid = pool.procs[0].pid
+        assert pool.submit("killed", iq, audio, 96e3, 48e3)
+        deadline = time.time() + 10
+        while pool.busy[0] is None and time.time() < deadline:
+            time.sleep(0.001)
+        os.kill(pid, signal.SIGKILL)
+        while not done and time.time() < deadline:
+            time.sleep(0.01)
+        assert done == [("killed", "worker died (exit code -9)")]
+        assert pool.procs[0].pid != pid
+        assert pool.submit("next", *burst, 96e3, 48e3)
+    finally:
+        pool.close(drain=30)
+    assert done[1] == ("next", None)
+    st = pool.stats()
+    assert st["failed"] == 1 and st["completed"] == 1 and st["restarts"] == 1
+    assert len(pool.free) == len(pool.shms)
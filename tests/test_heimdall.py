@@ -0,0 +1,44 @@
+import numpy as np
+
+from dsp import SyntheticNFM
+from heimdall import HeimdallReader, StandInServer
+
+
+def test_frames_gaps_and_dummies():
+    srv = StandInServer(channels=3, cpi=1024, gen=SyntheticNFM(2.4e6, seed=0), drop_every=5, dummy_every=7)
+    reader = HeimdallReader(port=srv.port, max_channels=3, max_cpi=1024, retry=0.01)
+    try:
+        frames = [reader.read() for _ in range(20)]
+        st = reader.stats()
+    finally:
+        reader.close()
+        srv.close()
+    assert all(f.iq.shape == (3, 1024) for f in frames)
+    last = frames[-1].iq
+    np.testing.assert_array_equal(last[0], last[2])
+    assert st["frames"] == 20 and st["dummies"] > 0
+    assert st["gaps"] > 0 and st["dropped_frames"] == st["gaps"]
+    assert st["sync_errors"] == 0
+
+
+def test_views_stay_valid_for_one_more_read():
+    srv = StandInServer(channels=1, cpi=256, gen=SyntheticNFM(2.4e6, seed=1))
+    reader = HeimdallReader(port=srv.port, max_channels=1, max_cpi=256, retry=0.01)
+    try:
+        first = reader.read()
+        kept = first.iq.copy()
+        reader.read()
+        np.testing.assert_array_equal(first.iq, kept)
+    finally:
+        reader.close()
+        srv.close()
+
+
+def test_payload_grows_for_larger_cpi():
+    srv = StandInServer(channels=2, cpi=4096)
+    reader = HeimdallReader(port=srv.port, max_channels=2, max_cpi=1024, retry=0.01)
+    try:
+        assert reader.read().iq.shape == (2, 4096)
+    finally:
+        reader.close()
+        srv.close()
@@ -0,0 +1,26 @@
+import pytest
+
+pytest.importorskip("gnuradio.gr")
+
+from multi_dongle import Supervisor, share_cpus       # noqa: E402
+
+
+@pytest.mark.parametrize("n,cpus,want", [
+    (2, [0, 1, 2, 3, 4], [[0, 1, 2], [3, 4]]),
+    (3, [0, 1, 2, 3], [[0, 1], [2], [3]]),
+    (2, [0, 1, 2, 3], [[0, 1], [2, 3]]),
+    (3, [0, 1], [[0], [1], [0]]),
+])
+def test_share_cpus_uses_every_core(n, cpus, want):
+    assert share_cpus(n, cpus) == want
+
+
+@pytest.mark.parametrize("dev", [
+    {"source": "rtl=1", "freq": 446e6, "db": "/tmp/fpdb"},
+    {"source": "rtl=1", "freq": 446e6, "metrics_port": 9102},
+    {"source": "rtl=1", "freq": 446e6, "archive": "/tmp/arch"},
+])
+def test_supervisor_keys_stay_with_the_supervisor(dev):
+    first = {"source": "rtl=0", "freq": 437e6, "archive": "/tmp/arch"}
+    with pytest.raises(ValueError):
+        Supervisor([first, dev])
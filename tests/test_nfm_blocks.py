@@ -0,0 +1,76 @@
+import wave
+
+import numpy as np
+import pytest
+
+gr = pytest.importorskip("gnuradio.gr")
+blocks = pytest.importorskip("gnuradio.blocks")
+
+from nfm_blocks import burst_wav_sink, nfm_channel_bank, power_trigger       # noqa: E402
+
+
+def run(x, sink):
+    tb = gr.top_block()
+    tb.connect(blocks.vector_source_f(x.tolist()), sink)
+    tb.run()
+
+
+def frames(path):
+    with wave.open(path) as w:
+        return np.frombuffer(w.readframes(w.getnframes()), "<i2")
+
+
+def test_offsets_land_on_samples(tmp_path):
+    x = (np.arange(20000) % 1000 / 1000.0).astype(np.float32)
+    sink = burst_wav_sink(8000)
+    a, b = str(tmp_path / "a.wav"), str(tmp_path / "b.wav")
+    sink.open(a, 1000)
+    sink.close(3000)
+    sink.open(b, 5000)
+    sink.close(5500)
+    run(x, sink)
+    np.testing.assert_array_equal(frames(a), (x[1000:3000] * 32767).astype("<i2"))
+    assert len(frames(b)) == 500
+
+
+def test_stop_reports_a_file_cut_short(tmp_path):
+    x = np.zeros(20000, dtype=np.float32)
+    sink = burst_wav_sink(8000)
+    a = str(tmp_path / "a.wav")
+    closed = []
+    sink.open(a, 1000)
+    sink.close(50000, lambda path, n: closed.append((path, n)))     # past the end of the stream
+    run(x, sink)
+    assert closed == [(a, 19000)]
+    assert len(frames(a)) == 19000
+
+
+def test_lookback_and_padding(tmp_path):
+    x = (np.arange(20000) % 1000 / 1000.0).astype(np.float32)
+    sink = burst_wav_sink(8000, pre=0.1)            # 800 frames
+    a, b = str(tmp_path / "a.wav"), str(tmp_path / "b.wav")
+    sink.open(a, 300)                               # lookback the stream never had
+    sink.close(1000)
+    sink.open(b, 10000)
+    sink.close(11000)
+    run(x, sink)
+    got = frames(a)
+    assert len(got) == 1500 and not got[:500].any()
+    np.testing.assert_array_equal(frames(b), (x[9200:11000] * 32767).astype("<i2"))
+
+
+@pytest.mark.parametrize("offsets", ([0.0, 25e3, 25e3], [0.0, 12.5e3], [0.0, 1.3e6], [-1.2e6, 1.2e6]))
+def test_channel_bank_refuses_offsets_it_cannot_serve(offsets):
+    with pytest.raises(ValueError):
+        nfm_channel_bank(2.4e6, offsets)
+
+
+def test_trigger_reset_waits_for_the_next_block():
+    trig = power_trigger(1000, on_db=-10.0, off_db=-20.0, hold=0.01)
+    trig.trig.active = True                     # a burst on the channel tuned away from
+    trig.reset()
+    assert trig.trig.active                     # not torn from this thread
+    events = []
+    trig.subscribe(events.append)
+    run(np.zeros(1000, dtype=np.float32), trig)
+    assert events == [] and not trig.trig.active
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from shm_ring import ShmRing
+
+
+@pytest.fixture
+def ring():
+    r = ShmRing(100, np.float32)
+    yield r
+    r.close()
+
+
+@pytest.mark.parametrize("wblock,rblock", [(1, 1), (7, 13), (99, 50), (100, 100), (33, 256)])
+def test_read_matches_written_across_wraps(ring, wblock, rblock):
+    reader = ShmRing(dtype=np.float32, name=ring.name)
+    x = np.arange(1000, dtype=np.float32)
+    out = np.empty(rblock, np.float32)
+    got, pos = [], 0
+    for i in range(0, len(x), wblock):
+        ring.write(x[i:i + wblock])
+        while True:
+            n, pos, lost = reader.read(pos, out)
+            assert not lost
+            if not n:
+                break
+            got.append(out[:n].copy())
+    np.testing.assert_array_equal(np.concatenate(got), x)
+    reader.close()
+
+
+def test_lapped_reader_is_told_how_much_it_lost(ring):
+    ring.write(np.arange(250, dtype=np.float32))
+    out = np.empty(300, np.float32)
+    n, pos, lost = ring.read(0, out)
+    assert (n, pos, lost) == (100, 250, 150)
+    np.testing.assert_array_equal(out[:n], np.arange(150, 250))
+
+
+def test_block_larger_than_ring_keeps_its_tail(ring):
+    ring.write(np.arange(330, dtype=np.float32))
+    assert ring.written == 330
+    out = np.empty(100, np.float32)
+    n, pos, lost = ring.read(230, out)
+    np.testing.assert_array_equal(out[:n], np.arange(230, 330))
+
+
+def test_wait_and_close_writer(ring):
+    assert not ring.wait(0, timeout=0.01)
+    ring.write(np.ones(3, np.float32))
+    assert ring.wait(0, timeout=0.01)
+    assert not ring.wait(3, timeout=0.01)
+    ring.close_writer()
+    assert ring.closed and not ring.wait(3, timeout=1.0)
+
+
+def test_complex_rows_keep_dtype():
+    r = ShmRing(16, np.complex64)
+    x = (np.arange(20) + 1j * np.arange(20)).astype(np.complex64)
+    r.write(x)
+    out = np.empty(16, np.complex64)
+    n, _, lost = r.read(4, out)
+    np.testing.assert_array_equal(out[:n], x[4:])
+    assert lost == 0
+    r.close()